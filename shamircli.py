@@ -0,0 +1,217 @@
+###############################################################################
+# SHAMIRCLI.py
+# The command line of shamirshare2 (python -m shamirshare2): split a file or
+# stdin into share files, and combine share files back into the secret, a
+# chunk at a time in constant memory, in parallel worker processes if asked,
+# reporting the throughput on stderr.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Command line splitting and combining of files.
+
+    python -m shamirshare2 split [-k K] [-n N] [--field F] [--bits B]
+                                 [--chunk-size C] [--workers W]
+                                 [-o PREFIX] [--progress] [--quiet] [INPUT]
+        Split INPUT (default -, stdin) K-of-N, writing share x to the share
+        file PREFIX.x (see shamirfile.py).  PREFIX defaults to INPUT, or to
+        'share' for stdin.
+    python -m shamirshare2 combine [-o OUTPUT] [--workers W]
+                                   [--progress] [--quiet] SHARE [SHARE ...]
+        Recover the secret from K or more share files, writing it to OUTPUT
+        (default -, stdout).  OUTPUT is only created once the whole secret
+        has been recovered; a bad share leaves no partial file behind.
+
+The field is GF8 (the default; any file length), GF16 (even lengths), GFp
+over the first prime above 2^B (B a multiple of 8 and the file a multiple of
+B/8 bytes long) or GF2m of degree B (likewise).  Share files are written and
+read in chunks of C bytes (default 1 MiB), so memory use is a few chunks
+per share, times 2*W when the chunks are split or combined in W worker
+processes (W = 0 for one per CPU).  Ad hoc scripts around fit() and eval()
+turn each byte into an element object; this runs the byte kernels on whole
+chunks.
+
+    Usage:  ############# Split a file 2-of-3 and combine two shares #############
+
+        >>> import os, tempfile, shamircli
+        >>> folder = tempfile.mkdtemp()
+        >>> secret = bytes(range(256)) * 1000
+        >>> with open(os.path.join(folder, 'escrow.bin'), 'wb') as thefile: thefile.write(secret)
+        256000
+        >>> shamircli.main(['split', '-k', '2', '-n', '3', '--chunk-size', '65536', '--quiet', os.path.join(folder, 'escrow.bin')])
+        0
+        >>> sorted(os.listdir(folder))
+        ['escrow.bin', 'escrow.bin.1', 'escrow.bin.2', 'escrow.bin.3']
+        >>> shares = [os.path.join(folder, 'escrow.bin.' + x) for x in ('3', '1')]
+        >>> shamircli.main(['combine', '-o', os.path.join(folder, 'out.bin'), '--quiet'] + shares)
+        0
+        >>> open(os.path.join(folder, 'out.bin'), 'rb').read() == secret
+        True
+
+        ###### A corrupt chunk leaves no partial output
+        >>> data = bytearray(open(shares[0], 'rb').read()); data[-100] ^= 1
+        >>> with open(shares[0], 'wb') as thefile: thefile.write(data)
+        256046
+        >>> import contextlib, sys
+        >>> with contextlib.redirect_stderr(sys.stdout):
+        ...     shamircli.main(['combine', '-o', os.path.join(folder, 'bad.bin'), '--quiet'] + shares)
+        combine: Share 3: chunk 3 is corrupt
+        1
+        >>> sorted(name for name in os.listdir(folder) if name.startswith('bad'))
+        []
+
+        ###### Over GFp, in two worker processes
+        >>> shamircli.main(['split', '-k', '2', '-n', '3', '--field', 'GFp', '--bits', '128', '--workers', '2',
+        ...                 '--chunk-size', '4096', '-o', os.path.join(folder, 'p'), '--quiet', os.path.join(folder, 'escrow.bin')])
+        0
+        >>> shamircli.main(['combine', '-o', os.path.join(folder, 'out.bin'), '--workers', '2', '--quiet',
+        ...                 os.path.join(folder, 'p.2'), os.path.join(folder, 'p.3')])
+        0
+        >>> open(os.path.join(folder, 'out.bin'), 'rb').read() == secret
+        True
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import shamirfile
+import shamirshare2
+
+MIB = float(1 << 20)
+
+
+def field_for(name, bits=None):
+    """The field named GF8, GF16, GFp (first prime above 2^bits, default 256)
+    or GF2m (degree bits, default 64)"""
+    if name == 'GF8': return shamirshare2.GF8()
+    if name == 'GF16': return shamirshare2.GF16()
+    if name == 'GFp': return shamirshare2.GFp(shamirshare2.nextprime(2**(bits or 256)))
+    if name == 'GF2m': return shamirshare2.GF2m(bits or 64)
+    raise ValueError("Unknown field \'{0:}\', expected GF8, GF16, GFp or GF2m".format(name))
+
+def _length(thefile):  # Bytes left in thefile, or None for a pipe or terminal
+    try:
+        if not thefile.seekable(): return None
+        return os.fstat(thefile.fileno()).st_size - thefile.tell()
+    except (OSError, ValueError):
+        return None
+
+
+class Progress(object):
+    """Report bytes done (of total, if known) and the throughput on stream,
+    at most every interval seconds when asked to, and a summary at the end"""
+
+    def __init__(self, verb, total=None, show=False, stream=None, interval=1.0):
+        self.verb = verb
+        self.total = total
+        self.show = show
+        self.stream = sys.stderr if stream is None else stream
+        self.interval = interval
+        self.start = self.last = time.perf_counter()
+        self.done = 0
+
+    def _rate(self, now):
+        return self.done / MIB / max(now - self.start, 1e-9)
+
+    def __call__(self, done):
+        self.done = done
+        if not self.show: return
+        now = time.perf_counter()
+        if now - self.last < self.interval: return
+        self.last = now
+        percent = "" if not self.total else " ({0:.0f}%)".format(100.0 * done / self.total)
+        self.stream.write("\r{0:}: {1:.1f} MiB{2:}, {3:.1f} MiB/s ".format(self.verb, done / MIB, percent, self._rate(now)))
+        self.stream.flush()
+
+    def finish(self, what):
+        now = time.perf_counter()
+        if self.show: self.stream.write("\n")
+        self.stream.write("{0:} {1:} bytes {2:} in {3:.2f} s, {4:.1f} MiB/s\n".format(
+            self.verb, self.done, what, now - self.start, self._rate(now)))
+
+
+def split(args):
+    thefield = field_for(args.field, args.bits)
+    fromstdin = (args.input == '-')
+    if fromstdin:
+        infile = sys.stdin.buffer
+        prefix = args.output or 'share'
+    else:
+        infile = open(args.input, 'rb')
+        prefix = args.output or args.input
+    paths = ["{0:}.{1:}".format(prefix, x) for x in range(1, args.n + 1)]
+    outfiles = []
+    try:
+        length = _length(infile)
+        if (length is not None) and (length % thefield.secretbytes != 0):   # Before any share file is truncated
+            raise ValueError("File length {0:} is not a multiple of the {1:} byte slices carried by {2:}".format(length, thefield.secretbytes, args.field))
+        outfiles = [open(path, 'wb') for path in paths]
+        progress = Progress('split', length, args.progress)
+        shamirfile.split_stream(infile, outfiles, args.k, length, thefield, args.chunk_size,
+                                workers=args.workers, progress=progress)
+    except BaseException:
+        for path, outfile in zip(paths, outfiles):
+            outfile.close()
+            os.remove(path)
+        raise
+    finally:
+        if not fromstdin: infile.close()
+    for outfile in outfiles: outfile.close()
+    if not args.quiet: progress.finish("into {0:} shares {1:}.1..{2:} ({3:}-of-{2:})".format(args.n, prefix, args.n, args.k))
+    return 0
+
+def combine(args):
+    infiles = [open(path, 'rb') for path in args.shares]
+    try:
+        readers = [shamirfile.ShareReader(infile) for infile in infiles]
+        tostdout = (args.output == '-')
+        temppath = None if tostdout else "{0:}.tmp.{1:}".format(args.output, os.getpid())   # Renamed once the secret is whole
+        outfile = sys.stdout.buffer if tostdout else open(temppath, 'wb')
+        try:
+            progress = Progress('combined', readers[0].length // readers[0].field.eltbytes * readers[0].field.secretbytes, args.progress)
+            shamirfile.recover_stream(readers, outfile, workers=args.workers, progress=progress)
+        except BaseException:
+            if not tostdout:
+                outfile.close()
+                os.remove(temppath)
+            raise
+        if tostdout: outfile.flush()
+        else:
+            outfile.close()
+            os.replace(temppath, args.output)
+    finally:
+        for infile in infiles: infile.close()
+    if not args.quiet: progress.finish("from {0:} shares".format(readers[0].k))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m shamirshare2', description="Split files into Shamir shares and combine them")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    splitter = commands.add_parser('split', help="Split a file (or stdin) into share files")
+    splitter.add_argument('input', nargs='?', default='-', help="File to split (default -, stdin)")
+    splitter.add_argument('-k', type=int, default=3, help="Shares needed to recover (default 3)")
+    splitter.add_argument('-n', type=int, default=5, help="Shares created (default 5)")
+    splitter.add_argument('--field', default='GF8', choices=('GF8', 'GF16', 'GFp', 'GF2m'), help="Field (default GF8)")
+    splitter.add_argument('--bits', type=int, help="Bits of GFp (default 256) or degree of GF2m (default 64)")
+    splitter.add_argument('-o', '--output', help="Share files are OUTPUT.1 ... OUTPUT.n (default INPUT, or share for stdin)")
+    combiner = commands.add_parser('combine', help="Recover a file from share files")
+    combiner.add_argument('shares', nargs='+', help="Share files (the first k are used)")
+    combiner.add_argument('-o', '--output', default='-', help="File to write the secret to (default -, stdout)")
+    for command in (splitter, combiner):
+        command.add_argument('--workers', type=int, default=1, help="Worker processes (default 1, 0 for one per CPU)")
+        command.add_argument('--progress', action='store_true', help="Show progress on stderr")
+        command.add_argument('--quiet', action='store_true', help="Do not report the throughput")
+    splitter.add_argument('--chunk-size', type=int, default=shamirfile.CHUNKSIZE, help="Bytes of share per chunk (default 1 MiB)")
+    args = parser.parse_args(argv)
+    if args.workers == 0: args.workers = os.cpu_count() or 1
+    try:
+        return split(args) if args.command == 'split' else combine(args)
+    except (ValueError, OSError) as error:
+        print("{0:}: {1:}".format(args.command, error), file=sys.stderr)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
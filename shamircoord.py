@@ -0,0 +1,291 @@
+###############################################################################
+# SHAMIRCOORD.py
+# An asyncio recovery coordinator: ask every custodian (holder endpoint) for
+# its share of a key at once, check each share as it arrives, and recover
+# the key as soon as any k valid shares are in, cancelling the requests still
+# outstanding.  Each holder gets its own timeout and retries with backoff.
+# Includes a stand-in holder service (TCP or Unix socket) for testing.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Gathering shares from custodians.  A holder endpoint is a TCP (host,
+port) or the path of a Unix socket, speaking a small protocol:
+    request:   key id length (struct '>H'), key id (UTF-8)
+    response:  status, x, share length (struct '>BIQ'), share bytes
+with status FOUND or MISSING.  A connection carries one request.
+
+Coordinator.recover() requests the share from every holder concurrently.
+Each share is handed to a Quorum as it arrives, which checks it (index in
+range and not seen before, the same length as the others, and the caller's
+verify(share), e.g. shamirvss.verify against published commitments) and
+keeps it if valid.  When k valid shares are in, the other requests are
+cancelled and the key is recovered with shamirshare2.recover(), so the time
+taken is set by the k-th fastest custodian, not the slowest.  A holder that
+refuses the connection, drops it or does not answer within its timeout is
+retried up to retries times, with backoff doubling from backoff seconds.
+A holder announcing a share longer than sharelength (the length expected,
+if given, else MAXSHAREBYTES) is refused before its share is read.
+
+    Usage:  ############# Recover a 3-of-6 key from six custodians #############
+
+        >>> import asyncio, hashlib, os, tempfile, shamircoord, shamirshare2
+        >>> key = bytes(range(32))
+        >>> shares = shamirshare2.split(key, 3, 6)
+        >>> digests = {x: hashlib.sha256(y).digest() for x, y in shares}      # Published by the dealer
+        >>> verify = lambda share: hashlib.sha256(share[1]).digest() == digests.get(share[0])
+        >>> x, y = shares[1]; tampered = (x, bytes([y[0] ^ 1]) + y[1:])
+        >>> services = [shamircoord.HolderService({'vault': shares[0]}, delay=5.0),  # Slow custodian
+        ...             shamircoord.HolderService({'vault': tampered}),              # Corrupt share
+        ...             shamircoord.HolderService({'vault': shares[2]}, failures=1), # Drops the first connection
+        ...             shamircoord.HolderService({}),                               # Has lost its share
+        ...             shamircoord.HolderService({'vault': shares[4]}),
+        ...             shamircoord.HolderService({'vault': shares[5]})]
+        >>> socket = os.path.join(tempfile.mkdtemp(), 'holder6.sock')
+        >>> async def demo():
+        ...     servers = [await service.start(('127.0.0.1', 0)) for service in services[:5]]
+        ...     servers.append(await services[5].start(socket))               # One over a Unix socket
+        ...     holders = [shamircoord.Holder(server.sockets[0].getsockname()[:2], timeout=1.0, retries=2) for server in servers[:5]]
+        ...     holders.append(shamircoord.Holder(socket))
+        ...     result = await shamircoord.Coordinator(holders, 3, verify=verify).recover('vault')
+        ...     for service, server in zip(services, servers): service.close(); server.close()
+        ...     return result, [result.outcomes[holder.name] for holder in holders]
+        >>> result, outcomes = asyncio.run(demo())
+        >>> result.secret == key, sorted(x for x, y in result.shares), result.elapsed < 1.0
+        (True, [3, 5, 6], True)
+        >>> outcomes
+        ['cancelled', 'invalid: failed verification', 'ok', 'missing', 'ok', 'ok']
+
+        ###### Oversized shares are refused unread, and holders need distinct names
+        >>> async def oversized():
+        ...     services = [shamircoord.HolderService({'vault': share}) for share in (shares[0], (2, bytes(1 << 16)), shares[2])]
+        ...     servers = [await service.start(('127.0.0.1', 0)) for service in services]
+        ...     holders = [shamircoord.Holder(server.sockets[0].getsockname()[:2], retries=0) for server in servers]
+        ...     try:
+        ...         return await shamircoord.Coordinator(holders, 3, sharelength=32).recover('vault')
+        ...     except shamircoord.QuorumError as error:
+        ...         return [error.outcomes[holder.name] for holder in holders]
+        ...     finally:
+        ...         for server in servers: server.close()
+        >>> asyncio.run(oversized())
+        ['ok', 'share of 65536 bytes, more than the 32 expected', 'ok']
+        >>> shamircoord.Coordinator([shamircoord.Holder(('127.0.0.1', 5000)), shamircoord.Holder(('127.0.0.1', 5000))], 2)
+        Traceback (most recent call last):
+        ...
+        ValueError: Two holders are named 127.0.0.1:5000
+"""
+
+import asyncio
+import struct
+import time
+
+import shamirshare2
+
+FOUND = 0
+MISSING = 1
+MAXSHAREBYTES = 1 << 20   # Longest share accepted when its length is not given
+
+_request = struct.Struct('>H')     # Key id length
+_response = struct.Struct('>BIQ')  # Status, x, share length
+
+
+class HolderError(Exception):
+    """A holder could not supply its share"""
+
+
+class QuorumError(ValueError):
+    """Fewer than k valid shares could be gathered.  outcomes holds what
+    became of each holder, name --> outcome."""
+
+    def __init__(self, message, outcomes):
+        ValueError.__init__(self, message)
+        self.outcomes = outcomes
+
+
+################################ The Holders ##################################
+
+class HolderService(object):
+    """A stand-in custodian serving the shares in shares, key id --> (x, y).
+    Each answer is sent after delay seconds, and the first failures
+    connections are dropped unanswered, as a flaky custodian would."""
+
+    def __init__(self, shares, delay=0.0, failures=0):
+        self.shares = shares
+        self.delay = delay
+        self.failures = failures
+        self.requests = 0
+        self._tasks = set()
+
+    async def serve_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self.requests += 1
+        try:
+            if self.requests <= self.failures: return
+            size, = _request.unpack(await reader.readexactly(_request.size))
+            keyid = (await reader.readexactly(size)).decode('utf-8')
+            if self.delay: await asyncio.sleep(self.delay)
+            share = self.shares.get(keyid)
+            if share is None: writer.write(_response.pack(MISSING, 0, 0))
+            else: writer.write(_response.pack(FOUND, share[0], len(share[1])) + share[1])
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:   # close(), or the event loop shutting down
+            pass
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def start(self, address):
+        """Start serving on address, (host, port) or the path of a Unix
+        socket, returning the asyncio Server"""
+        if isinstance(address, str): return await asyncio.start_unix_server(self.serve_connection, address)
+        return await asyncio.start_server(self.serve_connection, *address)
+
+    def close(self):
+        """Cancel the answers still being delayed"""
+        for task in list(self._tasks): task.cancel()
+
+
+class Holder(object):
+    """The endpoint of a custodian, (host, port) or the path of a Unix
+    socket.  Each attempt to fetch a share has timeout seconds, and a failed
+    one is retried up to retries times after backoff, 2*backoff, ... seconds."""
+
+    def __init__(self, address, timeout=1.0, retries=2, backoff=0.05, name=None):
+        self.address = address
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.name = name if name is not None else (address if isinstance(address, str) else "{0:}:{1:}".format(*address))
+
+    async def _fetch(self, keyid, maxlength):
+        if isinstance(self.address, str): reader, writer = await asyncio.open_unix_connection(self.address)
+        else: reader, writer = await asyncio.open_connection(*self.address)
+        try:
+            keyid = keyid.encode('utf-8')
+            writer.write(_request.pack(len(keyid)) + keyid)
+            await writer.drain()
+            status, x, length = _response.unpack(await reader.readexactly(_response.size))
+            if length > maxlength: raise HolderError("share of {0:} bytes, more than the {1:} expected".format(length, maxlength))
+            y = await reader.readexactly(length)
+        finally:
+            writer.close()
+        if status != FOUND: raise HolderError("missing")
+        return (x, y)
+
+    async def fetch(self, keyid, maxlength=MAXSHAREBYTES):
+        """The share (x, y) of key keyid held here.  Raises HolderError if
+        the holder has none, offers one longer than maxlength bytes, or every
+        attempt failed."""
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return await asyncio.wait_for(self._fetch(keyid, maxlength), self.timeout)
+            except asyncio.TimeoutError:
+                error = "timed out"
+            except (OSError, asyncio.IncompleteReadError) as exc:
+                error = "{0:}".format(exc) or type(exc).__name__
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        raise HolderError("failed after {0:} attempts: {1:}".format(self.retries + 1, error))
+
+
+############################### The Coordinator ###############################
+
+class Quorum(object):
+    """Shares of one key over thefield (default GF8), checked and kept as
+    they arrive until k are in.  verify(share), if given, is the caller's
+    own check of a share, and sharelength, if given, the length every share
+    must have."""
+
+    def __init__(self, k, thefield=None, verify=None, sharelength=None):
+        self.k = k
+        self.field = shamirshare2.GF8() if thefield is None else thefield
+        self.verify = verify
+        self.sharelength = sharelength
+        self.shares = []
+        self._xs = set()
+
+    @property
+    def complete(self):
+        return len(self.shares) >= self.k
+
+    def add(self, share):
+        """Keep share (x, y) if it is valid, returning None, or return why not"""
+        x, y = share
+        if not (1 <= x < self.field.order): return "index {0:} out of range".format(x)
+        if x in self._xs: return "duplicate index {0:}".format(x)
+        if ((len(y) % self.field.eltbytes != 0) or (self.shares and len(y) != len(self.shares[0][1]))
+                or ((self.sharelength is not None) and len(y) != self.sharelength)):
+            return "share length {0:} does not match".format(len(y))
+        if (self.verify is not None) and not self.verify(share): return "failed verification"
+        self.shares.append(share)
+        self._xs.add(x)
+        return None
+
+    def secret(self):
+        """Recover the secret from the first k shares kept"""
+        if not self.complete: raise ValueError("Need {0:} shares to recover, only have {1:}".format(self.k, len(self.shares)))
+        return shamirshare2.recover(self.shares[:self.k], self.field)
+
+
+class Recovery(object):
+    """The result of Coordinator.recover(): the secret, the k shares it was
+    recovered from, what became of each holder (name --> 'ok', 'cancelled',
+    'missing', 'invalid: ...' or 'failed ...') and the seconds taken"""
+
+    def __init__(self, secret, shares, outcomes, elapsed):
+        self.secret = secret
+        self.shares = shares
+        self.outcomes = outcomes
+        self.elapsed = elapsed
+
+
+class Coordinator(object):
+    """Recovers k-of-n keys over thefield (default GF8) from the Holders
+    holders, finishing as soon as k valid shares are in.  Shares should be
+    sharelength bytes long, if given, and are at most MAXSHAREBYTES if not.
+    Outcomes are reported by holder name, so the names must be distinct."""
+
+    def __init__(self, holders, k, thefield=None, verify=None, sharelength=None):
+        names = set()
+        for holder in holders:
+            if holder.name in names: raise ValueError("Two holders are named {0:}".format(holder.name))
+            names.add(holder.name)
+        self.holders = holders
+        self.k = k
+        self.field = thefield
+        self.verify = verify
+        self.sharelength = sharelength
+
+    async def recover(self, keyid):
+        """Gather shares of key keyid and recover it, returning a Recovery.
+        Raises QuorumError if fewer than k valid shares can be had."""
+        start = time.perf_counter()
+        quorum = Quorum(self.k, self.field, self.verify, self.sharelength)
+        maxlength = MAXSHAREBYTES if self.sharelength is None else self.sharelength
+        tasks = {asyncio.ensure_future(holder.fetch(keyid, maxlength)): holder for holder in self.holders}
+        outcomes = {}
+        pending = set(tasks)
+        try:
+            while pending and not quorum.complete:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        reason = quorum.add(task.result())
+                    except HolderError as error:
+                        outcomes[tasks[task].name] = "{0:}".format(error)
+                        continue
+                    outcomes[tasks[task].name] = "ok" if reason is None else "invalid: " + reason
+        finally:
+            for task in pending:
+                task.cancel()
+                outcomes[tasks[task].name] = "cancelled"
+            if pending: await asyncio.gather(*pending, return_exceptions=True)
+        if not quorum.complete:
+            raise QuorumError("Only {0:} valid shares of key {1:}, {2:} needed".format(len(quorum.shares), keyid, self.k), outcomes)
+        shares = quorum.shares[:self.k]
+        return Recovery(quorum.secret(), shares, outcomes, time.perf_counter() - start)
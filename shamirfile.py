@@ -0,0 +1,473 @@
+###############################################################################
+# SHAMIRFILE.py
+# A compact binary file format for shares made by shamirshare2.split(): a
+# fixed header (field, x, k, length, chunk size) followed by the raw share
+# bytes in fixed size chunks, each with a CRC-32.  Shares are written and
+# read a chunk at a time, any chunk can be read on its own, and a corrupt
+# chunk is found before it is used for recovery.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Share files.  A share file holds one share (x, y) of a k-of-n split:
+    header:  magic b'SHSF', version, field code, k, x, share length,
+             chunk size, parameter length           (struct '>4sBBHIQIH')
+             field parameter (the prime of GFp, or the polynomial of GF2m,
+             big-endian; empty for GF8 and GF16)
+             CRC-32 of the header so far            (4 bytes)
+    chunks:  y in chunks of chunk size bytes (the last one shorter), each
+             followed by the CRC-32 of its index (8 bytes) and the chunk
+The chunk size is a multiple of the element size, so each chunk holds
+whole elements and chunk i of k shares recovers chunk i of the secret on its
+own: chunk i of a share starts at byte headerbytes + i*(chunksize + 4).
+The CRC covers the chunk index, so a chunk moved within the file is caught
+too.  A share of unknown length (split from a pipe) has the length
+UNFINISHED in its header until its writer is closed, so a split killed part
+way through leaves files that are refused, not read as shorter shares; so
+are files with bytes after their last chunk.  A CRC detects accidents, not tampering: see shamirvss.py for that.
+
+    Usage:  ############# Write shares to files, read and recover #############
+
+        >>> import io, shamirfile, shamirshare2
+        >>> secret = bytes(range(256)) * 40
+        >>> shares = shamirshare2.split(secret, 3, 5)
+        >>> files = [io.BytesIO() for share in shares]
+        >>> for share, thefile in zip(shares, files): shamirfile.write_share(thefile, share, 3, chunksize=4096)
+        >>> len(files[0].getvalue())                        # 10240 bytes in 3 chunks, 30 bytes of header
+        10282
+        >>> readers = [shamirfile.ShareReader(io.BytesIO(thefile.getvalue())) for thefile in files]
+        >>> reader = readers[1]
+        >>> reader.x, reader.k, reader.length, reader.nchunks, format(reader.field)
+        (2, 3, 10240, 3, 'Finite field GF(2^8) mod (x^8 + x^4 + x^3 + x + 1)')
+        >>> reader.chunk(2) == shares[1][1][8192:]          # Random access
+        True
+        >>> reader.share() == shares[1]
+        True
+        >>> recovered = io.BytesIO()
+        >>> shamirfile.recover_stream(readers[2:], recovered)
+        10240
+        >>> recovered.getvalue() == secret
+        True
+
+        ###### Corrupt chunks are found before they are used
+        >>> bad = bytearray(files[3].getvalue()); bad[5000] ^= 1
+        >>> reader = shamirfile.ShareReader(io.BytesIO(bytes(bad)))
+        >>> reader.corrupt()
+        [1]
+        >>> reader.chunk(1)
+        Traceback (most recent call last):
+        ...
+        ValueError: Share 4: chunk 1 is corrupt
+        >>> shamirfile.ShareReader(io.BytesIO(files[3].getvalue() + bytes(4)))
+        Traceback (most recent call last):
+        ...
+        ValueError: Share file has 4 bytes after its last chunk
+
+    Usage:  ############# Split a file straight to share files #############
+
+        >>> gf257 = shamirshare2.GFp(2**256 + 297)
+        >>> files = [io.BytesIO() for x in range(3)]
+        >>> shamirfile.split_stream(io.BytesIO(secret), files, 2, len(secret), gf257)
+        10560
+        >>> readers = [shamirfile.ShareReader(io.BytesIO(files[x].getvalue())) for x in (2, 0)]
+        >>> recovered = io.BytesIO()
+        >>> shamirfile.recover_stream(readers, recovered)
+        10240
+        >>> recovered.getvalue() == secret
+        True
+
+        ###### Of unknown length (a pipe), reporting progress
+        >>> files, done = [io.BytesIO() for x in range(3)], []
+        >>> shamirfile.split_stream(io.BytesIO(secret), files, 2, chunksize=4096, progress=done.append)
+        10240
+        >>> done, shamirfile.ShareReader(io.BytesIO(files[1].getvalue())).length
+        ([4096, 8192, 10240], 10240)
+        >>> unfinished = io.BytesIO()
+        >>> writer = shamirfile.ShareWriter(unfinished, 1, 2, None, chunksize=4096)
+        >>> writer.write(secret[:8192])                     # Two whole chunks out, then killed
+        >>> shamirfile.ShareReader(io.BytesIO(unfinished.getvalue()))
+        Traceback (most recent call last):
+        ...
+        ValueError: Share file is unfinished: its writer was never closed
+
+    Usage:  ############# Recover just a byte range #############
+
+        >>> shamirfile.recover_range(readers, 5000, 10) == secret[5000:5010]
+        True
+        >>> gf16 = shamirshare2.GF16()
+        >>> files = [io.BytesIO() for x in range(3)]
+        >>> shamirfile.split_stream(io.BytesIO(secret), files, 2, len(secret), gf16, chunksize=1000)
+        10240
+        >>> shamirfile.recover_range([io.BytesIO(thefile.getvalue()) for thefile in files[1:]], 4999, 3, check=False) == secret[4999:5002]
+        True
+"""
+
+import os
+import struct
+import zlib
+
+import shamirshare2
+
+MAGIC = b'SHSF'
+VERSION = 1
+CHUNKSIZE = 1 << 20   # Default bytes of share per chunk (rounded down to whole elements)
+UNFINISHED = 2**64 - 1   # The header length of a share of unknown length until it is closed
+
+_header = struct.Struct('>4sBBHIQIH')   # magic, version, field code, k, x, length, chunk size, parameter length
+_crc = struct.Struct('>I')
+_index = struct.Struct('>Q')
+
+
+def fieldcode(thefield):
+    """(field code, parameter bytes) of thefield in a share file header"""
+    if isinstance(thefield, shamirshare2.GF8): return 1, b''
+    if isinstance(thefield, shamirshare2.GF16): return 2, b''
+    if isinstance(thefield, shamirshare2.GFp):
+        return 3, thefield.prime.to_bytes((thefield.prime.bit_length() + 7) // 8, 'big')
+    if isinstance(thefield, shamirshare2.GF2m):
+        return 4, thefield.modulus.to_bytes((thefield.modulus.bit_length() + 7) // 8, 'big')
+    raise ValueError("No share file field code for {0:}".format(thefield))
+
+def field_for(code, parameter):
+    """The shamirshare2 field for a field code and parameter bytes"""
+    if code == 1: return shamirshare2.GF8()
+    if code == 2: return shamirshare2.GF16()
+    if code == 3: return shamirshare2.GFp(int.from_bytes(parameter, 'big'))
+    if code == 4:
+        modulus = int.from_bytes(parameter, 'big')
+        return shamirshare2.GF2m(modulus.bit_length() - 1, modulus)
+    raise ValueError("Unknown field code {0:}".format(code))
+
+def _chunkcrc(index, chunk):
+    return zlib.crc32(chunk, zlib.crc32(_index.pack(index))) & 0xffffffff
+
+def _read(thefile, size):  # Read size bytes, or up to the end of the file
+    chunks = []
+    while size > 0:
+        chunk = thefile.read(size)
+        if not chunk: break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class ShareWriter(object):
+    """Write the share x of a k-of-n split over thefield (default GF8),
+    length bytes long, to the binary file thefile.  The header is written at
+    once, and the share bytes as they are given to write(), a chunk at a time.
+    chunksize is rounded down to a whole number of elements.  A length of
+    None means not known yet: the header says UNFINISHED until close()
+    rewrites it with the length written, so thefile must then be seekable."""
+
+    def __init__(self, thefile, x, k, length, thefield=None, chunksize=CHUNKSIZE):
+        if thefield is None: thefield = shamirshare2.GF8()
+        width = thefield.eltbytes
+        if length is None:
+            if not thefile.seekable(): raise ValueError("A share of unknown length needs a seekable file to complete its header")
+            self._start = thefile.tell()
+        elif length % width != 0: raise ValueError("Share length {0:} is not a multiple of {1:} bytes".format(length, width))
+        chunksize -= chunksize % width
+        if chunksize <= 0: raise ValueError("The chunk size must hold at least one {0:} byte element".format(width))
+        self.file = thefile
+        self.field = thefield
+        self.x = x
+        self.k = k
+        self.length = length
+        self.chunksize = chunksize
+        self.written = 0
+        self._index = 0
+        self._pending = bytearray()
+        self._writeheader()
+
+    def _writeheader(self):
+        code, parameter = fieldcode(self.field)
+        header = _header.pack(MAGIC, VERSION, code, self.k, self.x, UNFINISHED if self.length is None else self.length, self.chunksize, len(parameter)) + parameter
+        self.file.write(header + _crc.pack(zlib.crc32(header) & 0xffffffff))
+
+    def _emit(self, chunk):
+        self.file.write(chunk)
+        self.file.write(_crc.pack(_chunkcrc(self._index, chunk)))
+        self._index += 1
+
+    def write(self, data):
+        """Append data to the share, writing out every chunk completed"""
+        if (self.length is not None) and (self.written + len(data) > self.length):
+            raise ValueError("Share x = {0:} is longer than the {1:} bytes in its header".format(self.x, self.length))
+        self.written += len(data)
+        if not self._pending and len(data) == self.chunksize:   # The usual case when streaming
+            self._emit(bytes(data))
+            return
+        self._pending += data
+        while len(self._pending) >= self.chunksize:
+            self._emit(bytes(self._pending[:self.chunksize]))
+            del self._pending[:self.chunksize]
+
+    def close(self):
+        """Write out the last chunk, and the header again if the length was
+        not known.  The file itself is left open."""
+        if self.length is None:
+            if self.written % self.field.eltbytes != 0:
+                raise ValueError("Share length {0:} is not a multiple of {1:} bytes".format(self.written, self.field.eltbytes))
+            if self._pending: self._emit(bytes(self._pending))
+            self._pending = bytearray()
+            self.length = self.written
+            end = self.file.tell()
+            self.file.seek(self._start)
+            self._writeheader()
+            self.file.seek(end)
+            return
+        if self.written != self.length:
+            raise ValueError("Share x = {0:} is {1:} bytes, not the {2:} in its header".format(self.x, self.written, self.length))
+        if self._pending: self._emit(bytes(self._pending))
+        self._pending = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None: self.close()
+
+
+class ShareReader(object):
+    """Read a share file from the binary file thefile, checking its header.
+    Iterating gives the chunks in order, reading straight through (thefile
+    need not be seekable); chunk(i) seeks to and reads chunk i alone.  Every
+    chunk is checked against its CRC as it is read."""
+
+    def __init__(self, thefile):
+        self.file = thefile
+        fixed = _read(thefile, _header.size)
+        if len(fixed) < _header.size: raise ValueError("Share file is truncated")
+        magic, version, code, self.k, self.x, self.length, self.chunksize, paramlength = _header.unpack(fixed)
+        if magic != MAGIC: raise ValueError("Not a share file")
+        if version != VERSION: raise ValueError("Unsupported share file version {0:}".format(version))
+        parameter = _read(thefile, paramlength)
+        check = _read(thefile, _crc.size)
+        if (len(parameter) < paramlength) or (len(check) < _crc.size): raise ValueError("Share file is truncated")
+        if _crc.unpack(check)[0] != zlib.crc32(fixed + parameter) & 0xffffffff: raise ValueError("Share file header is corrupt")
+        if self.length == UNFINISHED: raise ValueError("Share file is unfinished: its writer was never closed")
+        self.field = field_for(code, parameter)
+        if (self.chunksize == 0) or (self.chunksize % self.field.eltbytes != 0) or (self.length % self.field.eltbytes != 0):
+            raise ValueError("Share file header is inconsistent")
+        self.nchunks = (self.length + self.chunksize - 1) // self.chunksize
+        self.headerbytes = _header.size + paramlength + _crc.size
+        self._start = thefile.tell() if thefile.seekable() else None
+        if self._start is not None:
+            extra = thefile.seek(0, os.SEEK_END) - self.offset(self.nchunks) + (self.chunksize * self.nchunks - self.length)
+            thefile.seek(self._start)
+            if extra > 0: raise ValueError("Share file has {0:} bytes after its last chunk".format(extra))
+
+    def chunksizeof(self, i):
+        """The number of share bytes in chunk i"""
+        if not (0 <= i < self.nchunks): raise IndexError("Share {0:} has no chunk {1:}".format(self.x, i))
+        return min(self.chunksize, self.length - i*self.chunksize)
+
+    def offset(self, i):
+        """The position in the file of chunk i"""
+        return self._start + i*(self.chunksize + _crc.size)
+
+    def _next(self, i):  # Read chunk i from the current position, and check it
+        size = self.chunksizeof(i)
+        data = _read(self.file, size + _crc.size)
+        if len(data) < size + _crc.size: raise ValueError("Share {0:}: chunk {1:} is truncated".format(self.x, i))
+        chunk = data[:size]
+        if _crc.unpack(data[size:])[0] != _chunkcrc(i, chunk): raise ValueError("Share {0:}: chunk {1:} is corrupt".format(self.x, i))
+        return chunk
+
+    def chunk(self, i):
+        """Chunk i of the share, read from a seekable file"""
+        self.chunksizeof(i)
+        self.file.seek(self.offset(i))
+        return self._next(i)
+
+    def region(self, offset, length, check=True):
+        """Bytes [offset, offset+length) of the share.  With check, the
+        chunks holding them are read whole and checked against their CRCs;
+        without, only the bytes asked for are read."""
+        if (offset < 0) or (length < 0) or (offset + length > self.length):
+            raise ValueError("Bytes [{0:}, {1:}) are not in the {2:} byte share {3:}".format(offset, offset + length, self.length, self.x))
+        if not length: return b''
+        first, last = offset // self.chunksize, (offset + length - 1) // self.chunksize
+        if check:
+            self.file.seek(self.offset(first))
+            data = b''.join(self._next(i) for i in range(first, last + 1))
+            return data[offset - first*self.chunksize:offset - first*self.chunksize + length]
+        pieces = []
+        for i in range(first, last + 1):
+            start, stop = max(offset, i*self.chunksize), min(offset + length, (i+1)*self.chunksize)
+            self.file.seek(self.offset(i) + start - i*self.chunksize)
+            pieces.append(_read(self.file, stop - start))
+        data = b''.join(pieces)
+        if len(data) < length: raise ValueError("Share {0:} is truncated".format(self.x))
+        return data
+
+    def __iter__(self):
+        if self._start is not None: self.file.seek(self._start)
+        for i in range(self.nchunks): yield self._next(i)
+        if (self._start is None) and self.file.read(1): raise ValueError("Share file has bytes after its last chunk")
+
+    def read(self):
+        """The whole share value y"""
+        return b''.join(self)
+
+    def share(self):
+        """The share (x, y), as shamirshare2.recover() takes it"""
+        return (self.x, self.read())
+
+    def corrupt(self):
+        """The indices of the chunks that fail their CRC, reading the whole file"""
+        thelist = []
+        if self._start is not None: self.file.seek(self._start)
+        for i in range(self.nchunks):
+            try:
+                self._next(i)
+            except ValueError:
+                thelist.append(i)
+                if self._start is not None: self.file.seek(self.offset(i + 1))
+        return thelist
+
+
+def write_share(thefile, share, k, thefield=None, chunksize=CHUNKSIZE):
+    """Write the share (x, y) of a k-of-n split over thefield to thefile"""
+    x, y = share
+    with ShareWriter(thefile, x, k, len(y), thefield, chunksize) as writer:
+        for i in range(0, len(y), writer.chunksize): writer.write(y[i:i+writer.chunksize])
+
+def read_share(thefile):
+    """The share (x, y) in the share file thefile"""
+    return ShareReader(thefile).share()
+
+_workerfields = {}   # (field code, parameter) --> field, in each worker process
+
+def _field(code, parameter):
+    if (code, parameter) not in _workerfields: _workerfields[(code, parameter)] = field_for(code, parameter)
+    return _workerfields[(code, parameter)]
+
+def _split_chunk(code, parameter, data, k, n, engine):
+    return [y for x, y in shamirshare2.split(data, k, n, _field(code, parameter), engine)]
+
+def _recover_chunk(code, parameter, shares, engine):
+    return shamirshare2.recover(shares, _field(code, parameter), engine)
+
+def _mapped(function, jobs, workers):
+    """Yield function(*job) for each job in order.  With workers > 1 the jobs
+    run in that many processes, at most 2*workers of them in flight, so only
+    that many chunks are held however long the stream."""
+    if workers <= 1:
+        for job in jobs: yield function(*job)
+        return
+    import collections
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for job in jobs:
+            pending.append(pool.submit(function, *job))
+            if len(pending) >= 2 * workers: yield pending.popleft().result()
+        while pending: yield pending.popleft().result()
+
+def split_stream(infile, outfiles, k, length=None, thefield=None, chunksize=CHUNKSIZE, engine=None, workers=1, progress=None):
+    """Split the length byte secret read from the binary file infile k-of-n
+    over thefield (default GF8), writing share x to the share file outfiles[x-1]
+    (n = len(outfiles)).  Each chunk of the secret is split on its own, so
+    memory use is about (n+1) chunks, times 2*workers when the chunks are
+    split in workers processes.  A length of None reads infile to its end
+    (for a pipe), and the outfiles must then be seekable.  progress(done) is
+    called with the bytes of secret split so far after each chunk.  Return
+    the length of each share."""
+    if thefield is None: thefield = shamirshare2.GF8()
+    n = len(outfiles)
+    width, slicebytes = thefield.eltbytes, thefield.secretbytes
+    if (slicebytes == 0) or ((length is not None) and (length % slicebytes != 0)):
+        raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(length, slicebytes))
+    sharelength = None if length is None else length // slicebytes * width
+    writers = [ShareWriter(outfile, x, k, sharelength, thefield, chunksize) for x, outfile in zip(range(1, n+1), outfiles)]
+    secretchunk = writers[0].chunksize // width * slicebytes
+    code, parameter = fieldcode(thefield)
+
+    def jobs():
+        remaining = length
+        while remaining is None or remaining:
+            data = _read(infile, secretchunk if remaining is None else min(secretchunk, remaining))
+            if not data:
+                if length is None: return
+                raise ValueError("Secret is shorter than {0:} bytes".format(length))
+            if len(data) % slicebytes != 0:
+                raise ValueError("Secret length is not a multiple of the {0:} byte slices carried by the field".format(slicebytes))
+            if remaining is not None: remaining -= len(data)
+            yield code, parameter, data, k, n, engine
+
+    done = 0
+    for ys in _mapped(_split_chunk, jobs(), workers):
+        for writer, y in zip(writers, ys): writer.write(y)
+        done += len(ys[0]) // width * slicebytes
+        if progress is not None: progress(done)
+    for writer in writers: writer.close()
+    return writers[0].length
+
+def _check_readers(readers):
+    """The shared (field, k, length, chunksize) of readers, with at least k distinct x"""
+    first = readers[0]
+    params = (fieldcode(first.field), first.k, first.length, first.chunksize)
+    if any((fieldcode(reader.field), reader.k, reader.length, reader.chunksize) != params for reader in readers):
+        raise ValueError("Share files were made with different parameters")
+    if len(readers) < first.k: raise ValueError("Need {0:} shares to recover, only have {1:}".format(first.k, len(readers)))
+    xs = [reader.x for reader in readers]
+    if len(set(xs)) != len(xs): raise ValueError("Duplicate share index in {0:}".format(xs))
+    return first.field, first.k, first.length, first.chunksize
+
+def recover_stream(readers, outfile, engine=None, workers=1, progress=None):
+    """Recover the secret from the ShareReaders of at least k share files
+    (the first k are used), writing it to the binary file outfile a chunk at
+    a time (combined in workers processes if workers > 1).  Each chunk is
+    checked in every share before it is combined, so a ValueError for a
+    corrupt chunk comes before that chunk is written.  progress(done) is
+    called with the bytes written so far after each chunk.  Return the length
+    of the secret."""
+    thefield, k, length, chunksize = _check_readers(readers)
+    readers = readers[:k]
+    code, parameter = fieldcode(thefield)
+    jobs = ((code, parameter, [(reader.x, chunk) for reader, chunk in zip(readers, chunks)], engine) for chunks in zip(*readers))
+    written = 0
+    for secret in _mapped(_recover_chunk, jobs, workers):
+        outfile.write(secret)
+        written += len(secret)
+        if progress is not None: progress(written)
+    return written
+
+_weights = {}   # (field code, x values) --> Lagrange weights, for recover_range()
+MAXWEIGHTS = 256
+
+def _reader(sharefile):  # (ShareReader, whether it opened the file)
+    if isinstance(sharefile, ShareReader): return sharefile, False
+    if isinstance(sharefile, (str, bytes, os.PathLike)): return ShareReader(open(sharefile, 'rb')), True
+    return ShareReader(sharefile), False
+
+def recover_range(share_files, start, length, check=True, engine=None):
+    """Bytes [start, start+length) of the secret, from at least k share
+    files (paths, binary files or ShareReaders; the first k are used),
+    reading only the region of each share that holds them: over GF8 and GF16
+    byte i of the secret depends only on the element holding byte i of each
+    share.  With check, the chunks read are checked against their CRCs.  The
+    Lagrange weights are cached for each set of x values."""
+    allreaders, opened = zip(*[_reader(sharefile) for sharefile in share_files])
+    try:
+        thefield, k, sharelength, chunksize = _check_readers(list(allreaders))
+        readers = allreaders[:k]
+        width, slicebytes = thefield.eltbytes, thefield.secretbytes
+        if (start < 0) or (length < 0) or (start + length > sharelength // width * slicebytes):
+            raise ValueError("Bytes [{0:}, {1:}) are not in the {2:} byte secret".format(start, start + length, sharelength // width * slicebytes))
+        first, last = start // slicebytes, (start + length + slicebytes - 1) // slicebytes
+        regions = [reader.region(first*width, (last - first)*width, check) for reader in readers]
+        xs = tuple(reader.x for reader in readers)
+        if isinstance(thefield, (shamirshare2.GF8, shamirshare2.GF16)):
+            key = (fieldcode(thefield), xs)
+            if key not in _weights:
+                if len(_weights) >= MAXWEIGHTS: _weights.clear()
+                _weights[key] = shamirshare2._lagrange_weights([thefield(x) for x in xs], thefield)
+            secret = shamirshare2.combinebytes(regions, _weights[key], thefield)
+        else:
+            secret = shamirshare2.recover(list(zip(xs, regions)), thefield, engine)
+        return secret[start - first*slicebytes:start - first*slicebytes + length]
+    finally:
+        for reader, isopened in zip(allreaders, opened):
+            if isopened: reader.file.close()
@@ -0,0 +1,269 @@
+###############################################################################
+# SHAMIRIDA.py
+# Computational secret sharing (Krawczyk, "Secret Sharing Made Short"): the
+# secret is encrypted under a fresh key, the ciphertext is dispersed with
+# Rabin's Information Dispersal Algorithm over GF8 or GF16, and only the key
+# is Shamir split.  Each share is about |secret|/k bytes plus a constant,
+# rather than |secret| bytes.  Split and recover both stream.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Split a large secret into n shares of about 1/k of its size each.
+The secret is encrypted with a keystream from SHAKE256 under a random 256
+bit key, and authenticated with a keyed BLAKE2b of the ciphertext.  The
+ciphertext is cut into groups of k field elements, and each group is taken
+as the coefficients of a polynomial of degree k-1: share x holds the value
+of every such polynomial at x.  Any k shares determine the polynomials (by
+inverting the Vandermonde matrix of their x values, i.e. by Lagrange
+interpolation) and so the ciphertext.  The key is split k-of-n over the
+same field with shamirshare2.split(), and each share carries its key share.
+
+Unlike Shamir sharing, fewer than k shares do reveal information about the
+ciphertext, so the secrecy rests on the cipher (the key shares themselves
+are perfectly secret).
+
+A share is a header (magic b'SIDA', version, field, k, x, key share), the
+dispersed data, and a trailer holding the authentication tag.
+
+    Usage:  ############# Split 1000 bytes 3-of-5 #############
+
+        >>> import shamirida
+        >>> secret = bytes(range(250)) * 4
+        >>> shares = shamirida.split(secret, 3, 5)
+        >>> [len(share) for share in shares]         # 1002/3 bytes (padded), plus 74 of header and tag
+        [408, 408, 408, 408, 408]
+        >>> shamirida.recover([shares[4], shares[0], shares[2]]) == secret
+        True
+        >>> shamirida.recover(shares[:2])
+        Traceback (most recent call last):
+        ...
+        ValueError: Need 3 shares to recover, only have 2
+
+        ###### Corrupted shares are detected
+        >>> bad = bytearray(shares[1]); bad[100] ^= 1
+        >>> shamirida.recover([shares[0], bytes(bad), shares[2]])
+        Traceback (most recent call last):
+        ...
+        ValueError: Authentication failed: a share is corrupt, or the shares are of different secrets
+
+    Usage:  ############# Stream between files #############
+
+        >>> import io
+        >>> outfiles = [io.BytesIO() for x in range(4)]
+        >>> shamirida.split_stream(io.BytesIO(secret), outfiles, 2, shamirshare2.GF16())
+        1000
+        >>> recovered = io.BytesIO()
+        >>> shamirida.recover_stream([io.BytesIO(outfiles[3].getvalue()), io.BytesIO(outfiles[1].getvalue())], recovered)
+        1000
+        >>> recovered.getvalue() == secret
+        True
+
+        ###### Nothing reaches outfile until the tag checks out
+        >>> bad = bytearray(outfiles[3].getvalue()); bad[60] ^= 1
+        >>> recovered = io.BytesIO()
+        >>> shamirida.recover_stream([io.BytesIO(bytes(bad)), io.BytesIO(outfiles[1].getvalue())], recovered)
+        Traceback (most recent call last):
+        ...
+        ValueError: Authentication failed: a share is corrupt, or the shares are of different secrets
+        >>> len(recovered.getvalue())
+        0
+        >>> share = outfiles[3].getvalue()
+        >>> shamirida.recover([share[:shamirida.HEADERBYTES] + share[-shamirida.TAGBYTES:], outfiles[1].getvalue()])
+        Traceback (most recent call last):
+        ...
+        ValueError: Shares have different lengths
+        >>> shamirida.recover([share[:shamirida.HEADERBYTES] + share[-shamirida.TAGBYTES:] for share in (outfiles[3].getvalue(), outfiles[1].getvalue())])
+        Traceback (most recent call last):
+        ...
+        ValueError: Share is truncated
+
+        ###### GF16 takes more than 255 shares
+        >>> shares = shamirida.split(secret, 2, 300, shamirshare2.GF16())
+        >>> shamirida.recover([shares[299], shares[7]]) == secret
+        True
+"""
+
+import hashlib
+import hmac
+import io
+import os
+import struct
+import tempfile
+
+import shamirshare2
+
+MAGIC = b'SIDA'
+VERSION = 1
+KEYBYTES = 32
+TAGBYTES = 32
+SEGMENT = 65536     # Elements of each polynomial coefficient dispersed per chunk
+FIELDS = {1: shamirshare2.GF8(), 2: shamirshare2.GF16()}
+
+_header = struct.Struct('>4sBBHH')   # magic, version, field, k, x
+HEADERBYTES = _header.size + KEYBYTES
+
+
+def _fieldcode(thefield):
+    for code, field in FIELDS.items():
+        if field is thefield: return code
+    raise ValueError("Information dispersal is over GF8 or GF16, not {0:}".format(thefield))
+
+def _keys(key):   # Independent encryption and authentication keys
+    return (hashlib.blake2b(key, digest_size=32, person=b'shamirida enc').digest(),
+            hashlib.blake2b(key, digest_size=32, person=b'shamirida mac').digest())
+
+def _keystream(enckey, index, length):
+    """The keystream of chunk index: a prefix of SHAKE256(key || index), so a
+    shorter (final) chunk uses the first bytes of the same stream"""
+    return hashlib.shake_256(enckey + struct.pack('>Q', index)).digest(length)
+
+def _xor(data, stream):
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(len(data), 'big')
+
+def _read(thefile, size):  # Read size bytes, or up to the end of the file
+    chunks = []
+    while size > 0:
+        chunk = thefile.read(size)
+        if not chunk: break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def _inverse_vandermonde(xs, thefield):
+    """The rows M[j] with coefficient j of a polynomial of degree len(xs)-1
+    = Sum(i, M[j][i]*f(xs[i])): M[j][i] is the coefficient of X^j in the
+    Lagrange basis polynomial of xs[i], found by fit() through 1 at xs[i]
+    and 0 at the other xs"""
+    zero, one = thefield(0), thefield(1)
+    basis = [shamirshare2.fit([(x, one if x == xi else zero) for x in xs], thefield) for xi in xs]
+    return [[basis[i][j] for i in range(len(xs))] for j in range(len(xs))]
+
+
+def split_stream(infile, outfiles, k, thefield=None):
+    """Read the secret from the binary file infile, and write one share to
+    each of the n = len(outfiles) binary files outfiles, any k of which can
+    recover it.  thefield is GF8 (the default, n < 256) or GF16.  The secret
+    is read SEGMENT*k elements at a time.  Return the length of the secret."""
+    if thefield is None: thefield = shamirshare2.GF8()
+    n = len(outfiles)
+    width = thefield.eltbytes
+    group = k * width
+    if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+    key = os.urandom(KEYBYTES)
+    enckey, mackey = _keys(key)
+    keyshares = shamirshare2.split(key, k, n, thefield)
+    for (x, keyshare), outfile in zip(keyshares, outfiles):
+        outfile.write(_header.pack(MAGIC, VERSION, _fieldcode(thefield), k, x) + keyshare)
+    mac = hashlib.blake2b(key=mackey, digest_size=TAGBYTES)
+    length = 0
+    index = 0
+    while True:
+        chunk = _read(infile, SEGMENT * group)
+        length += len(chunk)
+        last = len(chunk) < SEGMENT * group
+        if last:  # Pad with 80 00 ... to whole groups (always at least one byte)
+            chunk += b'\x80' + bytes(-(len(chunk) + 1) % group)
+        ciphertext = _xor(chunk, _keystream(enckey, index, len(chunk)))
+        mac.update(ciphertext)
+        planes = shamirshare2._deinterleave(ciphertext, k, width)
+        for x, outfile in zip(range(1, n+1), outfiles):
+            outfile.write(shamirshare2.evalbytes(planes, x, thefield))
+        index += 1
+        if last: break
+    tag = mac.digest()
+    for outfile in outfiles: outfile.write(tag)
+    return length
+
+def _blocks(thefile, size):
+    """Yield (block, trailer) for the data of thefile after its header, in
+    blocks of size bytes, holding back its last TAGBYTES bytes as the
+    trailer of the final block (None for the others)"""
+    held = _read(thefile, size + TAGBYTES)
+    while True:
+        more = _read(thefile, size)
+        if not more: break
+        held += more
+        yield held[:size], None
+        held = held[size:]
+    if len(held) < TAGBYTES: raise ValueError("Share is truncated")
+    yield held[:-TAGBYTES], held[-TAGBYTES:]
+
+def recover_stream(infiles, outfile, unauthenticated=False):
+    """Recover the secret from the binary files infiles of at least k shares
+    made by split_stream(), and write it to the binary file outfile (the first
+    k shares are used).  Return the length of the secret.  The tag is only
+    known at the end, so the ciphertext is held in a temporary file until
+    it has been checked, and only then decrypted into outfile; nothing is
+    written if it fails.  With unauthenticated=True the secret is streamed
+    straight to outfile instead, and on ValueError anything written must be
+    discarded."""
+    headers = []
+    for infile in infiles:
+        header = _read(infile, HEADERBYTES)
+        if len(header) < HEADERBYTES: raise ValueError("Share is truncated")
+        magic, version, fieldcode, k, x = _header.unpack(header[:_header.size])
+        if magic != MAGIC: raise ValueError("Not an information dispersal share")
+        if version != VERSION: raise ValueError("Unsupported share version {0:}".format(version))
+        if fieldcode not in FIELDS: raise ValueError("Unknown field code {0:}".format(fieldcode))
+        headers.append((fieldcode, k, x, header[_header.size:]))
+    fieldcode, k = headers[0][:2]
+    if any(header[:2] != (fieldcode, k) for header in headers):
+        raise ValueError("Shares were made with different parameters")
+    if len(headers) < k: raise ValueError("Need {0:} shares to recover, only have {1:}".format(k, len(headers)))
+    infiles, headers = infiles[:k], headers[:k]
+    xs = [header[2] for header in headers]
+    if len(set(xs)) != k: raise ValueError("Duplicate share index in {0:}".format(xs))
+    thefield = FIELDS[fieldcode]
+    width = thefield.eltbytes
+    key = shamirshare2.recover([(header[2], header[3]) for header in headers], thefield)
+    enckey, mackey = _keys(key)
+    matrix = _inverse_vandermonde([thefield(x) for x in xs], thefield)
+    mac = hashlib.blake2b(key=mackey, digest_size=TAGBYTES)
+
+    def decrypt(index, ciphertext):
+        return _xor(ciphertext, _keystream(enckey, index, len(ciphertext)))
+
+    spool = None if unauthenticated else tempfile.TemporaryFile()
+    try:
+        length = 0
+        pending = None   # (index, ciphertext) of the last chunk, which holds the padding
+        chunkbytes = None
+        for index, blocks in enumerate(zip(*[_blocks(infile, SEGMENT * width) for infile in infiles])):
+            if len(set(len(block) for block, trailer in blocks)) != 1: raise ValueError("Shares have different lengths")
+            trailers = [trailer for block, trailer in blocks]
+            values = [block for block, trailer in blocks]
+            if not values[0]: break
+            ciphertext = shamirshare2._interleave([shamirshare2.combinebytes(values, row, thefield) for row in matrix], width)
+            mac.update(ciphertext)
+            if pending is not None:
+                if spool is None: outfile.write(decrypt(*pending))
+                else: spool.write(pending[1])
+                length += len(pending[1])
+            pending = (index, ciphertext)
+            if chunkbytes is None: chunkbytes = len(ciphertext)
+        if trailers[0] is None: raise ValueError("Shares have different lengths")
+        if pending is None: raise ValueError("Share is truncated")
+        if not all(hmac.compare_digest(mac.digest(), trailer) for trailer in trailers):
+            raise ValueError("Authentication failed: a share is corrupt, or the shares are of different secrets")
+        end = decrypt(*pending).rstrip(b'\x00')
+        if not end.endswith(b'\x80'): raise ValueError("Bad padding")
+        if spool is not None:
+            spool.seek(0)
+            for index in range(pending[0]): outfile.write(decrypt(index, _read(spool, chunkbytes)))
+    finally:
+        if spool is not None: spool.close()
+    outfile.write(end[:-1])
+    return length + len(end) - 1
+
+def split(secret, k, n, thefield=None):
+    """Split the byte string secret k-of-n, returning the n shares as byte strings"""
+    outfiles = [io.BytesIO() for x in range(n)]
+    split_stream(io.BytesIO(secret), outfiles, k, thefield)
+    return [outfile.getvalue() for outfile in outfiles]
+
+def recover(shares):
+    """Recover the secret from a list of at least k shares made by split()"""
+    outfile = io.BytesIO()
+    recover_stream([io.BytesIO(share) for share in shares], outfile)
+    return outfile.getvalue()
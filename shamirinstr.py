@@ -0,0 +1,235 @@
+###############################################################################
+# SHAMIRINSTR.py
+# Optional operation counters and stage timing for shamirshare2: counts of
+# field add/sub/neg/mul/inv/div calls, on elements and on the integers of
+# Poly, table lookups and element allocations per fit/eval/split/recover call.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Count the field operations behind each fit/eval/split/recover call.
+Nothing is instrumented until enable() is called.  It swaps counting
+versions of the element methods into GF8elt, GF16elt, GF2melt and GFpelt, and timed
+versions of fit/eval/split/recover into shamirshare2, and disable() swaps
+the originals back.  So while disabled the hot path is exactly the
+uninstrumented code, with no flags tested anywhere.
+
+fit() and Poly work on the integer values of elements, not on elements.
+enable() also swaps a counting shamirshare2._intarith into place, so the
+integer operations of a Poly made while enabled are counted as 'GFp.add',
+'GF2m.mul' etc., and counting versions of the Poly methods whose GF8 and
+GF16 paths work on whole byte strings (or on the GF8 tables directly),
+which count those as one operation per element, as the integer path would.
+So the counts of fit are its real work, in the same units as the element
+counts of eval/split/recover.  The one inversion of an interpolation is
+counted as 'GFp.inv' etc.; over GFp it is made with a GFpelt, so it also
+counts as 'GFpelt.inv' and an allocation.
+
+Counts are inclusive: the multiplications done by the eval() calls inside
+split() are counted against both eval and split.  Stages are swapped in
+the shamirshare2 module, so call them as shamirshare2.fit() etc. (a name
+bound by "from shamirshare2 import fit" before enable() still refers to
+the original).  Counting is global state, so only instrument one thread at
+a time.  Only the 'object' engine of split/recover works with elements, so
+pass engine='object' to count the field operations behind them.
+
+    Usage:  ############# Count the work in a 3 point fit over GF(101) #############
+
+        >>> import shamirinstr, shamirshare2
+        >>> with shamirinstr.counting() as counts:
+        ...     pfit = shamirshare2.fit(((1,35),(2,92),(3,11)), shamirshare2.GFp(101))
+        >>> ops = counts.stages['fit']
+        >>> counts.calls['fit'], ops['GFp.mul'], ops['GFp.inv'], ops['GFpelt.mul']
+        (1, 45, 1, 0)
+        >>> with shamirinstr.counting() as counts:
+        ...     pfit = shamirshare2.fit(((1,'35'),(2,'92'),(3,'11')), shamirshare2.GF8())
+        >>> ops = counts.stages['fit']      # The same work, mostly on byte strings and tables
+        >>> ops['GF8.mul'], ops['GF8.inv']
+        (45, 1)
+        >>> shamirinstr.enabled()     # Originals restored on leaving the block
+        False
+
+        ###### Per call averages, and stage timing hooks
+        >>> seen = []
+        >>> with shamirinstr.counting(hooks=[lambda stage, secs, ops: seen.append(stage)]) as counts:
+        ...     shares = shamirshare2.split(bytearray(4), 3, 5, engine='object')
+        >>> seen.count('eval'), seen[-1]
+        (20, 'split')
+        >>> counts.percall('split')['GF8elt.mul']       # 4 bytes * 5 shares * 2 Horner steps
+        40.0
+        >>> counts.allocations('split') > 0
+        True
+"""
+
+import array
+import collections
+import contextlib
+import time
+
+import shamirshare2
+
+ELEMENTS = (shamirshare2.GF8elt, shamirshare2.GF16elt, shamirshare2.GF2melt, shamirshare2.GFpelt)
+METHODS = ('add', 'sub', 'neg', 'mul', 'inv', 'div')
+POLYMETHODS = ('add', 'scale', 'mullinear', 'mul', 'divlinear', 'eval')
+STAGES = ('fit', 'eval', 'split', 'recover')
+
+# Table lookups made by one call of an element method (at most: mul skips
+# the tables when either operand is zero)
+TABLE_LOOKUPS = {'GF8elt.mul': 3, 'GF8elt.inv': 2}
+
+_timer = getattr(time, 'perf_counter', time.time)
+_originals = {}   # (owner, name) --> original attribute, while enabled
+_counts = None    # The Counts being collected, while enabled
+
+
+class Counts(object):
+    """Operation counts and timings collected while instrumentation is enabled.
+        total - Counter of every operation, whatever the stage
+        stages - stage name --> Counter of operations made within that stage
+        calls - Counter of calls of each stage
+        seconds - stage name --> total time spent in that stage
+    Operations are named 'GF8elt.mul' etc., with allocations as 'GF8elt.new'
+    and table lookups as 'table', and those on the integers of a Poly as
+    'GF8.mul' etc.  Each hook is called as
+    hook(stage, seconds, opcounts) when a stage call returns."""
+
+    def __init__(self, hooks=()):
+        self.total = collections.Counter()
+        self.stages = collections.defaultdict(collections.Counter)
+        self.calls = collections.Counter()
+        self.seconds = collections.defaultdict(float)
+        self.hooks = list(hooks)
+        self._stack = []  # Counters of the stage calls in progress
+
+    def count(self, opname, lookups=0, times=1):
+        self.total[opname] += times
+        if lookups: self.total['table'] += lookups
+        for thecounter in self._stack:
+            thecounter[opname] += times
+            if lookups: thecounter['table'] += lookups
+
+    def percall(self, stage):
+        """Average operation counts for a single call of stage"""
+        ncalls = self.calls[stage]
+        return dict((opname, float(thecount) / ncalls) for opname, thecount in self.stages[stage].items()) if ncalls else {}
+
+    def allocations(self, stage=None):
+        thecounter = self.total if stage is None else self.stages[stage]
+        return sum(thecount for opname, thecount in thecounter.items() if opname.endswith('.new'))
+
+    def __str__(self):
+        lines = []
+        for stage in sorted(self.calls):
+            lines.append("{0:<8} {1:>8} calls {2:>10.6f} s".format(stage, self.calls[stage], self.seconds[stage]))
+            lines += ["    {0:<16} {1:>12.1f}/call".format(opname, thecount) for opname, thecount in sorted(self.percall(stage).items())]
+        return "\n".join(lines)
+
+
+def _countedmethod(opname, method):
+    lookups = TABLE_LOOKUPS.get(opname, 0)
+    def counted(*args, **kwargs):
+        _counts.count(opname, lookups)
+        return method(*args, **kwargs)
+    counted.__name__ = method.__name__
+    counted.__doc__ = method.__doc__
+    return counted
+
+def _countedint(opname, function):
+    def counted(*args):
+        _counts.count(opname)
+        return function(*args)
+    return counted
+
+def _countedintarith(thefield):  # A counting shamirshare2._intarith
+    prefix = type(thefield).__name__ + '.'
+    return tuple(_countedint(prefix + name, function)
+                 for name, function in zip(('add', 'sub', 'mul', 'inv'), _originals[(shamirshare2, '_intarith')](thefield)))
+
+# The operations (muls, adds) made by a call of a Poly method on a path which
+# does not go through its integer arithmetic, or None on one that does
+def _polyops(name, thepoly, *args):
+    thecoeffs = thepoly.coeffs
+    if name in ('divlinear', 'eval'):
+        if not isinstance(thepoly.field, shamirshare2.GF8): return None
+        if (name == 'eval') and not int(args[0]): return (0, 0)
+        return (len(thecoeffs), len(thecoeffs))
+    if not isinstance(thecoeffs, array.array): return None
+    if name == 'add': return (0, min(len(thecoeffs), len(args[0].coeffs)))
+    if name == 'scale': return (len(thecoeffs), 0)
+    if name == 'mullinear': return (len(thecoeffs), len(thecoeffs))
+    terms = len([c for c in args[0].coeffs if c]) * len(thecoeffs) if thecoeffs else 0
+    return (terms, terms)   # mul
+
+def _countedpoly(name, method):
+    def counted(self, *args):
+        ops = _polyops(name, self, *args)
+        if ops is not None:
+            prefix = type(self.field).__name__ + '.'
+            if ops[0]: _counts.count(prefix + 'mul', times=ops[0])
+            if ops[1]: _counts.count(prefix + 'add', times=ops[1])
+        return method(self, *args)
+    counted.__name__ = method.__name__
+    counted.__doc__ = method.__doc__
+    return counted
+
+def _timedstage(stage, function):
+    def timed(*args, **kwargs):
+        counts = _counts
+        thecounter = collections.Counter()
+        counts._stack.append(thecounter)
+        start = _timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = _timer() - start
+            counts._stack.remove(thecounter)
+            counts.calls[stage] += 1
+            counts.seconds[stage] += elapsed
+            counts.stages[stage].update(thecounter)
+            for hook in counts.hooks: hook(stage, elapsed, thecounter)
+    timed.__name__ = function.__name__
+    timed.__doc__ = function.__doc__
+    return timed
+
+def _swap(owner, name, replacement):
+    _originals[(owner, name)] = owner.__dict__[name]
+    setattr(owner, name, replacement)
+
+def enabled():
+    return _counts is not None
+
+def enable(hooks=()):
+    """Install the instrumented methods and stages, and return the Counts
+    object they will update"""
+    global _counts
+    if _counts is not None: raise RuntimeError("shamirinstr is already enabled")
+    _counts = Counts(hooks)
+    for cls in ELEMENTS:
+        for name in METHODS:
+            if name in cls.__dict__:
+                _swap(cls, name, _countedmethod(cls.__name__ + '.' + name, cls.__dict__[name]))
+        _swap(cls, '__init__', _countedmethod(cls.__name__ + '.new', cls.__dict__['__init__']))
+    _swap(shamirshare2, '_intarith', _countedintarith)
+    for name in POLYMETHODS:
+        _swap(shamirshare2.Poly, name, _countedpoly(name, shamirshare2.Poly.__dict__[name]))
+    for stage in STAGES:
+        _swap(shamirshare2, stage, _timedstage(stage, getattr(shamirshare2, stage)))
+    return _counts
+
+def disable():
+    """Restore the original methods and stages, and return the Counts"""
+    global _counts
+    for (owner, name), original in _originals.items():
+        setattr(owner, name, original)
+    _originals.clear()
+    counts, _counts = _counts, None
+    return counts
+
+@contextlib.contextmanager
+def counting(hooks=()):
+    """Enable instrumentation for the duration of a with block"""
+    counts = enable(hooks)
+    try:
+        yield counts
+    finally:
+        disable()
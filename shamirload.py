@@ -0,0 +1,258 @@
+###############################################################################
+# SHAMIRLOAD.py
+# Load generator for split/recover workloads: drives a weighted mix of
+# fields, k-of-n policies and key sizes from many concurrent workers, either
+# in-process against shamirshare2 or over TCP against a KMIP server (such as
+# shamirserver.py), and reports throughput, latency percentiles and CPU time
+# per operation.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Generate split/recover load with a given traffic mix.
+A mix is a comma separated list of field:k:n:keybytes:weight workloads,
+where field is GF8, GF16 or GFp (over the first prime above 2^(8*keybytes),
+so the whole key is one element).  Each request splits a new key k-of-n,
+then recovers it from k of the shares; split and recover are timed
+separately.
+
+    Usage:  ##################### A short in-process run #####################
+
+        >>> from shamirload import *
+        >>> mix = parse_mix('GF8:3:5:32:3,GF16:2:3:16:1,GFp:2:3:32:1')
+        >>> [format(workload) for workload in mix]
+        ['GF8:3:5:32:3', 'GF16:2:3:16:1', 'GFp:2:3:32:1']
+        >>> report = run_inprocess(mix, requests=20, concurrency=2)
+        >>> sorted(report.latencies), report.count('split'), report.count('recover')
+        (['recover', 'split'], 20, 20)
+        >>> report.percentile('split', 0.99) >= report.percentile('split', 0.5) > 0
+        True
+        >>> run_inprocess(parse_mix('GF8:2:300:32'), requests=4, concurrency=2)   # Failures are raised, not lost
+        Traceback (most recent call last):
+        ...
+        ValueError: Cannot create 300 distinct shares over a field of order 256
+
+    Command line:
+
+        python shamirload.py --mix GF8:3:5:32:1 [--concurrency 8] [--duration 10 | --requests N]
+                             [--tcp | --connect HOST:PORT] [--json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+import shamirshare2
+
+_timer = time.perf_counter
+
+
+class Workload(object):
+    """One entry of a traffic mix: split keybytes byte keys k-of-n over a field"""
+
+    def __init__(self, fieldname, k, n, keybytes, weight=1):
+        self.fieldname = fieldname
+        self.k = k
+        self.n = n
+        self.keybytes = keybytes
+        self.weight = weight
+        if fieldname == 'GF8': self.field = shamirshare2.GF8()
+        elif fieldname == 'GF16': self.field = shamirshare2.GF16()
+        elif fieldname == 'GFp': self.field = shamirshare2.GFp(shamirshare2.nextprime(2**(8*keybytes)))
+        else: raise ValueError("Unknown field \'{0:}\', expected GF8, GF16 or GFp".format(fieldname))
+
+    def __format__(self, fmtspec):
+        return "{0:}:{1:}:{2:}:{3:}:{4:}".format(self.fieldname, self.k, self.n, self.keybytes, self.weight)
+
+
+def parse_mix(spec):
+    """Parse 'field:k:n:keybytes[:weight],...' into a list of Workloads"""
+    mix = []
+    for entry in spec.split(','):
+        fields = entry.strip().split(':')
+        if len(fields) not in (4, 5): raise ValueError("Workload \'{0:}\' is not field:k:n:keybytes[:weight]".format(entry))
+        mix.append(Workload(fields[0], *[int(value) for value in fields[1:]]))
+    return mix
+
+
+class LoadReport(object):
+    """The results of a load run: latencies (operation --> list of seconds),
+    the wall clock time and the CPU time of this process over the run"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.elapsed = 0.0
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds):
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(seconds)
+
+    def count(self, operation=None):
+        if operation is None: return sum(len(values) for values in self.latencies.values())
+        return len(self.latencies.get(operation, ()))
+
+    def percentile(self, operation, fraction):
+        """Nearest rank percentile of the latencies of operation, in seconds"""
+        values = sorted(self.latencies[operation])
+        return values[max(0, min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1))]
+
+    def summary(self):
+        """{operation: {count, ops_per_sec, p50_ms, p99_ms, p999_ms, mean_ms}}
+        plus the total throughput and CPU milliseconds per operation"""
+        thesummary = {}
+        for operation, values in sorted(self.latencies.items()):
+            thesummary[operation] = {'count': len(values), 'ops_per_sec': len(values) / self.elapsed,
+                                     'p50_ms': 1000 * self.percentile(operation, 0.5),
+                                     'p99_ms': 1000 * self.percentile(operation, 0.99),
+                                     'p999_ms': 1000 * self.percentile(operation, 0.999),
+                                     'mean_ms': 1000 * sum(values) / len(values)}
+        total = self.count()
+        thesummary['total'] = {'count': total, 'ops_per_sec': total / self.elapsed if self.elapsed else 0.0,
+                               'cpu_ms_per_op': 1000 * self.cpu / total if total else 0.0}
+        return thesummary
+
+    def __str__(self):
+        thesummary = self.summary()
+        lines = ["{0:<10} {1:>8} {2:>10} {3:>9} {4:>9} {5:>9}".format('operation', 'count', 'ops/s', 'p50 ms', 'p99 ms', 'p999 ms')]
+        for operation, stats in thesummary.items():
+            if operation == 'total': continue
+            lines.append("{0:<10} {1[count]:>8} {1[ops_per_sec]:>10.1f} {1[p50_ms]:>9.3f} {1[p99_ms]:>9.3f} {1[p999_ms]:>9.3f}".format(operation, stats))
+        lines.append("total {0[count]} ops in {1:.2f} s: {0[ops_per_sec]:.1f} ops/s, {0[cpu_ms_per_op]:.3f} ms CPU/op".format(thesummary['total'], self.elapsed))
+        return "\n".join(lines)
+
+
+def _schedule(mix, requests, duration):
+    """A thread safe 'next request' function, returning the next Workload to
+    run, or None once requests have been issued or duration has passed"""
+    counter = itertools.count()
+    deadline = None if duration is None else _timer() + duration
+    weights = [workload.weight for workload in mix]
+    lock = threading.Lock()
+    rng = random.Random()
+
+    def nextrequest():
+        if (requests is not None) and (next(counter) >= requests): return None
+        if (deadline is not None) and (_timer() > deadline): return None
+        with lock:
+            return rng.choices(mix, weights)[0]
+    return nextrequest
+
+def run_inprocess(mix, requests=None, duration=None, concurrency=1):
+    """Run the mix in this process from concurrency threads, until requests
+    requests have been made or duration seconds have passed.  If a request
+    fails, the other threads stop too, and the first exception is raised
+    once they have, rather than reporting the throughput of fewer threads."""
+    if (requests is None) and (duration is None): raise ValueError("Give a number of requests, or a duration")
+    report = LoadReport()
+    nextrequest = _schedule(mix, requests, duration)
+    errors = []
+
+    def worker():
+        try:
+            work()
+        except BaseException as error:
+            errors.append(error)
+
+    def work():
+        while not errors:
+            workload = nextrequest()
+            if workload is None: return
+            secret = os.urandom(workload.keybytes)
+            start = _timer()
+            shares = shamirshare2.split(secret, workload.k, workload.n, workload.field)
+            middle = _timer()
+            recovered = shamirshare2.recover(random.sample(shares, workload.k), workload.field)
+            end = _timer()
+            if recovered != secret: raise AssertionError("Recovered the wrong secret for workload {0:}".format(workload))
+            report.record('split', middle - start)
+            report.record('recover', end - middle)
+
+    threads = [threading.Thread(target=worker) for i in range(concurrency)]
+    cpu, start = time.process_time(), _timer()
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    if errors: raise errors[0]
+    report.elapsed, report.cpu = _timer() - start, time.process_time() - cpu
+    return report
+
+async def _run_tcp(mix, host, port, requests, duration, concurrency):
+    import shamirserver
+    from shamirttlv import method_for
+    report = LoadReport()
+    nextrequest = _schedule(mix, requests, duration)
+    clients = [await shamirserver.SplitKeyClient.connect(host, port) for i in range(concurrency)]
+
+    async def worker(client):
+        while True:
+            workload = nextrequest()
+            if workload is None: return
+            method, prime = method_for(workload.field)
+            start = _timer()
+            parts = await client.create_split_key(workload.k, workload.n, method, prime, 8 * workload.keybytes)
+            middle = _timer()
+            await client.join_split_key(random.sample(parts, workload.k))
+            end = _timer()
+            report.record('split', middle - start)
+            report.record('recover', end - middle)
+
+    cpu, start = time.process_time(), _timer()
+    try:
+        await asyncio.gather(*[worker(client) for client in clients])
+    finally:
+        for client in clients: client.close()
+    report.elapsed, report.cpu = _timer() - start, time.process_time() - cpu
+    return report
+
+def run_tcp(mix, host, port, requests=None, duration=None, concurrency=1):
+    """Run the mix against the KMIP server at host:port, as Create Split Key
+    and Join Split Key requests from concurrency connections.  CPU time is
+    that of this process only (unless the server runs in it too)."""
+    if (requests is None) and (duration is None): raise ValueError("Give a number of requests, or a duration")
+    return asyncio.run(_run_tcp(mix, host, port, requests, duration, concurrency))
+
+async def _run_local_tcp(mix, requests, duration, concurrency, max_batch, max_delay):
+    import shamirserver
+    service = shamirserver.SplitKeyService(max_batch, max_delay)
+    server = await service.start('127.0.0.1', 0)
+    try:
+        return await _run_tcp(mix, '127.0.0.1', server.sockets[0].getsockname()[1], requests, duration, concurrency)
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split/recover load generator")
+    parser.add_argument('--mix', default='GF8:3:5:32:1', help="field:k:n:keybytes[:weight],... (default GF8:3:5:32:1)")
+    parser.add_argument('--concurrency', type=int, default=1, help="Concurrent workers (default 1)")
+    parser.add_argument('--requests', type=int, help="Stop after this many split+recover requests")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds (default 10)")
+    parser.add_argument('--tcp', action='store_true', help="Go through a shamirserver started in this process")
+    parser.add_argument('--connect', help="HOST:PORT of a KMIP server to drive")
+    parser.add_argument('--max-batch', type=int, default=64, help="Batch size of the --tcp server (default 64)")
+    parser.add_argument('--max-delay', type=float, default=0.002, help="Batch delay of the --tcp server (default 0.002)")
+    parser.add_argument('--json', action='store_true', help="Output the summary as JSON")
+    args = parser.parse_args(argv)
+    if (args.requests is None) and (args.duration is None): args.duration = 10.0
+    mix = parse_mix(args.mix)
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        report = run_tcp(mix, host, int(port), args.requests, args.duration, args.concurrency)
+    elif args.tcp:
+        report = asyncio.run(_run_local_tcp(mix, args.requests, args.duration, args.concurrency, args.max_batch, args.max_delay))
+    else:
+        report = run_inprocess(mix, args.requests, args.duration, args.concurrency)
+    print(json.dumps(report.summary(), indent=2) if args.json else report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,427 @@
+###############################################################################
+# SHAMIRMETRICS.py
+# Latency histograms and counters for the high level shamirshare2 API:
+# split/recover and their _many, _into and _packed forms, by field, k and n,
+# with bytes processed, batch sizes, cache hit rates and engine selections.
+# Exported as Prometheus text (to a file, over HTTP or a Unix socket) or as
+# a dict.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Record what split/recover cost, per operation, field, k and n.
+As with shamirinstr, nothing is recorded until enable() is called: it swaps
+timed versions of the API functions into shamirshare2, and disable() swaps
+the originals back, so while disabled there is no cost at all.  Only the
+outermost call is timed (split_many() calls split(), but is recorded once,
+as split_many).  Recording is thread safe.
+
+Latencies go into HDR-style histograms: integer nanoseconds in log-linear
+buckets (2^(SUBBITS-1) buckets per power of two, so any percentile is within
+1% of the true value), in constant memory whatever the number of calls.
+Alongside them:
+    bytes processed - the length of the secret(s) split or recovered
+    batch sizes - the number of secrets in each split_many/recover_many
+    cache hits - the engine choice cache (a miss is a calibration run) and
+        the packed sharing interpolation plans
+    engine selections - the engine picked by each select_engine() call
+    errors - calls which raised, by operation and field
+
+    Usage:  ############# Record some calls, then look at them #############
+
+        >>> import shamirmetrics, shamirshare2
+        >>> metrics = shamirmetrics.enable()
+        >>> shares = shamirshare2.split(bytes(32), 3, 5)
+        >>> secret = shamirshare2.recover(shares[:3])
+        >>> sharelists = shamirshare2.split_many([bytes(16)] * 10, 2, 3, shamirshare2.GF16())
+        >>> shamirmetrics.disable() is metrics
+        True
+        >>> snapshot = metrics.snapshot()
+        >>> [(s['operation'], s['field'], s['k'], s['n'], s['count']) for s in snapshot['latency']]
+        [('recover', 'GF8', 3, None, 1), ('split', 'GF8', 3, 5, 1), ('split_many', 'GF16', 2, 3, 1)]
+        >>> snapshot['bytes'], snapshot['batches']['split_many']['max']
+        ({'recover/GF8': 32, 'split/GF8': 32, 'split_many/GF16': 160}, 10)
+        >>> 0 < snapshot['latency'][0]['p50'] <= snapshot['latency'][0]['p99'] <= snapshot['latency'][0]['max']
+        True
+
+        ###### Prometheus text format
+        >>> text = metrics.prometheus()
+        >>> 'shamirshare2_operation_seconds_count{operation="split",field="GF8",k="3",n="5"} 1' in text.splitlines()
+        True
+        >>> 'shamirshare2_bytes_total{operation="split_many",field="GF16"} 160' in text.splitlines()
+        True
+
+    Exporting:
+
+        metrics.write('/var/lib/node_exporter/shamir.prom')  # For the node exporter's textfile collector
+        server = shamirmetrics.serve(metrics, ('127.0.0.1', 9464))   # GET /metrics
+        server = shamirmetrics.serve(metrics, '/run/shamir-metrics.sock')   # The text, once per connection
+"""
+
+import http.server
+import math
+import os
+import socketserver
+import threading
+import time
+
+import shamirshare2
+
+SUBBITS = 8   # Log2 of the histogram buckets per power of two: relative error < 2^-(SUBBITS-1)
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Upper bounds (seconds) of the exported Prometheus buckets
+LATENCY_BOUNDS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BOUNDS = tuple(2**i for i in range(0, 17, 2))
+PREFIX = 'shamirshare2'
+
+_timer = getattr(time, 'perf_counter_ns', None) or (lambda: int(time.perf_counter() * 1e9))
+_originals = {}   # name --> original attribute of shamirshare2, while enabled
+_metrics = None   # The Metrics being recorded into, while enabled
+_local = threading.local()   # depth: nonzero inside a recorded call
+
+
+class Histogram(object):
+    """Counts of non-negative integers in log-linear buckets: the values
+    below 2^SUBBITS exactly, and above that 2^(SUBBITS-1) buckets for each
+    power of two.  Usage:
+        >>> h = Histogram()
+        >>> for value in range(1, 100001): h.record(value)
+        >>> h.count, h.min, h.max, h.percentile(0.5), h.percentile(0.99)
+        (100000, 1, 100000, 50175, 99327)"""
+
+    def __init__(self, subbits=SUBBITS):
+        self.subbits = subbits
+        self.counts = {}   # bucket index --> count
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = value.bit_length() - self.subbits
+        if shift <= 0: return value
+        return (shift << (self.subbits - 1)) + (value >> shift)
+
+    def _lowest(self, index):  # The smallest value in bucket index
+        if index < (1 << self.subbits): return index
+        shift = (index >> (self.subbits - 1)) - 1
+        return (index - (shift << (self.subbits - 1))) << shift
+
+    def highest(self, index):  # The largest value in bucket index
+        return self._lowest(index + 1) - 1
+
+    def record(self, value, count=1):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if (self.min is None) or (value < self.min): self.min = value
+        if (self.max is None) or (value > self.max): self.max = value
+
+    def percentile(self, fraction):
+        """The nearest rank percentile, to within the width of its bucket
+        (reported as the bucket's largest value, but at most max)"""
+        if not self.count: return None
+        rank = max(1, int(math.ceil(fraction * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank: return min(self.highest(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """The number of values at most each of bounds, counting a whole
+        bucket against the first bound at or above its largest value"""
+        thecounts = [0] * len(bounds)
+        for index, count in self.counts.items():
+            highest = self.highest(index)
+            for i, bound in enumerate(bounds):
+                if highest <= bound:
+                    thecounts[i] += count
+                    break
+        for i in range(1, len(bounds)): thecounts[i] += thecounts[i-1]
+        return thecounts
+
+
+class Metrics(object):
+    """A registry of the latencies and counters of shamirshare2 calls.
+        latency - (operation, field, k, n) --> Histogram of nanoseconds
+        bytes - (operation, field) --> bytes of secret processed
+        batches - operation --> Histogram of the secrets per call
+        caches - cache name --> [hits, misses]
+        engines - (operation, field, engine) --> times selected
+        errors - (operation, field) --> calls which raised
+    Fields are labelled as shamirshare2 labels them ('GF8', 'GFp257', ...),
+    and n is None for recover operations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.bytes = {}
+            self.batches = {}
+            self.caches = {}
+            self.engines = {}
+            self.errors = {}
+
+    def observe(self, operation, field, k, n, nanoseconds, nbytes=0, batch=None):
+        with self._lock:
+            key = (operation, field, k, n)
+            if key not in self.latency: self.latency[key] = Histogram()
+            self.latency[key].record(nanoseconds)
+            self.bytes[(operation, field)] = self.bytes.get((operation, field), 0) + nbytes
+            if batch is not None:
+                if operation not in self.batches: self.batches[operation] = Histogram()
+                self.batches[operation].record(batch)
+
+    def error(self, operation, field):
+        with self._lock:
+            self.errors[(operation, field)] = self.errors.get((operation, field), 0) + 1
+
+    def cache(self, name, hit):
+        with self._lock:
+            thecounts = self.caches.setdefault(name, [0, 0])
+            thecounts[0 if hit else 1] += 1
+
+    def engine(self, operation, field, name):
+        with self._lock:
+            key = (operation, field, name)
+            self.engines[key] = self.engines.get(key, 0) + 1
+
+    def snapshot(self):
+        """Everything recorded, as a dict of plain values (seconds for latencies)"""
+        with self._lock:
+            latency = []
+            for (operation, field, k, n), h in sorted(self.latency.items(), key=lambda item: _sortkey(item[0])):
+                stats = {'operation': operation, 'field': field, 'k': k, 'n': n, 'count': h.count,
+                         'sum': h.total / 1e9, 'min': h.min / 1e9, 'max': h.max / 1e9}
+                for q in QUANTILES: stats[_quantilename(q)] = h.percentile(q) / 1e9
+                latency.append(stats)
+            batches = dict((operation, {'count': h.count, 'sum': h.total, 'min': h.min, 'max': h.max,
+                                        'p50': h.percentile(0.5), 'p99': h.percentile(0.99)})
+                           for operation, h in sorted(self.batches.items()))
+            caches = dict((name, {'hits': hits, 'misses': misses, 'hit_rate': float(hits) / (hits + misses)})
+                          for name, (hits, misses) in sorted(self.caches.items()))
+            return {'latency': latency,
+                    'bytes': dict(("{0:}/{1:}".format(*key), value) for key, value in sorted(self.bytes.items())),
+                    'batches': batches, 'caches': caches,
+                    'engines': dict(("{0:}/{1:}/{2:}".format(*key), value) for key, value in sorted(self.engines.items())),
+                    'errors': dict(("{0:}/{1:}".format(*key), value) for key, value in sorted(self.errors.items()))}
+
+    def prometheus(self):
+        """Everything recorded, in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            name = PREFIX + '_operation_seconds'
+            lines += ["# HELP {0:} Latency of shamirshare2 calls.".format(name), "# TYPE {0:} histogram".format(name)]
+            bounds = [int(bound * 1e9) for bound in LATENCY_BOUNDS]
+            for key, h in sorted(self.latency.items(), key=lambda item: _sortkey(item[0])):
+                labels = _labels(operation=key[0], field=key[1], k=key[2], n=key[3])
+                lines += _histogram(name, labels, h, LATENCY_BOUNDS, h.cumulative(bounds), h.total / 1e9)
+            name = PREFIX + '_operation_quantile_seconds'
+            lines += ["# HELP {0:} Latency percentiles of shamirshare2 calls, from HDR histograms.".format(name),
+                      "# TYPE {0:} summary".format(name)]
+            for key, h in sorted(self.latency.items(), key=lambda item: _sortkey(item[0])):
+                labels = _labels(operation=key[0], field=key[1], k=key[2], n=key[3])
+                for q in QUANTILES:
+                    lines.append("{0:}{{{1:},quantile=\"{2:}\"}} {3:}".format(name, labels, q, _number(h.percentile(q) / 1e9)))
+                lines.append("{0:}_sum{{{1:}}} {2:}".format(name, labels, _number(h.total / 1e9)))
+                lines.append("{0:}_count{{{1:}}} {2:}".format(name, labels, h.count))
+            lines += _counter(PREFIX + '_bytes_total', "Bytes of secret split or recovered.", self.bytes, ('operation', 'field'))
+            name = PREFIX + '_batch_size'
+            lines += ["# HELP {0:} Secrets per split_many/recover_many call.".format(name), "# TYPE {0:} histogram".format(name)]
+            for operation, h in sorted(self.batches.items()):
+                lines += _histogram(name, _labels(operation=operation), h, BATCH_BOUNDS, h.cumulative(BATCH_BOUNDS), h.total)
+            caches = {}
+            for cachename, (hits, misses) in self.caches.items():
+                caches[(cachename, 'hit')], caches[(cachename, 'miss')] = hits, misses
+            lines += _counter(PREFIX + '_cache_requests_total', "Cache lookups, by result.", caches, ('cache', 'result'))
+            lines += _counter(PREFIX + '_engine_selections_total', "Engines chosen by select_engine().", self.engines, ('operation', 'field', 'engine'))
+            lines += _counter(PREFIX + '_errors_total', "Calls which raised an exception.", self.errors, ('operation', 'field'))
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write prometheus() to path, atomically (through a temporary file
+        in the same directory), as the textfile collector expects"""
+        temppath = "{0:}.{1:}.tmp".format(path, os.getpid())
+        with open(temppath, 'w') as thefile: thefile.write(self.prometheus())
+        os.replace(temppath, path)
+
+
+def _sortkey(key):   # None (n of recover) sorts first
+    return tuple((value is not None, value) for value in key)
+
+def _quantilename(q):
+    return 'p' + "{0:}".format(q * 100).rstrip('0').rstrip('.').replace('.', '')
+
+def _number(value):
+    return repr(float(value))
+
+def _escape(value):
+    return "{0:}".format(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):   # In the order operation, field, k, n, ..., leaving out None
+    order = ('operation', 'field', 'k', 'n', 'cache', 'result', 'engine')
+    return ",".join("{0:}=\"{1:}\"".format(name, _escape(labels[name])) for name in order
+                    if (name in labels) and (labels[name] is not None))
+
+def _histogram(name, labels, h, bounds, cumulative, total):
+    lines = ["{0:}_bucket{{{1:},le=\"{2:}\"}} {3:}".format(name, labels, "{0:g}".format(bound), count)
+             for bound, count in zip(bounds, cumulative)]
+    lines.append("{0:}_bucket{{{1:},le=\"+Inf\"}} {2:}".format(name, labels, h.count))
+    lines.append("{0:}_sum{{{1:}}} {2:}".format(name, labels, _number(total)))
+    lines.append("{0:}_count{{{1:}}} {2:}".format(name, labels, h.count))
+    return lines
+
+def _counter(name, helptext, values, labelnames):
+    lines = ["# HELP {0:} {1:}".format(name, helptext), "# TYPE {0:} counter".format(name)]
+    for key, value in sorted(values.items()):
+        lines.append("{0:}{{{1:}}} {2:}".format(name, _labels(**dict(zip(labelnames, key))), value))
+    return lines
+
+
+############################ Recorded operations ##############################
+# Each recorded function is described by the position of its thefield
+# argument, and a function of arg(index, name), which returns an argument
+# however it was passed, and the result, giving (k, n, bytes, batch).
+
+def _arg(args, kwargs, index, name, default=None):
+    if len(args) > index: return args[index]
+    return kwargs.get(name, default)
+
+def _nbytes(buffer):
+    return memoryview(buffer).nbytes
+
+OPERATIONS = {
+    'split': (3, lambda arg, result: (arg(1, 'k'), arg(2, 'n'), len(arg(0, 'secret')), None)),
+    'recover': (1, lambda arg, result: (len(arg(0, 'shares')), None, len(result), None)),
+    'split_many': (3, lambda arg, result: (arg(1, 'k'), arg(2, 'n'), sum(len(secret) for secret in arg(0, 'secrets')), len(arg(0, 'secrets')))),
+    'recover_many': (1, lambda arg, result: (len(arg(0, 'sharelists')[0]), None, sum(len(secret) for secret in result), len(result))),
+    'split_into': (3, lambda arg, result: (arg(1, 'k'), len(arg(2, 'outputs')), _nbytes(arg(0, 'secret')), None)),
+    'recover_into': (2, lambda arg, result: (len(arg(0, 'shares')), None, _nbytes(arg(1, 'output')), None)),
+    'split_packed': (4, lambda arg, result: (arg(1, 'k'), arg(2, 'n'), len(arg(0, 'secret')), None)),
+    'recover_packed': (2, lambda arg, result: (len(arg(0, 'shares')), None, len(result), None)),
+}
+
+def _recorded(operation, function):
+    fieldindex, describe = OPERATIONS[operation]
+    def recorded(*args, **kwargs):
+        if getattr(_local, 'depth', 0): return function(*args, **kwargs)
+        metrics = _metrics
+        thefield = _arg(args, kwargs, fieldindex, 'thefield')
+        label = 'GF8' if thefield is None else shamirshare2._fieldlabel(thefield)
+        _local.depth = 1
+        start = _timer()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            metrics.error(operation, label)
+            raise
+        finally:
+            _local.depth = 0
+        elapsed = _timer() - start
+        k, n, nbytes, batch = describe(lambda index, name: _arg(args, kwargs, index, name), result)
+        metrics.observe(operation, label, k, n, elapsed, nbytes, batch)
+        return result
+    recorded.__name__ = function.__name__
+    recorded.__doc__ = function.__doc__
+    return recorded
+
+def _recorded_select(function):
+    def select_engine(thefield, operation, k, n, length):
+        calibrations = _local.__dict__.setdefault('calibrations', 0)
+        name = function(thefield, operation, k, n, length)
+        label = shamirshare2._fieldlabel(thefield)
+        if _local.calibrations != calibrations: _metrics.cache('engine', False)
+        elif shamirshare2._engine_key(thefield, operation, k, n, length)[0] in shamirshare2._engine_choices: _metrics.cache('engine', True)
+        _metrics.engine(operation, label, name)
+        return name
+    select_engine.__doc__ = function.__doc__
+    return select_engine
+
+def _recorded_calibrate(function):
+    def _calibrate(*args):
+        _local.calibrations = getattr(_local, 'calibrations', 0) + 1
+        return function(*args)
+    return _calibrate
+
+def _recorded_plan(function):
+    def _packed_plan(thefield, sources, targets):
+        before = len(shamirshare2._packed_plans)
+        plan = function(thefield, sources, targets)
+        _metrics.cache('packed_plan', len(shamirshare2._packed_plans) == before)
+        return plan
+    return _packed_plan
+
+def _swap(name, replacement):
+    _originals[name] = getattr(shamirshare2, name)
+    setattr(shamirshare2, name, replacement)
+
+def enabled():
+    return _metrics is not None
+
+def enable(metrics=None):
+    """Install the recording versions of the shamirshare2 functions, and
+    return the Metrics they record into (a new one unless metrics is given)"""
+    global _metrics
+    if _metrics is not None: raise RuntimeError("shamirmetrics is already enabled")
+    _metrics = Metrics() if metrics is None else metrics
+    for operation in OPERATIONS:
+        _swap(operation, _recorded(operation, getattr(shamirshare2, operation)))
+    _swap('select_engine', _recorded_select(shamirshare2.select_engine))
+    _swap('_calibrate', _recorded_calibrate(shamirshare2._calibrate))
+    _swap('_packed_plan', _recorded_plan(shamirshare2._packed_plan))
+    return _metrics
+
+def disable():
+    """Restore the original functions, and return the Metrics"""
+    global _metrics
+    for name, original in _originals.items():
+        setattr(shamirshare2, name, original)
+    _originals.clear()
+    metrics, _metrics = _metrics, None
+    return metrics
+
+
+################################ Exporting ####################################
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):   # Scrapes are not worth a line on stderr each
+        pass
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(self.server.metrics.prometheus().encode('utf-8'))
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(metrics, address):
+    """Serve metrics.prometheus() from a background thread: over HTTP (GET
+    /metrics) if address is (host, port), or as the bare text to each
+    connection if it is the path of a Unix socket.  Stop the server with
+    server.shutdown() and server.server_close()."""
+    if isinstance(address, str):
+        if os.path.exists(address): os.unlink(address)
+        server = _UnixServer(address, _SocketHandler)
+    else:
+        server = http.server.ThreadingHTTPServer(address, _MetricsHandler)
+        server.daemon_threads = True
+    server.metrics = metrics
+    thread = threading.Thread(target=server.serve_forever, name='shamirmetrics', daemon=True)
+    thread.start()
+    return server
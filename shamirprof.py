@@ -0,0 +1,255 @@
+###############################################################################
+# SHAMIRPROF.py
+# Memory and allocation profiling of the shamirshare2 split and recover
+# paths, for each field, using tracemalloc (Python 3.4+).  Reports can be
+# checked against per-case thresholds, so the profiler doubles as a
+# regression gate (exit status 1 when a threshold is exceeded).  Also times
+# the import of shamirshare2, which is paid by every CLI invocation.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Measure the memory cost of one split() or recover() call of shamirshare2.
+For each case the report gives the peak traced memory, the memory blocks
+live at the peak (per secret byte as well as in total), the bytes retained
+once the call returns (essentially the result), and a breakdown of the
+memory live at the peak by call site.
+
+    Usage:  ############# Profile a 3-of-5 split of a 32-byte key #############
+
+        >>> from shamirprof import *
+        >>> from shamirshare2 import GF8
+        >>> report = profile('split', GF8(), 3, 5, 32)
+        >>> report.key, report.peak > 0, report.blocks > 0
+        ('split/GF8/object', True, True)
+        >>> len(report.sites) > 0               # [(file:line, bytes, blocks), ...]
+        True
+
+        ###### Use as a regression gate
+        >>> check([report], {'split/GF8/object': {'peak_per_byte': 1}})  #doctest: +ELLIPSIS
+        ['split/GF8/object: peak_per_byte = ... exceeds 1']
+        >>> check([report], {'*': {'peak_per_byte': 10**9, 'blocks_per_byte': 10**9}})
+        []
+
+    Usage:  ############# Time the import in fresh interpreters #############
+
+        >>> best, median = import_time('shamirshare2', repeat=3)
+        >>> 0 < best <= median
+        True
+
+    Command line:
+
+        python shamirprof.py [-k 3] [-n 5] [--length 32] [--sites 5] [--json]
+                             [--thresholds FILE] [--write-thresholds FILE]
+        python shamirprof.py --import-time [--max-import-ms MS]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import shamirshare2
+
+FIELDS = (   # The fields profiled by default, as (name, field)
+    ('GF8', shamirshare2.GF8()),
+    ('GF16', shamirshare2.GF16()),
+    ('GF2^64', shamirshare2.GF2m(64)),
+    ('GFp257', shamirshare2.GFp(2**256 + 297)),  # First prime larger than 2^256
+)
+
+OPERATIONS = ('split', 'recover')
+
+
+class MemReport(object):
+    """The memory used by a single split or recover call"""
+
+    metrics = ('peak_per_byte', 'blocks_per_byte', 'retained_per_byte')
+
+    def __init__(self, operation, fieldname, engine, k, n, length):
+        self.operation = operation
+        self.fieldname = fieldname
+        self.engine = engine
+        self.k = k
+        self.n = n
+        self.length = length     # Length of the secret, in bytes
+        self.peak = 0            # Peak traced memory, in bytes
+        self.retained = 0        # Traced memory still allocated after the call
+        self.blocks = 0          # Memory blocks live at the peak
+        self.sites = []          # [(file:line, bytes, blocks), ...] live at the peak
+
+    @property
+    def key(self):   # Name used for thresholds
+        return "{0:}/{1:}/{2:}".format(self.operation, self.fieldname, self.engine)
+
+    @property
+    def peak_per_byte(self):
+        return float(self.peak) / self.length
+
+    @property
+    def blocks_per_byte(self):
+        return float(self.blocks) / self.length
+
+    @property
+    def retained_per_byte(self):
+        return float(self.retained) / self.length
+
+    def asdict(self):
+        thedict = dict((name, getattr(self, name)) for name in ('operation', 'fieldname', 'engine', 'k', 'n', 'length', 'peak', 'retained', 'blocks', 'sites'))
+        thedict.update((name, getattr(self, name)) for name in self.metrics)
+        return thedict
+
+    def __str__(self):
+        lines = ["{0:<24} k={1:} n={2:} {3:} bytes: peak {4:} B ({5:.1f} B/byte), {6:} blocks ({7:.1f}/byte), retained {8:} B".format(
+                 self.key, self.k, self.n, self.length, self.peak, self.peak_per_byte, self.blocks, self.blocks_per_byte, self.retained)]
+        lines += ["    {0:<40} {1:>10} B {2:>8} blocks".format(*thesite) for thesite in self.sites]
+        return "\n".join(lines)
+
+
+class _PeakSampler(object):
+    """A sys.setprofile() hook which snapshots the traced memory every time it
+    grows by more than step bytes, so the last snapshot is taken close to the
+    peak.  Sampling on function return keeps the locals of the returning
+    frame (the intermediate lists in fit(), say) in the snapshot."""
+
+    def __init__(self, step):
+        self.step = step
+        self.high = 0
+        self.snapshot = None
+
+    def __call__(self, frame, event, arg):
+        if event == 'return':
+            current = tracemalloc.get_traced_memory()[0]
+            if current > self.high + self.step:
+                self.high = current
+                self.snapshot = tracemalloc.take_snapshot()
+
+
+def _fieldname(thefield):
+    for name, field in FIELDS:
+        if field is thefield: return name
+    if isinstance(thefield, shamirshare2.GFp): return "GFp{0:}".format(thefield.prime.bit_length())
+    return type(thefield).__name__
+
+def _operation(operation, thefield, k, n, length, engine):
+    """Return a no argument callable running the operation once (any setup,
+    like splitting a secret to have shares to recover, is done here)"""
+    secret = bytes(bytearray(i % 256 for i in range(length)))
+    if operation == 'split':
+        return lambda: shamirshare2.split(secret, k, n, thefield, engine)
+    elif operation == 'recover':
+        shares = shamirshare2.split(secret, k, n, thefield)[:k]
+        return lambda: shamirshare2.recover(shares, thefield, engine)
+    raise ValueError("Unknown operation \'{0:}\', expected one of {1:}".format(operation, OPERATIONS))
+
+def profile(operation, thefield, k, n, length, engine='object', nsites=10, nframes=1):
+    """Profile one call of operation ('split' or 'recover') over thefield, by
+    the given engine, for a k-of-n split of a secret of length bytes, and
+    return a MemReport.
+    The call is made twice: once to measure the peak and the retained
+    memory, then again under a sampler to attribute the peak to call sites."""
+    report = MemReport(operation, _fieldname(thefield), engine, k, n, length)
+    thecall = _operation(operation, thefield, k, n, length, engine)
+    thecall()   # Warm up: any lazily created state is not charged to the call
+    wastracing = tracemalloc.is_tracing()
+    if wastracing: tracemalloc.stop()
+    try:
+        tracemalloc.start(nframes)
+        start = tracemalloc.get_traced_memory()[0]
+        result = thecall()
+        current, peak = tracemalloc.get_traced_memory()
+        report.peak = peak - start
+        report.retained = current - start
+        del result
+        tracemalloc.stop()
+
+        tracemalloc.start(nframes)
+        sampler = _PeakSampler(max(1024, report.peak // 64))
+        sys.setprofile(sampler)
+        try:
+            result = thecall()
+        finally:
+            sys.setprofile(None)
+        del result
+        if sampler.snapshot is not None:
+            snapshot = sampler.snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                                       tracemalloc.Filter(False, __file__)))
+            stats = snapshot.statistics('lineno')
+            report.blocks = sum(stat.count for stat in stats)
+            report.sites = [("{0:}:{1:}".format(stat.traceback[0].filename.split('/')[-1], stat.traceback[0].lineno), stat.size, stat.count)
+                            for stat in stats[:nsites]]
+    finally:
+        tracemalloc.stop()
+        if wastracing: tracemalloc.start()
+    return report
+
+def profile_all(k=3, n=5, length=32, nsites=10):
+    """Profile every operation over every field in FIELDS, with every engine
+    available for it (see shamirshare2.engines())"""
+    return [profile(operation, thefield, k, n, length, engine, nsites)
+            for name, thefield in FIELDS for operation in OPERATIONS for engine in shamirshare2.engines(thefield, operation)]
+
+def check(reports, thresholds):
+    """Return the list of threshold violations (empty if all is well).
+    thresholds maps a report key ('split/GF8/object'), or '*' for the
+    default, to the maximum allowed value of some of MemReport.metrics."""
+    violations = []
+    for report in reports:
+        limits = thresholds.get(report.key, thresholds.get('*', {}))
+        for metric in MemReport.metrics:
+            if (metric in limits) and (getattr(report, metric) > limits[metric]):
+                violations.append("{0:}: {1:} = {2:.1f} exceeds {3:}".format(report.key, metric, getattr(report, metric), limits[metric]))
+    return violations
+
+def thresholds_for(reports, slack=1.25):
+    """Thresholds allowing each metric to grow by a factor of slack"""
+    return dict((report.key, dict((metric, round(slack*getattr(report, metric), 1)) for metric in MemReport.metrics))
+                for report in reports)
+
+def import_time(module='shamirshare2', repeat=10):
+    """Import module in repeat fresh interpreters, returning the (best, median)
+    time in milliseconds.  Only the import statement is timed, not the
+    interpreter startup.  (Whether bytecode can be cached, see
+    PYTHONDONTWRITEBYTECODE, makes a large difference.)"""
+    code = "import time; start = time.perf_counter(); import {0:}; print(time.perf_counter() - start)".format(module)
+    thedir = os.path.dirname(os.path.abspath(__file__))
+    times = sorted(1000*float(subprocess.check_output([sys.executable, '-c', code], cwd=thedir)) for i in range(repeat))
+    return times[0], times[len(times)//2]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory profile of shamirshare2 split/recover")
+    parser.add_argument('-k', type=int, default=3, help="Shares needed to recover (default 3)")
+    parser.add_argument('-n', type=int, default=5, help="Shares created (default 5)")
+    parser.add_argument('--length', type=int, default=32, help="Secret length in bytes (default 32)")
+    parser.add_argument('--sites', type=int, default=5, help="Call sites listed per report (default 5)")
+    parser.add_argument('--json', action='store_true', help="Output the reports as JSON")
+    parser.add_argument('--thresholds', help="JSON file of thresholds to gate on")
+    parser.add_argument('--write-thresholds', help="Write thresholds from this run to a JSON file")
+    parser.add_argument('--slack', type=float, default=1.25, help="Headroom for --write-thresholds (default 1.25)")
+    parser.add_argument('--import-time', action='store_true', help="Time the import of shamirshare2 instead")
+    parser.add_argument('--max-import-ms', type=float, help="Fail if the best import time exceeds this")
+    args = parser.parse_args(argv)
+    if args.import_time:
+        best, median = import_time()
+        print("import shamirshare2: best {0:.2f} ms, median {1:.2f} ms".format(best, median))
+        if (args.max_import_ms is not None) and (best > args.max_import_ms):
+            print("FAIL import time {0:.2f} ms exceeds {1:}".format(best, args.max_import_ms), file=sys.stderr)
+            return 1
+        return 0
+    reports = profile_all(args.k, args.n, args.length, args.sites)
+    if args.json: print(json.dumps([report.asdict() for report in reports], indent=2))
+    else: print("\n".join(str(report) for report in reports))
+    if args.write_thresholds:
+        with open(args.write_thresholds, 'w') as thefile:
+            json.dump(thresholds_for(reports, args.slack), thefile, indent=2, sort_keys=True)
+    if args.thresholds:
+        with open(args.thresholds) as thefile:
+            violations = check(reports, json.load(thefile))
+        for violation in violations: print("FAIL " + violation, file=sys.stderr)
+        return 1 if violations else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+###############################################################################
+# SHAMIRSEED.py
+# Shamir splits whose random coefficients are derived from a secret seed, so
+# that any share can be regenerated later from the seed and one stored
+# (anchor) share, without keeping all n shares or the secret.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Seed-derived split: coefficient j (for j = 1, ..., k-1) of the polynomial
+of each slice of the secret is read from a PRF, SHAKE256 keyed by the
+seed, the key id, j and the position of the slice.  Given the seed, the
+polynomial f of each slice is known up to its constant term, so one share
+(a, f(a)) fixes it, and the share for any x is
+    f(x) = f(a) + Sum(j>=1, c_j*(x^j - a^j))
+which over GF8 or GF16 is a single shamirshare2.combinebytes() over whole
+byte strings.  The secret itself is the anchor with a = 0.
+
+Anyone holding the seed and a share can compute every other share, and so
+the secret: the seed must be protected as well as the secret is.
+
+    Usage:  ############# Split a key 3-of-5, then regenerate share 4 #############
+
+        >>> import shamirseed, shamirshare2
+        >>> seed = bytes(range(32))
+        >>> secret = b'0123456789abcdef0123456789abcdef'
+        >>> shares = shamirseed.split(secret, 3, 5, seed, 'key-17')
+        >>> shamirshare2.recover(shares[1:4]) == secret
+        True
+        >>> shamirseed.regenerate(shares[0], 4, 3, seed, 'key-17') == shares[3]
+        True
+        >>> shamirseed.regenerate((0, secret), 4, 3, seed, 'key-17') == shares[3]   # From the secret
+        True
+        >>> shares == shamirseed.split(secret, 3, 5, seed, 'key-17')                 # Deterministic
+        True
+
+        ###### Over other fields, and streaming
+        >>> gf64 = shamirshare2.GF2m(64)
+        >>> shares = shamirseed.split(secret, 2, 3, seed, 'key-18', gf64)
+        >>> shamirseed.regenerate(shares[2], 1, 2, seed, 'key-18', gf64) == shares[0]
+        True
+        >>> import io
+        >>> outfile = io.BytesIO()
+        >>> shamirseed.regenerate_stream(3, io.BytesIO(shares[2][1]), outfile, 2, 2, seed, 'key-18', gf64)
+        32
+        >>> outfile.getvalue() == shares[1][1]
+        True
+"""
+
+import hashlib
+import struct
+
+import shamirshare2
+
+BLOCK = 4096         # Bytes of PRF output per SHAKE256 call
+CHUNK = 16 * BLOCK   # Elements per chunk when streaming
+MINSEEDBYTES = 16
+
+
+def _bytesfield(thefield):  # Fields with the vectorized byte string kernels
+    return isinstance(thefield, (shamirshare2.GF8, shamirshare2.GF16))
+
+def _stride(thefield):
+    """PRF bytes per coefficient: the element width, with 16 extra bytes over
+    GFp so that reducing mod p leaves a bias below 2^-128"""
+    return thefield.eltbytes + 16 if isinstance(thefield, shamirshare2.GFp) else thefield.eltbytes
+
+def _prf(seed, keyid, j, start, length):
+    """Bytes [start, start+length) of the PRF stream of coefficient j"""
+    if len(seed) < MINSEEDBYTES: raise ValueError("The seed must be at least {0:} bytes".format(MINSEEDBYTES))
+    if not isinstance(keyid, bytes): keyid = keyid.encode('utf-8')
+    prefix = b'shamirseed' + struct.pack('>H', len(seed)) + seed + struct.pack('>H', len(keyid)) + keyid + struct.pack('>I', j)
+    first, last = start // BLOCK, (start + length - 1) // BLOCK
+    stream = b''.join(hashlib.shake_256(prefix + struct.pack('>Q', block)).digest(BLOCK) for block in range(first, last + 1))
+    return stream[start - first*BLOCK:start - first*BLOCK + length]
+
+def coefficients(seed, keyid, j, start, count, thefield=None):
+    """Coefficient j of the polynomials of slices start, ..., start+count-1
+    of the secret: a byte string over GF8 and GF16, else a list of elements"""
+    if thefield is None: thefield = shamirshare2.GF8()
+    stride = _stride(thefield)
+    stream = _prf(seed, keyid, j, start*stride, count*stride) if count else b''
+    if _bytesfield(thefield): return stream
+    if isinstance(thefield, shamirshare2.GFp):
+        return [thefield(int.from_bytes(stream[i:i+stride], 'big')) for i in range(0, len(stream), stride)]
+    mask = thefield.order - 1
+    return [thefield(int.from_bytes(stream[i:i+stride], 'big') & mask) for i in range(0, len(stream), stride)]
+
+def _values(secret, thefield):
+    """The secret written as the values at x = 0, in elements of eltbytes bytes"""
+    if thefield.secretbytes == thefield.eltbytes: return bytes(secret)
+    return b''.join(thefield.tobytes(thefield.frombytes(secret[i:i+thefield.secretbytes]))
+                    for i in range(0, len(secret), thefield.secretbytes))
+
+def _evaluate(values, start, x, a, k, seed, keyid, thefield):
+    """Shift the byte string values of the polynomials of slices start, ...
+    from a to x, returning their values at x"""
+    width = thefield.eltbytes
+    count = len(values) // width
+    xval, aval = thefield(x), thefield(a)
+    xpow, apow = thefield(1), thefield(1)
+    weights = []
+    for j in range(1, k):
+        xpow, apow = xpow.mul(xval), apow.mul(aval)
+        weights.append(xpow.sub(apow))
+    planes = [coefficients(seed, keyid, j, start, count, thefield) for j in range(1, k)]
+    if _bytesfield(thefield):
+        return shamirshare2.combinebytes([values] + planes, [1] + weights, thefield)
+    theresult = []
+    for i in range(count):
+        theval = thefield.frombytes(values[i*width:(i+1)*width])
+        for theweight, theplane in zip(weights, planes):
+            theval = theval.add(theweight.mul(theplane[i]))
+        theresult.append(thefield.tobytes(theval))
+    return b''.join(theresult)
+
+def split(secret, k, n, seed, keyid, thefield=None):
+    """Split secret k-of-n as shamirshare2.split() does, but with the
+    coefficients of the polynomials derived from seed and keyid"""
+    if thefield is None: thefield = shamirshare2.GF8()
+    if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+    if n >= thefield.order: raise ValueError("Cannot create {0:} distinct shares over a field of order {1:}".format(n, thefield.order))
+    if (thefield.secretbytes == 0) or (len(secret) % thefield.secretbytes != 0):
+        raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), thefield.secretbytes))
+    if _bytesfield(thefield):  # Derive the coefficients once, and evaluate by Horner's rule
+        planes = [bytes(secret)] + [coefficients(seed, keyid, j, 0, len(secret) // thefield.eltbytes, thefield) for j in range(1, k)]
+        return [(x, shamirshare2.evalbytes(planes, x, thefield)) for x in range(1, n+1)]
+    values = _values(secret, thefield)
+    return [(x, _evaluate(values, 0, x, 0, k, seed, keyid, thefield)) for x in range(1, n+1)]
+
+def regenerate(anchor, x, k, seed, keyid, thefield=None):
+    """The share (x, y) of a k-of-n split made by split() with seed and keyid,
+    computed from any other share, the anchor (a, f(a)), or from (0, secret)"""
+    if thefield is None: thefield = shamirshare2.GF8()
+    a, values = anchor
+    if a == 0: values = _values(values, thefield)
+    return (x, _evaluate(bytes(values), 0, x, a, k, seed, keyid, thefield))
+
+def regenerate_stream(a, infile, outfile, x, k, seed, keyid, thefield=None):
+    """Read the value part of share a (or the secret, if a = 0) from the
+    binary file infile, and write that of share x to outfile, CHUNK slices at
+    a time.  Return the number of bytes written."""
+    if thefield is None: thefield = shamirshare2.GF8()
+    width = thefield.secretbytes if a == 0 else thefield.eltbytes
+    written = 0
+    start = 0
+    while True:
+        values = infile.read(CHUNK * width)
+        if not values: break
+        while (len(values) % width) != 0:
+            more = infile.read(width - len(values) % width)
+            if not more: raise ValueError("Input length is not a multiple of {0:} bytes".format(width))
+            values += more
+        if a == 0: values = _values(values, thefield)
+        theresult = _evaluate(values, start, x, a, k, seed, keyid, thefield)
+        outfile.write(theresult)
+        written += len(theresult)
+        start += len(values) // thefield.eltbytes
+    return written
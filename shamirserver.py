@@ -0,0 +1,495 @@
+###############################################################################
+# SHAMIRSERVER.py
+# A stand-in KMIP server for testing KMIP Split Key clients locally: the
+# Create Split Key, Join Split Key and Get operations, over plain TCP (no
+# TLS), with objects kept in memory.  Built on asyncio and shamirshare2.
+# Requests arriving together are coalesced into microbatches, each handled by
+# one shamirshare2.split_many() or recover_many() call in an executor, so
+# the event loop keeps accepting requests while the arithmetic runs.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""A local KMIP Split Key service and a minimal client for it.
+Batches are closed when they hold max_batch jobs, or max_delay seconds after
+their first job arrived.  Jobs in a batch are grouped by split parameters
+(method, prime, k, n) or, for joins, by (method, prime, x values), and each
+group is a single vectorized call.  With max_batch=1 every request is split
+or joined on its own, as a baseline.
+
+    Usage:  ################## Split and join a key over TCP ##################
+
+        >>> import asyncio
+        >>> from shamirserver import *
+        >>> async def demo():
+        ...     service = SplitKeyService()
+        ...     server = await service.start('127.0.0.1', 0)    # Any free port
+        ...     client = await SplitKeyClient.connect('127.0.0.1', server.sockets[0].getsockname()[1])
+        ...     parts = await client.create_split_key(3, 5, length=256)   # 3-of-5 split of a new AES-256 key
+        ...     key1 = await client.get(await client.join_split_key(parts[:3]))
+        ...     key2 = await client.get(await client.join_split_key(parts[2:]))
+        ...     part = await client.get(parts[0])
+        ...     client.close(); server.close(); await server.wait_closed(); service.close()
+        ...     return len(parts), len(key1.material), key1.material == key2.material, part.identifier
+        >>> asyncio.run(demo())
+        (5, 32, True, 1)
+
+        ###### A bad request in a microbatch fails only itself
+        >>> async def mixed():
+        ...     service = SplitKeyService(max_delay=0.01)
+        ...     server = await service.start('127.0.0.1', 0)
+        ...     clients = [await SplitKeyClient.connect('127.0.0.1', server.sockets[0].getsockname()[1]) for i in range(2)]
+        ...     results = await asyncio.gather(clients[0].create_split_key(2, 3, method=POLYNOMIAL_GF16, length=24),  # 3 bytes
+        ...                                    clients[1].create_split_key(2, 3, method=POLYNOMIAL_GF16), return_exceptions=True)
+        ...     for client in clients: client.close()
+        ...     server.close(); await server.wait_closed(); service.close()
+        ...     return results
+        >>> asyncio.run(mixed())
+        [KMIPFailure('Key length 3 is not a multiple of the 2 byte slices carried by the field'), ['1', '2', '3']]
+
+        ###### Malformed requests are failed, not dropped
+        >>> async def malformed():
+        ...     service = SplitKeyService()
+        ...     server = await service.start('127.0.0.1', 0)
+        ...     client = await SplitKeyClient.connect('127.0.0.1', server.sockets[0].getsockname()[1])
+        ...     try:
+        ...         await client.create_split_key(2, 3, method=POLYNOMIAL_PRIME_FIELD, prime=101, length=8)
+        ...     except KMIPFailure as failure:
+        ...         result = failure
+        ...     message = encode((REQUEST_MESSAGE, STRUCTURE, [_header_item(REQUEST_HEADER, 1), (BATCH_ITEM, INTEGER, 0)]))
+        ...     response = decode(await service.handle(message))[0]
+        ...     client.close(); server.close(); await server.wait_closed(); service.close()
+        ...     return result, [item[2] for item in findall(findall(response, BATCH_ITEM)[0], RESULT_MESSAGE)]
+        >>> asyncio.run(malformed())
+        (KMIPFailure('Prime Field Size 101 is too small to carry a byte of the key in each slice'), ['TTLV item 42000f is not a structure'])
+
+    Command line:
+
+        python shamirserver.py [--host 127.0.0.1] [--port 5696] [--max-batch 64] [--max-delay 0.002]
+        python shamirserver.py --bench [--requests 2000] [--concurrency 64]
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import os
+import sys
+import time
+
+import shamirshare2
+from shamirttlv import *
+
+# Operation enumeration
+GET = 0x0A
+CREATE_SPLIT_KEY = 0x28
+JOIN_SPLIT_KEY = 0x29
+
+# Object Type enumeration
+OBJECT_SYMMETRIC_KEY = 0x02
+OBJECT_SPLIT_KEY = 0x05
+
+# Result Status and Result Reason enumerations
+SUCCESS = 0x00
+OPERATION_FAILED = 0x01
+ITEM_NOT_FOUND = 0x01
+INVALID_MESSAGE = 0x04
+OPERATION_NOT_SUPPORTED = 0x05
+MISSING_DATA = 0x06
+INVALID_FIELD = 0x07
+FEATURE_NOT_SUPPORTED = 0x08
+GENERAL_FAILURE = 0x100
+
+AES = 0x03  # Cryptographic Algorithm enumeration
+PROTOCOL = (2, 0)
+
+
+class KMIPFailure(Exception):
+    """A KMIP operation failed, with the given Result Reason and Message"""
+
+    def __init__(self, reason, message):
+        Exception.__init__(self, message)
+        self.reason = reason
+
+
+class SymmetricKey(object):
+    """A KMIP Symmetric Key managed object (Raw key format)"""
+
+    def __init__(self, material, algorithm=None, length=None):
+        self.material = material
+        self.algorithm = algorithm
+        self.length = length
+
+    def toitem(self):
+        keyblock = [(KEY_FORMAT_TYPE, ENUMERATION, RAW),
+                    (KEY_VALUE, STRUCTURE, [(KEY_MATERIAL, BYTE_STRING, self.material)])]
+        if self.algorithm is not None: keyblock.append((CRYPTOGRAPHIC_ALGORITHM, ENUMERATION, self.algorithm))
+        if self.length is not None: keyblock.append((CRYPTOGRAPHIC_LENGTH, INTEGER, self.length))
+        return (SYMMETRIC_KEY, STRUCTURE, [(KEY_BLOCK, STRUCTURE, keyblock)])
+
+    @classmethod
+    def fromitem(cls, item):
+        keyblock = find(item, KEY_BLOCK)
+        if keyblock is None: raise TTLVError("Symmetric Key without a Key Block")
+        algorithm = find(keyblock, CRYPTOGRAPHIC_ALGORITHM)
+        length = find(keyblock, CRYPTOGRAPHIC_LENGTH)
+        return cls(require(find(keyblock, KEY_VALUE), KEY_MATERIAL, BYTE_STRING),
+                   algorithm[2] if algorithm else None, length[2] if length else None)
+
+
+############################## Microbatching ##################################
+
+def _splitbatch(group, secrets):   # Run in the executor, so must be picklable
+    method, prime, k, n = group
+    return shamirshare2.split_many(secrets, k, n, field_for(method, prime))
+
+def _joinbatch(group, sharelists):
+    method, prime, xs = group
+    return shamirshare2.recover_many(sharelists, field_for(method, prime))
+
+def _runbatch(run, group, payloads):
+    """run(group, payloads), or if the batch fails, run() on each payload on
+    its own, so one bad job fails only itself: its result is then the
+    exception it raised"""
+    try:
+        return run(group, payloads)
+    except Exception:
+        if len(payloads) == 1: raise
+    results = []
+    for payload in payloads:
+        try:
+            results.append(run(group, [payload])[0])
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+class Batcher(object):
+    """Coalesces jobs submitted concurrently into microbatches.  The jobs of a
+    batch with the same group are handled by one call run(group, payloads),
+    which must return one result per payload, made in the executor.  If
+    the call fails, the jobs are run one at a time, and only those which
+    fail then get an exception.
+    batches and jobs count what has been run, so jobs/batches is the mean
+    batch size."""
+
+    def __init__(self, run, max_batch=64, max_delay=0.002, executor=None):
+        self.run = run
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.executor = executor
+        self.batches = 0
+        self.jobs = 0
+        self._pending = []  # [(group, payload, future), ...]
+        self._timer = None
+
+    def submit(self, group, payload):
+        """Queue a job, returning a future for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((group, payload, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups = {}
+        for group, payload, future in pending:
+            groups.setdefault(group, []).append((payload, future))
+        loop = asyncio.get_running_loop()
+        for group, jobs in groups.items():
+            self.batches += 1
+            self.jobs += len(jobs)
+            task = loop.run_in_executor(self.executor, _runbatch, self.run, group, [payload for payload, future in jobs])
+            task.add_done_callback(functools.partial(self._done, jobs))
+
+    @staticmethod
+    def _done(jobs, task):
+        if task.cancelled(): error = asyncio.CancelledError()
+        else: error = task.exception()
+        results = [None]*len(jobs) if error else task.result()
+        for (payload, future), result in zip(jobs, results):
+            if future.done(): continue
+            if error: future.set_exception(error)
+            elif isinstance(result, Exception): future.set_exception(result)
+            else: future.set_result(result)
+
+
+############################### The Service ###################################
+
+class SplitKeyService(object):
+    """In-memory KMIP server for Create Split Key, Join Split Key and Get.
+    Objects are kept in self.objects, Unique Identifier --> object."""
+
+    def __init__(self, max_batch=64, max_delay=0.002, executor=None):
+        self.objects = {}
+        self._ids = itertools.count(1)
+        self._ownexecutor = executor is None
+        self.executor = concurrent.futures.ThreadPoolExecutor(1) if executor is None else executor
+        self.splitter = Batcher(_splitbatch, max_batch, max_delay, self.executor)
+        self.joiner = Batcher(_joinbatch, max_batch, max_delay, self.executor)
+        self._operations = {CREATE_SPLIT_KEY: self.create_split_key, JOIN_SPLIT_KEY: self.join_split_key, GET: self.get}
+
+    def close(self):
+        if self._ownexecutor: self.executor.shutdown()
+
+    def _store(self, theobject):
+        uid = str(next(self._ids))
+        self.objects[uid] = theobject
+        return uid
+
+    def _fetch(self, uid, cls):
+        theobject = self.objects.get(uid)
+        if not isinstance(theobject, cls): raise KMIPFailure(ITEM_NOT_FOUND, "No {0:} with Unique Identifier {1:}".format(cls.__name__, uid))
+        return theobject
+
+    @staticmethod
+    def _attribute(payload, tag):  # KMIP 2.0 Attributes, or directly in the payload
+        item = find(payload, tag)
+        attributes = find(payload, ATTRIBUTES)
+        if (item is None) and (attributes is not None): item = find(attributes, tag)
+        return None if item is None else item[2]
+
+    async def create_split_key(self, payload):
+        n = require(payload, SPLIT_KEY_PARTS, INTEGER)
+        k = require(payload, SPLIT_KEY_THRESHOLD, INTEGER)
+        method = require(payload, SPLIT_KEY_METHOD, ENUMERATION)
+        prime = self._attribute(payload, PRIME_FIELD_SIZE)
+        thefield = field_for(method, prime)   # Check the method is implemented before splitting
+        if thefield.secretbytes == 0:
+            raise KMIPFailure(INVALID_FIELD, "Prime Field Size {0:} is too small to carry a byte of the key in each slice".format(prime))
+        uid = find(payload, UNIQUE_IDENTIFIER)
+        if uid is not None:        # Split an existing key
+            thekey = self._fetch(uid[2], SymmetricKey)
+            secret, algorithm, length = bytes(thekey.material), thekey.algorithm, thekey.length
+        else:                      # Split a new key
+            algorithm = self._attribute(payload, CRYPTOGRAPHIC_ALGORITHM) or AES
+            length = self._attribute(payload, CRYPTOGRAPHIC_LENGTH) or 256
+            if (length <= 0) or (length % 8 != 0):
+                raise KMIPFailure(INVALID_FIELD, "Cryptographic Length {0:} is not a positive whole number of bytes".format(length))
+            secret = os.urandom(length // 8)
+        if len(secret) % thefield.secretbytes != 0:   # Checked here, so it cannot fail the rest of a microbatch
+            raise KMIPFailure(INVALID_FIELD, "Key length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), thefield.secretbytes))
+        shares = await self.splitter.submit((method, prime, k, n), secret)
+        return [(UNIQUE_IDENTIFIER, TEXT_STRING, self._store(SplitKey(n, x, k, method, y, prime, algorithm, length))) for x, y in shares]
+
+    async def join_split_key(self, payload):
+        parts = [self._fetch(item[2], SplitKey) for item in findall(payload, UNIQUE_IDENTIFIER)]
+        if not parts: raise KMIPFailure(MISSING_DATA, "Join Split Key needs the Unique Identifiers of the parts")
+        first = parts[0]
+        for part in parts[1:]:
+            if (part.method, part.prime, part.threshold, part.parts) != (first.method, first.prime, first.threshold, first.parts):
+                raise KMIPFailure(INVALID_FIELD, "Split Key parts {0:} and {1:} are not from the same split".format(first.identifier, part.identifier))
+        parts = sorted(parts, key=lambda part: part.identifier)[:first.threshold]  # Canonical x values batch better
+        if len(parts) < first.threshold:
+            raise KMIPFailure(MISSING_DATA, "{0:} Split Key parts given, but {1:} are needed".format(len(parts), first.threshold))
+        thefield = field_for(first.method, first.prime)
+        if any((len(part.material) != len(first.material)) or (len(part.material) % thefield.eltbytes != 0) for part in parts):
+            raise KMIPFailure(INVALID_FIELD, "Split Key parts must all have the same length, a multiple of {0:} bytes".format(thefield.eltbytes))
+        group = (first.method, first.prime, tuple(part.identifier for part in parts))
+        secret = await self.joiner.submit(group, [(part.identifier, part.material) for part in parts])
+        return [(UNIQUE_IDENTIFIER, TEXT_STRING, self._store(SymmetricKey(secret, first.algorithm, first.length)))]
+
+    async def get(self, payload):
+        uid = require(payload, UNIQUE_IDENTIFIER, TEXT_STRING)
+        theobject = self.objects.get(uid)
+        if theobject is None: raise KMIPFailure(ITEM_NOT_FOUND, "No object with Unique Identifier {0:}".format(uid))
+        objecttype = OBJECT_SPLIT_KEY if isinstance(theobject, SplitKey) else OBJECT_SYMMETRIC_KEY
+        return [(OBJECT_TYPE, ENUMERATION, objecttype), (UNIQUE_IDENTIFIER, TEXT_STRING, uid), theobject.toitem()]
+
+    async def _batchitem(self, item):
+        operation = require(item, OPERATION, ENUMERATION)
+        response = [(OPERATION, ENUMERATION, operation)]
+        batchid = find(item, UNIQUE_BATCH_ITEM_ID)
+        if batchid is not None: response.append(batchid)
+        try:
+            if operation not in self._operations: raise KMIPFailure(OPERATION_NOT_SUPPORTED, "Operation {0:#x} is not supported".format(operation))
+            payload = find(item, REQUEST_PAYLOAD) or (REQUEST_PAYLOAD, STRUCTURE, [])
+            responsepayload = await self._operations[operation](payload)
+        except KMIPFailure as failure:
+            return response + _failure(failure.reason, str(failure))
+        except NotImplementedError as error:
+            return response + _failure(FEATURE_NOT_SUPPORTED, str(error))
+        except ValueError as error:   # Including TTLVError
+            return response + _failure(INVALID_FIELD, str(error))
+        except Exception as error:    # Fail the item, not the connection
+            return response + _failure(GENERAL_FAILURE, "{0:}: {1:}".format(type(error).__name__, error))
+        return response + [(RESULT_STATUS, ENUMERATION, SUCCESS), (RESPONSE_PAYLOAD, STRUCTURE, responsepayload)]
+
+    async def handle(self, request):
+        """Handle one TTLV encoded Request Message, returning the encoded
+        Response Message.  The batch items of a message are handled
+        concurrently, so they can share microbatches."""
+        try:
+            message = decode(request)[0]
+            if message[0] != REQUEST_MESSAGE: raise TTLVError("Not a Request Message")
+            batchitems = findall(message, BATCH_ITEM)
+            results = await asyncio.gather(*[self._batchitem(item) for item in batchitems])
+        except (TTLVError, KMIPFailure) as error:
+            results = [_failure(INVALID_MESSAGE, str(error))]
+        return encode((RESPONSE_MESSAGE, STRUCTURE, [_header_item(RESPONSE_HEADER, len(results), [(TIME_STAMP, DATE_TIME, int(time.time()))])] +
+                       [(BATCH_ITEM, STRUCTURE, result) for result in results]))
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(8)
+                body = await reader.readexactly(bodylength(header))
+                writer.write(await self.handle(header + body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:   # Event loop shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=5696):
+        """Start serving, returning the asyncio Server"""
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+
+def _failure(reason, message):
+    return [(RESULT_STATUS, ENUMERATION, OPERATION_FAILED), (RESULT_REASON, ENUMERATION, reason), (RESULT_MESSAGE, TEXT_STRING, message)]
+
+def _header_item(tag, batchcount, extra=()):
+    return (tag, STRUCTURE, [(PROTOCOL_VERSION, STRUCTURE, [(PROTOCOL_VERSION_MAJOR, INTEGER, PROTOCOL[0]),
+                                                           (PROTOCOL_VERSION_MINOR, INTEGER, PROTOCOL[1])])] +
+                           list(extra) + [(BATCH_COUNT, INTEGER, batchcount)])
+
+
+################################ The Client ###################################
+
+class SplitKeyClient(object):
+    """A minimal KMIP client for the Split Key operations, one request at a time"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=5696):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    def close(self):
+        self.writer.close()
+
+    async def call(self, *operations):
+        """Send one Request Message with a batch item per (operation, payload),
+        returning the list of response payloads.  Raises KMIPFailure for the
+        first batch item which failed."""
+        request = encode((REQUEST_MESSAGE, STRUCTURE, [_header_item(REQUEST_HEADER, len(operations))] +
+                          [(BATCH_ITEM, STRUCTURE, [(OPERATION, ENUMERATION, operation), (REQUEST_PAYLOAD, STRUCTURE, payload)])
+                           for operation, payload in operations]))
+        async with self._lock:
+            self.writer.write(request)
+            await self.writer.drain()
+            header = await self.reader.readexactly(8)
+            body = await self.reader.readexactly(bodylength(header))
+        payloads = []
+        for item in findall(decode(header + body)[0], BATCH_ITEM):
+            if require(item, RESULT_STATUS, ENUMERATION) != SUCCESS:
+                raise KMIPFailure(require(item, RESULT_REASON, ENUMERATION), require(item, RESULT_MESSAGE, TEXT_STRING))
+            payloads.append(find(item, RESPONSE_PAYLOAD))
+        return payloads
+
+    async def create_split_key(self, k, n, method=POLYNOMIAL_GF8, prime=None, length=256, algorithm=AES, uid=None):
+        """Split a new key (or the existing key uid) k-of-n, returning the Unique Identifiers of the parts"""
+        payload = [(OBJECT_TYPE, ENUMERATION, OBJECT_SYMMETRIC_KEY)]
+        if uid is not None: payload.append((UNIQUE_IDENTIFIER, TEXT_STRING, uid))
+        payload += [(SPLIT_KEY_PARTS, INTEGER, n), (SPLIT_KEY_THRESHOLD, INTEGER, k), (SPLIT_KEY_METHOD, ENUMERATION, method)]
+        if prime is not None: payload.append((PRIME_FIELD_SIZE, BIG_INTEGER, prime))
+        payload.append((ATTRIBUTES, STRUCTURE, [(CRYPTOGRAPHIC_ALGORITHM, ENUMERATION, algorithm), (CRYPTOGRAPHIC_LENGTH, INTEGER, length)]))
+        payload = (await self.call((CREATE_SPLIT_KEY, payload)))[0]
+        return [item[2] for item in findall(payload, UNIQUE_IDENTIFIER)]
+
+    async def join_split_key(self, uids):
+        """Join the given parts, returning the Unique Identifier of the key"""
+        payload = [(OBJECT_TYPE, ENUMERATION, OBJECT_SYMMETRIC_KEY)] + [(UNIQUE_IDENTIFIER, TEXT_STRING, uid) for uid in uids]
+        payload = (await self.call((JOIN_SPLIT_KEY, payload)))[0]
+        return require(payload, UNIQUE_IDENTIFIER, TEXT_STRING)
+
+    async def get(self, uid):
+        """Fetch an object, as a SplitKey or SymmetricKey"""
+        payload = (await self.call((GET, [(UNIQUE_IDENTIFIER, TEXT_STRING, uid)])))[0]
+        if require(payload, OBJECT_TYPE, ENUMERATION) == OBJECT_SPLIT_KEY:
+            return SplitKey.fromitem(find(payload, SPLIT_KEY))
+        return SymmetricKey.fromitem(find(payload, SYMMETRIC_KEY))
+
+
+############################### Benchmark #####################################
+
+async def _bench(requests, concurrency, k, n, max_batch, max_delay):
+    service = SplitKeyService(max_batch, max_delay)
+    server = await service.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    clients = [await SplitKeyClient.connect('127.0.0.1', port) for i in range(concurrency)]
+    counter = itertools.count()
+
+    async def worker(client):
+        while next(counter) < requests:
+            parts = await client.create_split_key(k, n)
+            await client.join_split_key(parts[:k])
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(client) for client in clients])
+    elapsed = time.perf_counter() - start
+    for client in clients: client.close()
+    server.close()
+    await server.wait_closed()
+    service.close()
+    batches = service.splitter.batches + service.joiner.batches
+    jobs = service.splitter.jobs + service.joiner.jobs
+    return 2*requests / elapsed, float(jobs) / batches
+
+def benchmark(requests=2000, concurrency=64, k=3, n=5, max_batch=64, max_delay=0.002):
+    """Run requests Create Split Key + Join Split Key pairs from concurrency
+    clients, with and without batching, and return a list of
+    (label, operations per second, mean batch size)"""
+    results = []
+    for label, batch, delay in (('unbatched', 1, 0), ('batched', max_batch, max_delay)):
+        opspersec, meanbatch = asyncio.run(_bench(requests, concurrency, k, n, batch, delay))
+        results.append((label, opspersec, meanbatch))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in KMIP Split Key server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5696)
+    parser.add_argument('--max-batch', type=int, default=64, help="Jobs per microbatch (default 64, 1 disables batching)")
+    parser.add_argument('--max-delay', type=float, default=0.002, help="Seconds a batch waits to fill (default 0.002)")
+    parser.add_argument('--bench', action='store_true', help="Compare throughput with and without batching")
+    parser.add_argument('--requests', type=int, default=2000, help="Create + Join pairs for --bench (default 2000)")
+    parser.add_argument('--concurrency', type=int, default=64, help="Clients for --bench (default 64)")
+    parser.add_argument('-k', type=int, default=3)
+    parser.add_argument('-n', type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.bench:
+        results = benchmark(args.requests, args.concurrency, args.k, args.n, args.max_batch, args.max_delay)
+        for label, opspersec, meanbatch in results:
+            print("{0:<10} {1:>10.1f} ops/s   mean batch {2:.1f}".format(label, opspersec, meanbatch))
+        print("batching speedup: {0:.2f}x".format(results[1][1] / results[0][1]))
+        return 0
+
+    async def serve():
+        service = SplitKeyService(args.max_batch, args.max_delay)
+        server = await service.start(args.host, args.port)
+        print("Serving KMIP Split Key requests on {0:}:{1:}".format(args.host, args.port))
+        async with server: await server.serve_forever()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
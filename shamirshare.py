@@ -72,6 +72,9 @@ Version = 'shamirshare.py, version ' + __version__ + ', 11 Sept, 2019, by Robert
 import random
 import sys     # Check Python2 or Python3
 
+import shamirshare2   # The classes here are facades over its table arithmetic and array polynomials
+from shamirshare2 import _GF8exp, _GF8log, _GF8mulint, _GF16mulint
+
 
 def isStrType(x):
     if sys.version_info < (3,): return isinstance(x, (basestring,))
@@ -102,6 +105,7 @@ class GF8(object):
     """
 
     _instance = None
+    _fast = shamirshare2.GF8()   # The same field in shamirshare2, for polynomial arithmetic
 
     def __new__(cls):
         if not isinstance(cls._instance, cls):
@@ -114,6 +118,12 @@ class GF8(object):
     def __call__(self, thevalue):
         return(GF8elt(thevalue))
 
+    def _toint(self, elt):  # The value as shamirshare2 takes it, or None if out of range
+        return None if (elt.value >> 8) else elt.value
+
+    def _fromint(self, value):
+        return GF8elt._fromint(value)
+
     def __format__(self, fmtspec):  # Over-ride format conversion
         return "Finite field GF(2^8) mod (x^8 + x^4 + x^3 + x + 1)"
 
@@ -147,16 +157,22 @@ class GF8elt(object):
         if isinstance(value, (int,)): self.value = value
         elif isStrType(value): self.value = int(value, 16)  # For the moment, assume hex
 
+    @staticmethod
+    def _fromint(value):  # Skip the coercions of __init__ for a value known to be an integer
+        elt = GF8elt.__new__(GF8elt)
+        elt.value = value
+        return elt
+
     def __eq__(self, other):  # Implement for both Python2 & 3 with overloading
-        if isIntType(other): otherval = other
+        if isinstance(other, (GF8elt,)): otherval = other.value
+        elif isIntType(other): otherval = other
         elif isStrType(other): otherval = int(other, 16)
-        elif isinstance(other, (GF8elt,)): otherval = other.value
         return self.value == otherval
 
     def __ne__(self, other):  # Implement for both Python2 & 3 with overloading
-        if isIntType(other): otherval = other
+        if isinstance(other, (GF8elt,)): otherval = other.value
+        elif isIntType(other): otherval = other
         elif isStrType(other): otherval = int(other, 16)
-        elif isinstance(other, (GF8elt,)): otherval = other.value
         return self.value != otherval
 
     ######################## Format Operators #################################
@@ -198,13 +214,15 @@ class GF8elt(object):
 
     def add(self, summand):
         """add elements of GF8elt (overloaded to allow adding integers and lists of integers)"""
-        if isinstance(summand, (int,)) or isStrType(summand):  # Coerce if adding integer or string and GF8elt
+        if isinstance(summand, (GF8elt,)):
+            pass
+        elif isinstance(summand, (int,)) or isStrType(summand):  # Coerce if adding integer or string and GF8elt
             summand = GF8elt(summand)
         elif isinstance(summand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return summand.__add__(self)
-        elif not isinstance(summand, (GF8elt,)):
+        else:
             raise NotImplementedError("Can't add GF8elt object to {0:} object".format(type(summand)))
-        return GF8elt(self.value ^ GF8elt(summand.value).value)
+        return GF8elt._fromint(self.value ^ summand.value)
 
     def __add__(self, summand):   # Overload the "+" operator
         return self.add(summand)
@@ -229,9 +247,11 @@ class GF8elt(object):
     ######################## Multiplication Operators #########################
 
     def mul(self, multand):  # Elementary multiplication in finite fields
-        """multiply elements of GF8 (overloaded to allow integers and lists of integers)"""
+        """multiply elements of GF8, by the log/antilog tables of shamirshare2"""
         amult = self.value     # Pull it out of the GF8elt structure
         bmult = multand.value  # Pull it out of the GF8elt structure
+        if not ((amult | bmult) >> 8): return GF8elt._fromint(_GF8mulint(amult, bmult))
+        # Values out of range (which __init__ accepts) keep the original bitwise product
         thenum = 0
         # Multiply as binary polynomials
         for i in range(8): thenum ^= ((bmult << i) if ((amult >> i) & 0x01) == 1 else 0)
@@ -239,10 +259,10 @@ class GF8elt(object):
         return GF8elt(GF8elt.__reduceGF8(thenum))
 
     def __mul__(self, multip):  # Overload the "*" operator
-        if isinstance(multip, (int,)) or isStrType(multip):  # Coerce if multiplying integer or string and GF8elt
-            return self.mul(GF8elt(multip))
-        elif isinstance(multip, (GF8elt,)):
+        if isinstance(multip, (GF8elt,)):
             return self.mul(multip)
+        elif isinstance(multip, (int,)) or isStrType(multip):  # Coerce if multiplying integer or string and GF8elt
+            return self.mul(GF8elt(multip))
         elif isinstance(multip, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return multip.__mul__(self)
         else: raise NotImplementedError("Can't multiply GF8elt object with {0:} object".format(type(multip)))
@@ -263,47 +283,11 @@ class GF8elt(object):
 
     ######################## Division Operators ###############################
 
-    # Table based inverse (well, actually pseudo-inverse, as 00-->00)
-    __GF8inv = {
-         "00":"00","01":"01","02":"8d","03":"f6","04":"cb","05":"52","06":"7b","07":"d1",
-         "08":"e8","09":"4f","0a":"29","0b":"c0","0c":"b0","0d":"e1","0e":"e5","0f":"c7",
-         "10":"74","11":"b4","12":"aa","13":"4b","14":"99","15":"2b","16":"60","17":"5f",
-         "18":"58","19":"3f","1a":"fd","1b":"cc","1c":"ff","1d":"40","1e":"ee","1f":"b2",
-         "20":"3a","21":"6e","22":"5a","23":"f1","24":"55","25":"4d","26":"a8","27":"c9",
-         "28":"c1","29":"0a","2a":"98","2b":"15","2c":"30","2d":"44","2e":"a2","2f":"c2",
-         "30":"2c","31":"45","32":"92","33":"6c","34":"f3","35":"39","36":"66","37":"42",
-         "38":"f2","39":"35","3a":"20","3b":"6f","3c":"77","3d":"bb","3e":"59","3f":"19",
-         "40":"1d","41":"fe","42":"37","43":"67","44":"2d","45":"31","46":"f5","47":"69",
-         "48":"a7","49":"64","4a":"ab","4b":"13","4c":"54","4d":"25","4e":"e9","4f":"09",
-         "50":"ed","51":"5c","52":"05","53":"ca","54":"4c","55":"24","56":"87","57":"bf",
-         "58":"18","59":"3e","5a":"22","5b":"f0","5c":"51","5d":"ec","5e":"61","5f":"17",
-         "60":"16","61":"5e","62":"af","63":"d3","64":"49","65":"a6","66":"36","67":"43",
-         "68":"f4","69":"47","6a":"91","6b":"df","6c":"33","6d":"93","6e":"21","6f":"3b",
-         "70":"79","71":"b7","72":"97","73":"85","74":"10","75":"b5","76":"ba","77":"3c",
-         "78":"b6","79":"70","7a":"d0","7b":"06","7c":"a1","7d":"fa","7e":"81","7f":"82",
-         "80":"83","81":"7e","82":"7f","83":"80","84":"96","85":"73","86":"be","87":"56",
-         "88":"9b","89":"9e","8a":"95","8b":"d9","8c":"f7","8d":"02","8e":"b9","8f":"a4",
-         "90":"de","91":"6a","92":"32","93":"6d","94":"d8","95":"8a","96":"84","97":"72",
-         "98":"2a","99":"14","9a":"9f","9b":"88","9c":"f9","9d":"dc","9e":"89","9f":"9a",
-         "a0":"fb","a1":"7c","a2":"2e","a3":"c3","a4":"8f","a5":"b8","a6":"65","a7":"48",
-         "a8":"26","a9":"c8","aa":"12","ab":"4a","ac":"ce","ad":"e7","ae":"d2","af":"62",
-         "b0":"0c","b1":"e0","b2":"1f","b3":"ef","b4":"11","b5":"75","b6":"78","b7":"71",
-         "b8":"a5","b9":"8e","ba":"76","bb":"3d","bc":"bd","bd":"bc","be":"86","bf":"57",
-         "c0":"0b","c1":"28","c2":"2f","c3":"a3","c4":"da","c5":"d4","c6":"e4","c7":"0f",
-         "c8":"a9","c9":"27","ca":"53","cb":"04","cc":"1b","cd":"fc","ce":"ac","cf":"e6",
-         "d0":"7a","d1":"07","d2":"ae","d3":"63","d4":"c5","d5":"db","d6":"e2","d7":"ea",
-         "d8":"94","d9":"8b","da":"c4","db":"d5","dc":"9d","dd":"f8","de":"90","df":"6b",
-         "e0":"b1","e1":"0d","e2":"d6","e3":"eb","e4":"c6","e5":"0e","e6":"cf","e7":"ad",
-         "e8":"08","e9":"4e","ea":"d7","eb":"e3","ec":"5d","ed":"50","ee":"1e","ef":"b3",
-         "f0":"5b","f1":"23","f2":"38","f3":"34","f4":"68","f5":"46","f6":"03","f7":"8c",
-         "f8":"dd","f9":"9c","fa":"7d","fb":"a0","fc":"cd","fd":"1a","fe":"41","ff":"1c"
-        }
-
     def inv(self):
         """inverse of element in GF8"""
         if (self.value == 0): raise ZeroDivisionError("Attempting to invert zero element of GF8")
-        # Tableized (lazy solution for a small field, xgcd is better solution)
-        return GF8elt(GF8elt.__GF8inv[str(self)])
+        if (self.value >> 8): raise ValueError("Cannot invert {0:}, which is not an element of GF8".format(self.value))
+        return GF8elt._fromint(_GF8exp[255 - _GF8log[self.value]])
 
     def div(self, divisor):
         """divide elements of GF8"""
@@ -373,6 +357,7 @@ class GF16(object):
     _instance = None
     basefield = GF8()    # Instantiate the base field GF8
     m = basefield('3A')  # Coeff in defining poly of GF16
+    _fast = shamirshare2.GF16()   # The same field in shamirshare2, for polynomial arithmetic
 
     def __new__(cls, *args, **kwargs):
         if not isinstance(cls._instance, cls):
@@ -390,6 +375,13 @@ class GF16(object):
     def __call__(self, thevalue):
         return(GF16elt(thevalue))
 
+    def _toint(self, elt):  # The value c0 + (c1 << 8) as shamirshare2 takes it, or None if out of range
+        c0, c1 = elt.coeffs[0].value, elt.coeffs[1].value
+        return None if ((c0 | c1) >> 8) else c0 | (c1 << 8)
+
+    def _fromint(self, value):
+        return GF16elt._fromint(value)
+
     def __format__(self, fmtspec):  # Over-ride format conversion
         return "Finite field GF(2^16) = GF8[z]/<z^2 + z + 3A>"
 
@@ -433,6 +425,16 @@ class GF16elt(object):
             self.coeffs = [value, self.field.basefield(0)]
         else: raise ValueError("A GF16elt object cannot be constructed from input \'{0:}\' of type {1:}".format(value,type(value)))
 
+    @staticmethod
+    def _fromcoeffs(c0, c1):  # c0 + c1*z from integer coefficients, skipping the coercions of __init__
+        elt = GF16elt.__new__(GF16elt)
+        elt.coeffs = [GF8elt._fromint(c0), GF8elt._fromint(c1)]
+        return elt
+
+    @staticmethod
+    def _fromint(value):  # From c0 + (c1 << 8), as shamirshare2 represents elements of GF16
+        return GF16elt._fromcoeffs(value & 0xff, value >> 8)
+
     def __eq__(self, other):  # Implement for both Python2 & 3 with overloading
         if isIntType(other) or isStrType(other) or isinstance(other, (GF8elt,)) or isListType(other):
             otherval = self.field(other)
@@ -490,11 +492,13 @@ class GF16elt(object):
 
     def add(self, summand):
         """add elements of GF16elt (overloaded to allow adding integers and lists of integers)"""
-        if isinstance(summand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
+        if isinstance(summand, (GF16elt,)):
+            pass
+        elif isinstance(summand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return summand.add(self)
-        elif not isinstance(summand, (GF16elt,)):
+        else:
             summand = GF16elt(summand)  # __init_ will raise except if needed
-        return GF16elt([self.coeffs[0] + summand.coeffs[0],  self.coeffs[1] + summand.coeffs[1]])
+        return GF16elt._fromcoeffs(self.coeffs[0].value ^ summand.coeffs[0].value, self.coeffs[1].value ^ summand.coeffs[1].value)
 
     def __add__(self, summand):   # Overload the "+" operator
         return self.add(summand)
@@ -520,11 +524,15 @@ class GF16elt(object):
 
     def mul(self, multand):  # Elementary multiplication in finite fields
         """multiply elements of GF16 (overloaded to allow integers and lists of integers)"""
-        if isinstance(multand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
+        if isinstance(multand, (GF16elt,)):
+            pass
+        elif isinstance(multand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return multand.mul(self)
-        elif not isinstance(multand, (GF16elt,)):
+        else:
             multand = GF16elt(multand)  # __init_ will raise except if needed
-        # Multiply coeffs as elements of GF8
+        a0, a1, b0, b1 = self.coeffs[0].value, self.coeffs[1].value, multand.coeffs[0].value, multand.coeffs[1].value
+        if not ((a0 | a1 | b0 | b1) >> 8): return GF16elt._fromint(_GF16mulint(a0 | (a1 << 8), b0 | (b1 << 8)))
+        # Otherwise multiply coeffs as elements of GF8
         thelist = [self.coeffs[0] * multand.coeffs[0], self.coeffs[0] * multand.coeffs[1] + self.coeffs[1] * multand.coeffs[0], self.coeffs[1] * multand.coeffs[1]]
         # And then reduce mod the driving polynomial of GF16
         return GF16elt(GF16elt.__reduceGF16(thelist))
@@ -549,6 +557,11 @@ class GF16elt(object):
         """inverse of element in GF16"""
         if (self.coeffs[0].value == 0) and (self.coeffs[1].value == 0): raise ZeroDivisionError("Attempting to invert zero element of GF16")
         # (uy + v)^(-1) = ud^(-1)y + (u + v)d(-1), where d = (u + v)v + mu^2
+        v, u = self.coeffs[0].value, self.coeffs[1].value
+        if not ((u | v) >> 8):   # With the GF8 tables
+            d = _GF8mulint(u ^ v, v) ^ _GF8mulint(0x3A, _GF8mulint(u, u))
+            dinv = _GF8exp[255 - _GF8log[d]]
+            return GF16elt._fromcoeffs(_GF8mulint(u ^ v, dinv), _GF8mulint(u, dinv))
         d = (self.coeffs[1] + self.coeffs[0])*self.coeffs[0] + GF16.m*self.coeffs[1]*self.coeffs[1]
         dinv = d.inv()   # Invert in GF8
         return GF16elt([(self.coeffs[0]+self.coeffs[1])*dinv, self.coeffs[1]*dinv])
@@ -621,6 +634,8 @@ class GFp(object):
 
     def __init__(self, prime):
         self.prime = prime
+        # The same field in shamirshare2, for polynomial arithmetic
+        self._fast = shamirshare2.GFp(prime) if isIntType(prime) else None
 
     def __contains__(self, theelt):
         return (self == theelt.field)
@@ -628,6 +643,12 @@ class GFp(object):
     def __call__(self, theint):
         return(GFpelt(self, theint))
 
+    def _toint(self, elt):  # The value as shamirshare2 takes it, or None if it is not an integer
+        return elt.value if isIntType(elt.value) else None
+
+    def _fromint(self, value):
+        return GFpelt._fromint(self, value)
+
     def __format__(self, fmtspec):  # Over-ride format conversion
         return "Field of integers mod prime {0:}".format(self.prime)
 
@@ -659,22 +680,29 @@ class GFpelt(object):
         elif isIntType(value):
             self.value = self.__normalize(value)
 
+    @staticmethod
+    def _fromint(field, value):  # Skip the coercions of __init__ for a value already reduced mod prime
+        elt = GFpelt.__new__(GFpelt)
+        elt.field = field
+        elt.value = value
+        return elt
+
     def __normalize(self, value):
         """Given an integer, return the smallest positive integer which is equivalent mod prime"""
-        return(((value % self.field.prime) + self.field.prime) % self.field.prime)
+        return value % self.field.prime
 
     def __eq__(self, other):  # Implement for Python 2 & 3 with overloading
-        if isIntType(other):
-            otherval = self.__normalize(other)
-        elif isinstance(other, (GFpelt,)):
+        if isinstance(other, (GFpelt,)):
             otherval = other.value
+        elif isIntType(other):
+            otherval = self.__normalize(other)
         return self.value == otherval
 
     def __ne__(self, other):  # Implement for Python 2 & 3 with overloading
-        if isIntType(other):
-            otherval = self.__normalize(other)
-        elif isinstance(other, (GFpelt,)):
+        if isinstance(other, (GFpelt,)):
             otherval = other.value
+        elif isIntType(other):
+            otherval = self.__normalize(other)
         return self.value != otherval
 
     ######################## Format Operators #################################
@@ -705,13 +733,15 @@ class GFpelt(object):
 
     def add(self, summand):
         """add elements of GFpelt (overloaded to allow adding integers)"""
-        if isIntType(summand):
+        if isinstance(summand, (GFpelt,)):
+            pass
+        elif isIntType(summand):
             summand = self.field(summand)
         elif isinstance(summand, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return summand.add(self)
-        elif not isinstance(summand, (GFpelt,)):
+        else:
             raise NotImplementedError("Can't add GFpelt object to {0:} object".format(type(summand)))
-        return GFpelt(self.field, (self.value + summand.value) % self.field.prime)
+        return GFpelt._fromint(self.field, (self.value + summand.value) % self.field.prime)
 
     def __add__(self, summand):   # Overload the "+" operator
         return self.add(summand)
@@ -724,7 +754,7 @@ class GFpelt(object):
         return self
 
     def __neg__(self):  # Overload the "-" unary operator
-        return GFpelt(self.field, (self.field.prime-self.value) % self.field.prime)
+        return GFpelt._fromint(self.field, (self.field.prime-self.value) % self.field.prime)
 
     def __sub__(self, summand):  # Overload the "-" binary operator
         return self.add(-summand)
@@ -737,15 +767,15 @@ class GFpelt(object):
 
     def mul(self, multip):  # Elementary multiplication in finite fields
         """multiply elements of GFpelt (overloaded to allow integers)"""
-        if isIntType(multip):  # Coerce if multiplying integer
-            multip = self.__normalize(multip)
-        elif isinstance(multip, (GFpelt,)):
+        if isinstance(multip, (GFpelt,)):
             multip = multip.value
+        elif isIntType(multip):  # Coerce if multiplying integer
+            multip = self.__normalize(multip)
         elif isinstance(multip, (PolyFieldUnivElt,)):        # Bit of a hack for operator overload precedence
             return multip.mul(self)
-        elif not isinstance(multip, (GFpelt,)):
+        else:
             raise NotImplementedError("Can't multiply GFpelt object with {0:} object".format(type(multip)))
-        return GFpelt(self.field, ((self.value * multip) % self.field.prime))
+        return GFpelt._fromint(self.field, (self.value * multip) % self.field.prime)
 
     def __mul__(self, multip):  # Overload the "*" operator
         return self.mul(multip)
@@ -762,7 +792,7 @@ class GFpelt(object):
     def inv(self):
         """inverse of element in GFp"""
         if (self.value == 0): raise ZeroDivisionError("Attempting to invert zero element of GFp")
-        return GFpelt(self.field, GFpelt.__xgcd(self.value,self.field.prime)[1])
+        return GFpelt._fromint(self.field, GFpelt.__xgcd(self.value,self.field.prime)[1] % self.field.prime)
 
     @staticmethod
     def __xgcd(a, b):
@@ -869,15 +899,34 @@ class PolyFieldUniv(object):
         else:
             return PolyFieldUnivElt(self, [self.coeffring(elts)])  # Coerce coeff as constant poly
 
+    def _values(self, elts):
+        """The integer values of elements of the coefficient field, as
+        shamirshare2 takes them, or None if it has no such field (or a value
+        is out of range)"""
+        if not (isinstance(self.coeffring, (GF8, GF16, GFp)) and (self.coeffring._fast is not None)): return None
+        values = [self.coeffring._toint(elt) for elt in elts]
+        return None if (None in values) else values
+
+    def _frompoly(self, thepoly):
+        """The element of this ring with the coefficients of the shamirshare2.Poly thepoly"""
+        theresult = PolyFieldUnivElt.__new__(PolyFieldUnivElt)
+        theresult.polyring = self
+        theresult.coeffs = [self.coeffring._fromint(thecoeff) for thecoeff in thepoly.coeffs[:thepoly.degree()+1]]
+        return theresult
+
     def fit(self, thepoints):  # Lagrange Interpolation
         """Find the unique degree (n-1) polynomial fitting the n presented values,
         using Lagrange Interpolation.
         Usage: fit(((3,'05'),(2,'f4'),...)) returns a polynomial p such that p(3) = '05', ...
         Given a list ((x1,y1),(x2,y2),...,(xn,yn)), return the polynomials
-        Sum(j, Prod(i!=j, yj*(x-xi)/(xj-xi)))"""
-        thepoly = PolyFieldUnivElt(self, [])
+        Sum(j, Prod(i!=j, yj*(x-xi)/(xj-xi))), in O(n^2) with
+        shamirshare2.Poly.interpolate() over GF8, GF16 and GFp"""
         xvals = [self.coeffring(x) for x, y in thepoints]  # Should be a better way to do this
         yvals = [self.coeffring(y) for x, y in thepoints]
+        values = self._values(xvals + yvals)
+        if values is not None:
+            return self._frompoly(shamirshare2.Poly.interpolate(self.coeffring._fast, list(zip(values[:len(xvals)], values[len(xvals):]))))
+        thepoly = PolyFieldUnivElt(self, [])
         ptslen = sum(1 for k in xvals)
         for j in range(ptslen):  # Compute len of xvals
             theterm = PolyFieldUnivElt(self, [1])
@@ -965,6 +1014,11 @@ class PolyFieldUnivElt(object):
         """over-ride string conversion used by print"""
         return '{0:l}'.format(self)
 
+    def _poly(self):
+        """This polynomial as a shamirshare2.Poly, or None if it has no such field"""
+        values = self.polyring._values(self.coeffs)
+        return None if (values is None) else shamirshare2.Poly(self.polyring.coeffring._fast, values)
+
     ######################## Addition Operators ###############################
 
     @staticmethod
@@ -983,6 +1037,9 @@ class PolyFieldUnivElt(object):
             summand = PolyFieldUnivElt(self.polyring, summand)
         else:
             raise NotImplementedError("Can't add PolyFieldUnivElt object to {0:} object".format(type(summand)))
+        thepoly, otherpoly = self._poly(), summand._poly()
+        if (thepoly is not None) and (otherpoly is not None):
+            return self.polyring._frompoly(thepoly.add(otherpoly))
         thecoeffs = PolyFieldUnivElt.__addlists__(self.coeffs, summand.coeffs)
         thecoeffs = PolyFieldUnivElt.__trimlist__(thecoeffs)
         return PolyFieldUnivElt(self.polyring, thecoeffs)
@@ -1023,6 +1080,9 @@ class PolyFieldUnivElt(object):
             multand = PolyFieldUnivElt(self.polyring, multand)
         else:
             raise NotImplementedError("Can't multiply PolyFieldUnivElt object by {0:} object".format(type(multand)))
+        thepoly, otherpoly = self._poly(), multand._poly()
+        if (thepoly is not None) and (otherpoly is not None):
+            return self.polyring._frompoly(thepoly.mul(otherpoly))
         polydeg = len(self.coeffs)+len(multand.coeffs)-2
         thelist = [self.polyring.coeffring(0) for i in range(polydeg+1)]
         for d in range(polydeg+1):
@@ -1053,7 +1113,8 @@ class PolyFieldUnivElt(object):
         elif not (divisor in self.polyring.coeffring):
             raise NotImplementedError("Can't divide PolyFieldUnivElt object by {0:} object".format(type(divisor)))
         if (divisor == 0): raise ZeroDivisionError("Attempting to divide polynomial by zero element of coefficient ring")
-        for i in range(len(self.coeffs)): self.coeffs[i] /= divisor
+        theinv = divisor.inv()   # Invert once, and multiply each coefficient
+        for i in range(len(self.coeffs)): self.coeffs[i] *= theinv
         return self
 
     def __div__(self, divisor):  # Overload the "/" operator in Python2
@@ -1075,7 +1136,8 @@ class PolyFieldUnivElt(object):
         elif not (divisor in self.polyring.coeffring):
             raise NotImplementedError("Can't divide PolyFieldUnivElt object by {0:} object".format(type(divisor)))
         if (divisor == 0): raise ZeroDivisionError("Attempting to divide polynomial by zero element of coefficient ring")
-        for i in range(len(self.coeffs)): self.coeffs[i] /= divisor
+        theinv = divisor.inv()   # Invert once, and multiply each coefficient
+        for i in range(len(self.coeffs)): self.coeffs[i] *= theinv
         return self
 
     def __idiv__(self, divisor):  # Overload the "/=" operator in Python2
@@ -1090,6 +1152,11 @@ class PolyFieldUnivElt(object):
     ######################## Other Operators ##################################
 
     def eval(self, xvalue):  # Evaluate poly at given value using Horder's Rule
+        coeffring = self.polyring.coeffring
+        if self.coeffs and (isIntType(xvalue) or isStrType(xvalue) or (isinstance(xvalue, (GF8elt, GF16elt, GFpelt)) and (xvalue in coeffring))):
+            thepoly, x = self._poly(), self.polyring._values([coeffring(xvalue)])
+            if (thepoly is not None) and (x is not None):
+                return coeffring._fromint(thepoly.eval(x[0]))
         polydeg = len(self.coeffs)-1
         theval = self.coeffs[polydeg]
         for theindex in range(polydeg-1, -1, -1):
@@ -77,8 +77,150 @@ Possible ground fields include:
 __version__ = '0.33'  # Format specified in Python PEP 396
 Version = 'shamirshare2.py, version ' + __version__ + ', 8 Oct, 2019, by Robert Campbell, <r.campbel.256@gmail.com>'
 
-import six        # Python2/3 compatibility
-import functools  # reduce operator in Python3
+import sys   # Python2/3 compatibility
+import os    # os.urandom(), for the coefficients of split polynomials
+import threading
+import array
+
+# Python2/3 compatibility, without the import cost of the six package
+_PY2 = sys.version_info < (3,)
+if _PY2:
+    _integer_types = (int, long,)
+    _string_types = (basestring,)
+    def _bytes2int(data):  # Big-endian byte string --> integer
+        return int(bytes(bytearray(data)).encode('hex'), 16) if len(data) else 0
+    def _int2bytes(value, width):  # Integer --> big-endian byte string of given width
+        return "{0:0{1:}x}".format(value, 2*width).decode('hex') if width else ''
+else:
+    _integer_types = (int,)
+    _string_types = (str,)
+    def _bytes2int(data):  # Big-endian byte string --> integer
+        return int.from_bytes(data, 'big')
+    def _int2bytes(value, width):  # Integer --> big-endian byte string of given width
+        return value.to_bytes(width, 'big')
+if hasattr(int, 'bit_length'):
+    def _bitlength(value):  # Bits in a non-negative integer
+        return value.bit_length()
+else:   # Python 2.6
+    def _bitlength(value):
+        return len(bin(value)) - 2 if value else 0
+
+class RandomPool(object):
+    """Random bytes from os.urandom(), fetched blocksize bytes at a time and
+    handed out in slices, so that the many small draws of a short split cost
+    one system call between them.  Requests of a block or more go straight
+    to os.urandom().  The block is thrown away in a forked child, so parent
+    and child never hand out the same bytes.  Each slice is zeroed in the
+    block as it is handed out, so the pool does not keep the coefficients
+    of past splits (with any one share, they would give the secret away).
+    What it cannot reach: the bytes returned to the caller, and the
+    immutable string os.urandom() returned, freed but not overwritten.
+    Usage:
+        >>> pool = RandomPool()
+        >>> len(pool.bytes(10)), len(pool.bytes(100000))
+        (10, 100000)
+        >>> pool._block[:10] == bytearray(10)         # Handed out, so wiped
+        True
+        >>> values = pool.below(1000, 500)
+        >>> len(values), min(values) >= 0, max(values) < 1000
+        (500, True, True)"""
+
+    blocksize = 65536
+
+    def __init__(self, blocksize=None):
+        if blocksize is not None: self.blocksize = blocksize
+        self._block = bytearray()
+        self._pos = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def bytes(self, count):
+        """count random bytes"""
+        if count >= self.blocksize: return os.urandom(count)
+        with self._lock:
+            if (self._pos + count > len(self._block)) or (self._pid != os.getpid()):
+                self._block, self._pos, self._pid = bytearray(os.urandom(self.blocksize)), 0, os.getpid()
+            theslice = bytes(self._block[self._pos:self._pos+count])
+            self._block[self._pos:self._pos+count] = bytearray(count)
+            self._pos += count
+        return theslice
+
+    def below(self, bound, count):
+        """A list of count independent, uniformly random integers in the range
+        [0, bound).  Rejection sampling, a batch at a time: draw the expected
+        number of candidates of bound's bit length needed (under twice count),
+        keep those below bound, and draw again for any shortfall."""
+        if bound == 1: return [0] * count
+        nbits = _bitlength(bound - 1)
+        nbytes = (nbits + 7) // 8
+        shift = 8*nbytes - nbits
+        values = []
+        while len(values) < count:
+            need = count - len(values)
+            draw = (need << nbits) // bound + 1 + need // 32
+            data = self.bytes(draw * nbytes)
+            values.extend(value for value in (_bytes2int(data[i:i+nbytes]) >> shift for i in range(0, len(data), nbytes)) if value < bound)
+        return values[:count]
+
+_pool = RandomPool()
+
+def _randbelow(bound):
+    """Uniformly random integer in the range [0, bound), drawn from os.urandom()"""
+    nbits = _bitlength(bound - 1)
+    nbytes = (nbits + 7) // 8
+    while True:  # Rejection sampling, accepts with probability > 1/2
+        value = _bytes2int(os.urandom(nbytes)) >> (8*nbytes - nbits)
+        if value < bound: return value
+
+class _lazyclassattr(object):
+    """A class attribute computed by function() on first access, and then
+    stored on the class, so that nothing need be created at import time"""
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+
+    def __get__(self, instance, cls):
+        value = self.function()
+        setattr(cls, self.name, value)
+        return value
+
+################################# Primes ######################################
+
+_smallprimes = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+def isprime(n, rounds=40):
+    """Miller-Rabin test: False if n is composite, True if n is prime (with
+    error probability below 4^-rounds)
+    Usage:
+        >>> isprime(1125899906842679), isprime(2**50 + 1)
+        (True, False)"""
+    if n < 2: return False
+    for p in _smallprimes:
+        if n % p == 0: return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for i in range(rounds):
+        x = pow(2 + _randbelow(n - 3), d, n)
+        if (x == 1) or (x == n - 1): continue
+        for r in range(s - 1):
+            x = x * x % n
+            if x == n - 1: break
+        else:
+            return False
+    return True
+
+def nextprime(n):
+    """The smallest prime larger than n, e.g. for a GFp to split n-bit keys over
+    Usage:
+        >>> nextprime(2**50) == 1125899906842679
+        True"""
+    n = max(n + 1, 2)
+    if n > 2 and n % 2 == 0: n += 1
+    while not isprime(n): n += 1 if n == 2 else 2
+    return n
 
 ############################# Class GFp #################################
 # Class GFp
@@ -97,6 +239,9 @@ class GFp(object):
 
     def __init__(self, prime):
         self.prime = prime
+        self.order = prime
+        self.eltbytes = (_bitlength(prime) + 7) // 8     # Bytes per element in a share
+        self.secretbytes = (_bitlength(prime) - 1) // 8  # Bytes of secret carried per element
 
     def __contains__(self, theelt):  # Usage if(x in GFp(prime))
         return (self == theelt.field)
@@ -104,6 +249,17 @@ class GFp(object):
     def __call__(self, theint):      # Usage x = gp13(5)
         return(GFpelt(self, theint))
 
+    def frombytes(self, data):       # Big-endian integer
+        return GFpelt(self, _bytes2int(data))
+
+    def tobytes(self, elt, width=None):
+        if width is None: width = self.eltbytes
+        if elt.value >> (8*width): raise ValueError("GFp element {0:} does not fit in {1:} bytes".format(elt.value, width))
+        return _int2bytes(elt.value, width)
+
+    def random(self):
+        return GFpelt(self, _randbelow(self.prime))
+
 ############################# Class GF8elt #################################
 # Class GFpelt
 # Elements of some finite field GF(p), for a specified prime integer p.
@@ -127,7 +283,7 @@ class GFpelt(object):
         self.value = value
         if isinstance(value, (GFpelt,)):
             self.value = value.value  # strip redundant GFpelt
-        elif isinstance(value, six.integer_types):
+        elif isinstance(value, _integer_types):
             self.value = self.__normalize(value)
 
     def __normalize(self, value):
@@ -135,25 +291,33 @@ class GFpelt(object):
         return(((value % self.field.prime) + self.field.prime) % self.field.prime)
 
     def __eq__(self, other):  # Implement for Python 2 & 3 with overloading
-        if isinstance(other, six.integer_types):
+        if isinstance(other, _integer_types):
             otherval = self.__normalize(other)
         elif isinstance(other, (GFpelt,)):
             otherval = other.value
         return self.value == otherval
 
     def __ne__(self, other):  # Implement for Python 2 & 3 with overloading
-        if isinstance(other, six.integer_types):
+        if isinstance(other, _integer_types):
             otherval = self.__normalize(other)
         elif isinstance(other, (GFpelt,)):
             otherval = other.value
         return self.value != otherval
 
+    def __int__(self):
+        """convert to integer"""
+        return self.value
+
+    def __index__(self):
+        """convert to integer for various uses including bin, hex and oct (Python 2.5+ only)"""
+        return self.value
+
 
     ######################## Addition Operators ###############################
 
     def add(self, summand):
         """add elements of GFpelt (overloaded to allow adding integers)"""
-        if isinstance(summand, six.integer_types):
+        if isinstance(summand, _integer_types):
             summand = self.field(summand)
         elif not isinstance(summand, (GFpelt,)):
             raise NotImplementedError("Can't add GFpelt object to {0:} object".format(type(summand)))
@@ -170,7 +334,7 @@ class GFpelt(object):
 
     def mul(self, multip):  # Elementary multiplication in finite fields
         """multiply elements of GFpelt (overloaded to allow integers)"""
-        if isinstance(multip, six.integer_types):  # Coerce if multiplying integer
+        if isinstance(multip, _integer_types):  # Coerce if multiplying integer
             multip = self.__normalize(multip)
         elif isinstance(multip, (GFpelt,)):
             multip = multip.value
@@ -208,7 +372,7 @@ class GFpelt(object):
 
     def div(self, divisor):
         """divide elements of GFpelt (overloaded to allow integers)"""
-        if isinstance(divisor, six.integer_types):  # Coerce if dividing by integer
+        if isinstance(divisor, _integer_types):  # Coerce if dividing by integer
             divisor = GFpelt(self.field, self.__normalize(divisor))
         elif not isinstance(divisor, (GFpelt,)):
             raise NotImplementedError("Can't divide GFpelt object by {0:} object".format(type(divisor)))
@@ -230,6 +394,9 @@ class GF8(object):
     """
 
     _instance = None
+    order = 256
+    eltbytes = 1     # Bytes per element in a share
+    secretbytes = 1  # Bytes of secret carried per element
 
     def __new__(cls):
         if not isinstance(cls._instance, cls):
@@ -242,6 +409,15 @@ class GF8(object):
     def __call__(self, thevalue):
         return(GF8elt(thevalue))
 
+    def frombytes(self, data):
+        return GF8elt(bytearray(data)[0])
+
+    def tobytes(self, elt, width=None):
+        return bytes(bytearray((elt.value,)))
+
+    def random(self):
+        return GF8elt(bytearray(os.urandom(1))[0])
+
     def __format__(self, fmtspec):  # Over-ride format conversion
         return "Finite field GF(2^8) mod (x^8 + x^4 + x^3 + x + 1)"
 
@@ -277,9 +453,10 @@ class GF8elt(object):
         self.value = 0
         self.field = GF8()
         if isinstance(value, (GF8elt,)): self.value = value.value  # strip redundant GF8elt
-        elif isinstance(value, six.integer_types): self.value = value
-        elif isinstance(value, six.string_types): self.value = int(value, 16)  # For the moment, assume hex
-        elif isinstance(value, (list, tuple,)): self.value = functools.reduce(lambda a, x: 2*a + x, reversed(value), 0)
+        elif isinstance(value, _integer_types): self.value = value
+        elif isinstance(value, _string_types): self.value = int(value, 16)  # For the moment, assume hex
+        elif isinstance(value, (list, tuple,)):  # List of bits, low order first
+            for thebit in reversed(value): self.value = 2*self.value + thebit
         else: raise ValueError("A GF8elt object cannot be constructed from input \'{0:}\' of type {1:}".format(value, type(value)))
 
     def __eq__(self, other):  # Implement for both Python2 & 3 with overloading
@@ -321,7 +498,7 @@ class GF8elt(object):
         """convert to integer for various uses including bin, hex and oct (Python 2.5+ only)"""
         return self.value
 
-    if six.PY2:  # Overload hex() and oct() (bin() was never backported to Python 2)
+    if _PY2:  # Overload hex() and oct() (bin() was never backported to Python 2)
         def __hex__(self): return "0x{0:02x}".format(self.value)
         def __oct__(self): return oct(self.__index__())
 
@@ -340,71 +517,47 @@ class GF8elt(object):
     ######################## Multiplication Operators #########################
 
     def mul(self, multand):  # Elementary multiplication in finite fields
-        """multiply elements of GF8 (overloaded to allow integers and lists of integers)"""
-        amult = self.value     # Pull it out of the GF8elt structure
-        bmult = multand.value  # Pull it out of the GF8elt structure
-        thenum = 0
-        # Multiply as binary polynomials
-        for i in range(8): thenum ^= ((bmult << i) if ((amult >> i) & 0x01) == 1 else 0)
-        # And then reduce mod the driving polynomial of GF8
-        return GF8elt(GF8elt.__reduceGF8(thenum))
-
-    @staticmethod
-    def __reduceGF8(thevalue):  # Value is integer in range [0,2^16-1]
-        reductable = (0x1b, 0x36, 0x6c, 0xd8, 0xab, 0x4d, 0x9a, 0x2f)
-        feedback = 0
-        for i in range(8, 16): feedback ^= (reductable[i-8] if (((thevalue >> i) & 0x01) == 1) else 0)
-        return ((thevalue & 0xff) ^ feedback)
+        """multiply elements of GF8, using log/antilog tables"""
+        if (self.value == 0) or (multand.value == 0): return GF8elt(0)
+        return GF8elt(_GF8exp[_GF8log[self.value] + _GF8log[multand.value]])
 
     ######################## Division Operators ###############################
 
-    # Table based inverse (well, actually pseudo-inverse, as 00-->00)
-    __GF8inv = {
-         "00":"00","01":"01","02":"8d","03":"f6","04":"cb","05":"52","06":"7b","07":"d1",
-         "08":"e8","09":"4f","0a":"29","0b":"c0","0c":"b0","0d":"e1","0e":"e5","0f":"c7",
-         "10":"74","11":"b4","12":"aa","13":"4b","14":"99","15":"2b","16":"60","17":"5f",
-         "18":"58","19":"3f","1a":"fd","1b":"cc","1c":"ff","1d":"40","1e":"ee","1f":"b2",
-         "20":"3a","21":"6e","22":"5a","23":"f1","24":"55","25":"4d","26":"a8","27":"c9",
-         "28":"c1","29":"0a","2a":"98","2b":"15","2c":"30","2d":"44","2e":"a2","2f":"c2",
-         "30":"2c","31":"45","32":"92","33":"6c","34":"f3","35":"39","36":"66","37":"42",
-         "38":"f2","39":"35","3a":"20","3b":"6f","3c":"77","3d":"bb","3e":"59","3f":"19",
-         "40":"1d","41":"fe","42":"37","43":"67","44":"2d","45":"31","46":"f5","47":"69",
-         "48":"a7","49":"64","4a":"ab","4b":"13","4c":"54","4d":"25","4e":"e9","4f":"09",
-         "50":"ed","51":"5c","52":"05","53":"ca","54":"4c","55":"24","56":"87","57":"bf",
-         "58":"18","59":"3e","5a":"22","5b":"f0","5c":"51","5d":"ec","5e":"61","5f":"17",
-         "60":"16","61":"5e","62":"af","63":"d3","64":"49","65":"a6","66":"36","67":"43",
-         "68":"f4","69":"47","6a":"91","6b":"df","6c":"33","6d":"93","6e":"21","6f":"3b",
-         "70":"79","71":"b7","72":"97","73":"85","74":"10","75":"b5","76":"ba","77":"3c",
-         "78":"b6","79":"70","7a":"d0","7b":"06","7c":"a1","7d":"fa","7e":"81","7f":"82",
-         "80":"83","81":"7e","82":"7f","83":"80","84":"96","85":"73","86":"be","87":"56",
-         "88":"9b","89":"9e","8a":"95","8b":"d9","8c":"f7","8d":"02","8e":"b9","8f":"a4",
-         "90":"de","91":"6a","92":"32","93":"6d","94":"d8","95":"8a","96":"84","97":"72",
-         "98":"2a","99":"14","9a":"9f","9b":"88","9c":"f9","9d":"dc","9e":"89","9f":"9a",
-         "a0":"fb","a1":"7c","a2":"2e","a3":"c3","a4":"8f","a5":"b8","a6":"65","a7":"48",
-         "a8":"26","a9":"c8","aa":"12","ab":"4a","ac":"ce","ad":"e7","ae":"d2","af":"62",
-         "b0":"0c","b1":"e0","b2":"1f","b3":"ef","b4":"11","b5":"75","b6":"78","b7":"71",
-         "b8":"a5","b9":"8e","ba":"76","bb":"3d","bc":"bd","bd":"bc","be":"86","bf":"57",
-         "c0":"0b","c1":"28","c2":"2f","c3":"a3","c4":"da","c5":"d4","c6":"e4","c7":"0f",
-         "c8":"a9","c9":"27","ca":"53","cb":"04","cc":"1b","cd":"fc","ce":"ac","cf":"e6",
-         "d0":"7a","d1":"07","d2":"ae","d3":"63","d4":"c5","d5":"db","d6":"e2","d7":"ea",
-         "d8":"94","d9":"8b","da":"c4","db":"d5","dc":"9d","dd":"f8","de":"90","df":"6b",
-         "e0":"b1","e1":"0d","e2":"d6","e3":"eb","e4":"c6","e5":"0e","e6":"cf","e7":"ad",
-         "e8":"08","e9":"4e","ea":"d7","eb":"e3","ec":"5d","ed":"50","ee":"1e","ef":"b3",
-         "f0":"5b","f1":"23","f2":"38","f3":"34","f4":"68","f5":"46","f6":"03","f7":"8c",
-         "f8":"dd","f9":"9c","fa":"7d","fb":"a0","fc":"cd","fd":"1a","fe":"41","ff":"1c"
-        }
-
     def inv(self):
         """inverse of element in GF8"""
         if (self.value == 0): raise ZeroDivisionError("Attempting to invert zero element of GF8")
-        # Tableized (lazy solution for a small field, xgcd is better solution)
-        return GF8elt(GF8elt.__GF8inv[str(self)])
+        return GF8elt(_GF8exp[255 - _GF8log[self.value]])
 
     def div(self, divisor):
         """divide elements of GF8"""
         return self.mul(divisor.inv())
 
 
+# Antilog and log tables of GF8 to the base 03, a generator of its
+# multiplicative group: _GF8exp[i] = 03^i, with the table doubled so that the
+# sum of two logs needs no reduction mod 255, and _GF8log[03^i] = i.
+# Precomputed, as decoding these literals is far cheaper at import time than
+# building the tables.
+_GF8exp = 2*bytearray.fromhex(
+    '0103050f113355ff1a2e7296a1f813355fe13848d87395a4f702060a1e2266aa'
+    'e5345ce43759eb266abed97090abe63153f5040c143c44cc4fd168b8d36eb2cd'
+    '4cd467a9e03b4dd762a6f10818287888839eb9d06bbddc7f8198b3ce49db769a'
+    'b5c457f9103050f00b1d2769bbd661a3fe192b7d8792adec2f7193aee92060a0'
+    'fb163a4ed26db7c25de73256fa153f41c35ee23d47c940c05bed2c749cbfda75'
+    '9fbad564acef2a7e829dbcdf7a8e89809bb6c158e82365afea256fb1c843c554'
+    'fc1f2163a5f407091b2d7799b0cb46ca45cf4ade798b8691a8e33e42c651f30e'
+    '12365aee297b8d8c8f8a8594a7f20d17394bdd7c8497a2fd1c246cb4c752f6')
+_GF8log = bytearray.fromhex(
+    '0000190132021ac64bc71b6833eedf036404e00e348d81ef4c7108c8f8691cc1'
+    '7dc21db5f9b9276a4de4a6729ac90978652f8a05210fe12412f082453593da8e'
+    '968fdbbd36d0ce94135cd2f14046833866ddfd30bf068b62b325e29822889110'
+    '7e6e48c3a3b61e423a6b2854fa853dba2b790a159b9f5eca4ed4ace5f373a757'
+    'af58a850f4ead6744faee9d5e7e6ade82cd7757aeb160bf559cb5fb09ca951a0'
+    '7f0cf66f17c449ecd8431f2da4767bb7ccbb3e5afb60b1863b52a16caa55299d'
+    '97b2879061bedcfcbc95cfcd373f5bd15339843c41a26d47142a9e5d56f2d3ab'
+    '441192d923202e89b47cb8267799e3a5674aeddec531fe180d638c80c0f77007')
+
+
 ############################# Class GF16 #################################
 # Class GF16
 # A singleton class implementing the finite field GF16, where GF16 is the
@@ -419,8 +572,11 @@ class GF16(object):
     """
 
     _instance = None
-    basefield = GF8()    # Instantiate the base field GF8
-    m = basefield('3A')  # Coeff in defining poly of GF16
+    basefield = _lazyclassattr('basefield', GF8)         # The base field GF8
+    m = _lazyclassattr('m', lambda: GF8elt(0x3A))        # Coeff in defining poly of GF16
+    order = 65536
+    eltbytes = 2     # Bytes per element in a share, little-endian: [c0, c1]
+    secretbytes = 2  # Bytes of secret carried per element
 
     def __new__(cls, *args, **kwargs):
         if not isinstance(cls._instance, cls):
@@ -441,6 +597,16 @@ class GF16(object):
     def __format__(self, fmtspec):  # Over-ride format conversion
         return "Finite field GF(2^16) = GF8[z]/<z^2 + z + 3A>"
 
+    def frombytes(self, data):
+        data = bytearray(data)
+        return GF16elt([data[0], data[1]])
+
+    def tobytes(self, elt, width=None):
+        return bytes(bytearray((elt.coeffs[0].value, elt.coeffs[1].value)))
+
+    def random(self):
+        return GF16elt(list(bytearray(os.urandom(2))))
+
 ############################# Class GF16elt #################################
 # Class GF16elt
 # Elements of the finite field GF16 = GF(2^16) = GF8[z]/<z^2 + z + 3A>,
@@ -465,15 +631,17 @@ class GF16elt(object):
     """
 
     coeffs = []
-    gf16 = GF16()  # Instantiate the field
-    fmtspec = gf16.fmtspec
-    field = gf16
+    gf16 = _lazyclassattr('gf16', GF16)    # The field, instantiated on first use
+    field = _lazyclassattr('field', GF16)
+    fmtspec = 'x'  # Default format is the list of coeffs, each in hex
 
     def __init__(self, value):
         self.field = GF16()
         if isinstance(value, (GF16elt,)):
             self.coeffs = value.coeffs  # strip redundant GF16elt
-        elif isinstance(value, six.integer_types) or isinstance(value, six.string_types):
+        elif isinstance(value, _integer_types):  # Same as __int__: c0 + (c1 << 8)
+            self.coeffs = [self.field.basefield(value & 0xff), self.field.basefield(value >> 8)]
+        elif isinstance(value, _string_types):
             self.coeffs = [self.field.basefield(value), self.field.basefield(0)]
         elif isinstance(value, (list, tuple,)):
             self.coeffs = [self.field.basefield(thecoeff) for thecoeff in value[:min(2,len(value))]] + [self.field.basefield(0) for i in range(min(2,len(value)), 2)]
@@ -482,7 +650,7 @@ class GF16elt(object):
         else: raise ValueError("A GF16elt object cannot be constructed from input \'{0:}\' of type {1:}".format(value,type(value)))
 
     def __eq__(self, other):  # Implement for both Python2 & 3 with overloading
-        if isinstance(other, six.integer_types) or isinstance(other, six.string_types) or isinstance(other, (GF8elt,)) or isinstance(other, (list, tuple,)):
+        if isinstance(other, _integer_types) or isinstance(other, _string_types) or isinstance(other, (GF8elt,)) or isinstance(other, (list, tuple,)):
             otherval = self.field(other)
         elif isinstance(other, (GF16elt,)): otherval = other
         else: raise ValueError("Cannot compare equality of a GF16elt object with \'{0:}\' of type {1:}".format(other,type(other)))
@@ -531,7 +699,7 @@ class GF16elt(object):
         """convert to integer for various uses including bin, hex and oct (Python 2.5+ only)"""
         return (self.coeffs[0]).value + ((self.coeffs[1]).value << 8)
 
-    if six.PY2:  # Overload hex() and oct() (bin() was never backported to Python 2)
+    if _PY2:  # Overload hex() and oct() (bin() was never backported to Python 2)
         def __hex__(self): return "0x{0:04x}".format(self.__index__())
         def __oct__(self): return oct(self.__index__())
 
@@ -581,6 +749,290 @@ class GF16elt(object):
         return self.mul(divisor.inv())
 
 
+############################# Class GF2m #################################
+# Class GF2m
+# The binary field GF(2^m) = GF(2)[x]/<p(x)>, for a given degree m and
+#   irreducible reduction polynomial p(x), with elements held as integers
+#   (bit i is the coefficient of x^i).  Over GF(2^32) or GF(2^64) each field
+#   element carries 4 or 8 bytes of the secret, so a 32-byte key needs 8 or
+#   4 polynomials rather than the 32 needed over GF8.
+#   Elements of GF2m are instances of GF2melt.
+
+# Default reduction polynomials, of low weight so that reduction is cheap
+_GF2mpolys = {
+    8: 0x11b,                         # x^8 + x^4 + x^3 + x + 1 (as in AES, so GF2m(8) is GF8)
+    16: 0x1002b,                      # x^16 + x^5 + x^3 + x + 1
+    32: 0x10000008d,                  # x^32 + x^7 + x^3 + x^2 + 1
+    64: 0x1000000000000001b,          # x^64 + x^4 + x^3 + x + 1
+    128: 0x100000000000000000000000000000087,  # x^128 + x^7 + x^2 + x + 1 (as in GCM)
+}
+
+def _clmul(a, b):  # Carry-less (GF(2)[x]) product of two integers, bit by bit
+    result = 0
+    while b:
+        if b & 1: result ^= a
+        a <<= 1; b >>= 1
+    return result
+
+def _clmod(a, modulus):  # Remainder of a modulo modulus in GF(2)[x], bit by bit
+    degree = _bitlength(modulus) - 1
+    while _bitlength(a) > degree:
+        a ^= modulus << (_bitlength(a) - 1 - degree)
+    return a
+
+def _isirreducible(modulus):
+    """Rabin's test: a polynomial p of degree m over GF(2) is irreducible if
+    and only if x^(2^m) = x mod p, and gcd(x^(2^(m/q)) - x, p) = 1 for each
+    prime q dividing m.
+        >>> [_isirreducible(_GF2mpolys[m]) for m in sorted(_GF2mpolys)]
+        [True, True, True, True, True]
+        >>> _isirreducible(0x100000001)       # x^32 + 1 = (x + 1)^32
+        False"""
+    degree = _bitlength(modulus) - 1
+    if degree < 1: return False
+    def frobenius(k):  # x^(2^k) mod modulus
+        value = 2
+        for i in range(k): value = _clmod(_clmul(value, value), modulus)
+        return value
+    if frobenius(degree) != _clmod(2, modulus): return False
+    for q in (q for q in range(2, degree + 1) if (degree % q == 0) and isprime(q)):
+        a, b = modulus, frobenius(degree // q) ^ 2
+        while b: a, b = b, _clmod(a, b)
+        if a != 1: return False
+    return True
+
+class GF2m(object):
+    """The binary field GF(2^m) = GF(2)[x]/<p(x)>, for a degree m (default 64)
+    and a reduction polynomial p(x) given as an integer, including its x^m
+    term.  The degrees in _GF2mpolys have default polynomials.  One instance
+    is created for each (degree, polynomial), as it holds precomputed tables.
+    Usage:
+        >>> gf64 = GF2m(64)                   # GF(2)[x]/<x^64 + x^4 + x^3 + x + 1>
+        >>> gf64 is GF2m(64, 0x1000000000000001b)
+        True
+        >>> format(gf64)
+        'Finite field GF(2^64) mod 0x1000000000000001b'
+        >>> secret = bytearray(range(32))     # A 256-bit key is 4 elements
+        >>> shares = split(secret, 3, 5, gf64)
+        >>> [(x, len(y)) for x, y in shares]
+        [(1, 32), (2, 32), (3, 32), (4, 32), (5, 32)]
+        >>> recover(shares[2:], gf64) == secret
+        True
+        >>> GF2m(32, 0x100000001)             #doctest: +ELLIPSIS
+        Traceback (most recent call last):
+        ...
+        ValueError: The polynomial 0x100000001 is not irreducible over GF(2)
+    """
+
+    _instances = {}
+    window = 4       # Bits of a multiplier consumed per table lookup
+    maxtables = 256  # Multiplier tables cached (a multiplier is often reused, like x in eval())
+    _spread = None   # _spread[b] is b with a zero bit inserted after each bit, b^2 in GF(2)[x]
+
+    def __new__(cls, degree=64, modulus=None):
+        if modulus is None:
+            if degree not in _GF2mpolys: raise ValueError("No default polynomial for GF(2^{0:}), give one".format(degree))
+            modulus = _GF2mpolys[degree]
+        if (cls, degree, modulus) not in cls._instances:
+            if _bitlength(modulus) != degree + 1: raise ValueError("The polynomial {0:#x} does not have degree {1:}".format(modulus, degree))
+            if (modulus != _GF2mpolys.get(degree)) and not _isirreducible(modulus):
+                raise ValueError("The polynomial {0:#x} is not irreducible over GF(2)".format(modulus))
+            cls._instances[(cls, degree, modulus)] = object.__new__(cls)._setup(degree, modulus)
+        return cls._instances[(cls, degree, modulus)]
+
+    def _setup(self, degree, modulus):
+        self.degree = degree
+        self.modulus = modulus
+        self.order = 1 << degree
+        self.eltbytes = (degree + 7) // 8    # Bytes per element in a share
+        self.secretbytes = degree // 8       # Bytes of secret carried per element
+        # Reduce the bits above x^m redbits at a time: redtable[h] clears the
+        # bits h*x^m and adds h*(p(x) - x^m) in their place.  redbits is small
+        # enough that the added terms stay below the bits being cleared.
+        low = modulus ^ self.order
+        self._redbits = min(8, degree - _bitlength(low) + 1)
+        self._redtable = [(h << degree) ^ _clmul(h, low) for h in range(1 << self._redbits)]
+        self._tables = {}
+        if GF2m._spread is None:
+            GF2m._spread = [int(format(b, 'b').replace('', '0')[:-1] or '0', 2) for b in range(256)]
+        return self
+
+    def __contains__(self, elt):
+        return isinstance(elt, (GF2melt,)) and (elt.field is self)
+
+    def __call__(self, thevalue):
+        return GF2melt(self, thevalue)
+
+    def __format__(self, fmtspec):  # Over-ride format conversion
+        return "Finite field GF(2^{0:}) mod {1:#x}".format(self.degree, self.modulus)
+
+    def frombytes(self, data):       # Big-endian integer
+        return GF2melt(self, _bytes2int(data))
+
+    def tobytes(self, elt, width=None):
+        if width is None: width = self.eltbytes
+        if elt.value >> (8*width): raise ValueError("GF2m element {0:x} does not fit in {1:} bytes".format(elt.value, width))
+        return _int2bytes(elt.value, width)
+
+    def random(self):
+        return GF2melt(self, _bytes2int(os.urandom(self.eltbytes)) >> (8*self.eltbytes - self.degree))
+
+    ######################## Arithmetic on integers ###########################
+
+    def _reduce(self, value):
+        """value mod p(x), for any value"""
+        degree, redbits, redtable = self.degree, self._redbits, self._redtable
+        top = _bitlength(value) - degree   # Bits above x^(m-1)
+        while top > 0:
+            shift = top - redbits if top > redbits else 0
+            value ^= redtable[value >> (degree + shift)] << shift
+            top = _bitlength(value) - degree
+        return value
+
+    def _table(self, b):
+        """The window table [0, b, b*x, b*(x+1), ...] of carry-less multiples of b"""
+        table = [0]*(1 << self.window)
+        for i in range(1, len(table)):
+            table[i] = (table[i >> 1] << 1) ^ (b if i & 1 else 0)
+        return table
+
+    def _mul(self, a, b):
+        """a*b mod p(x), a window of bits of a at a time, using a cached table
+        of the multiples of b (or of a, if only that one is cached)"""
+        if (a == 0) or (b == 0): return 0
+        table = self._tables.get(b)
+        if table is None:
+            table = self._tables.get(a)
+            if table is None:
+                if len(self._tables) >= self.maxtables: self._tables.clear()
+                table = self._tables[b] = self._table(b)
+            else: a = b
+        window = self.window
+        mask = (1 << window) - 1
+        result = 0
+        for shift in range((_bitlength(a) - 1) // window * window, -1, -window):
+            result = (result << window) ^ table[(a >> shift) & mask]
+        return self._reduce(result)
+
+    def _square(self, a):
+        """a^2 mod p(x): squaring over GF(2) just spreads out the bits"""
+        spread = GF2m._spread
+        result = 0
+        shift = 0
+        while a:
+            result |= spread[a & 0xff] << shift
+            a >>= 8; shift += 16
+        return self._reduce(result)
+
+    def _inv(self, a):
+        """a^(-1) = a^(2^m - 2) = (a^(2^(m-1) - 1))^2 by Itoh-Tsujii, building
+        b_k = a^(2^k - 1) along the bits of m-1 with b_2k = b_k^(2^k) * b_k and
+        b_(k+1) = b_k^2 * a, so needing only about log2(m) multiplications
+        (squarings are cheap)"""
+        if a == 0: raise ZeroDivisionError("Attempting to invert zero element of GF(2^{0:})".format(self.degree))
+        beta = a
+        k = 1
+        for thebit in format(self.degree - 1, 'b')[1:]:
+            gamma = beta
+            for i in range(k): gamma = self._square(gamma)
+            beta = self._mul(gamma, beta)
+            k = 2*k
+            if thebit == '1':
+                beta = self._mul(self._square(beta), a)
+                k = k + 1
+        return self._square(beta)
+
+############################# Class GF2melt #################################
+# Class GF2melt
+# Elements of a binary field GF(2^m) = GF(2)[x]/<p(x)>, as created by GF2m.
+
+class GF2melt(object):
+    """An element of the binary field GF(2^m) of some GF2m instance
+    Usage:
+        >>> gf32 = GF2m(32)                   # GF(2)[x]/<x^32 + x^7 + x^3 + x^2 + 1>
+        >>> a = gf32('deadbeef'); b = gf32(0x12345678)
+        >>> format(a.mul(b))
+        'a0313f8e'
+        >>> format(a.mul(b).div(b)), format(a.add(b)), a.mul(a.inv()) == 1
+        ('deadbeef', 'cc99e897', True)
+        >>> gf8 = GF2m(8)                     # Same polynomial as GF8
+        >>> format(gf8('b6').mul(gf8('34'))), format(GF8elt('b6').mul(GF8elt('34')))
+        ('4a', '4a')
+    """
+
+    fmtspec = 'x'  # Default format is hex, zero padded to the element width
+
+    def __init__(self, field, value):
+        self.field = field
+        if isinstance(value, (GF2melt,)): self.value = value.value  # strip redundant GF2melt
+        elif isinstance(value, _integer_types): self.value = field._reduce(value)
+        elif isinstance(value, _string_types): self.value = field._reduce(int(value, 16))  # Assume hex
+        else: raise ValueError("A GF2melt object cannot be constructed from input \'{0:}\' of type {1:}".format(value, type(value)))
+
+    def __eq__(self, other):  # Implement for both Python2 & 3 with overloading
+        if isinstance(other, (GF2melt,)): return self.value == other.value
+        return self.value == self.field(other).value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    ######################## Format Operators #################################
+
+    def __format__(self, fmtspec):  # Over-ride format conversion
+        """Format as x- hex, or b- binary, zero padded to the width of the field"""
+        if fmtspec == '': fmtspec = GF2melt.fmtspec
+        if fmtspec == 'x': return "{0:0{1:}x}".format(self.value, (self.field.degree + 3) // 4)
+        elif fmtspec == 'b': return "{0:0{1:}b}".format(self.value, self.field.degree)
+        else: raise ValueError("The format string \'{0:}\' doesn't make sense (or isn't implemented) for a GF2melt object".format(fmtspec))
+
+    def __str__(self):
+        """over-ride string conversion used by print"""
+        return format(self, self.fmtspec)
+
+    def __int__(self):
+        """convert to integer"""
+        return self.value
+
+    def __index__(self):
+        """convert to integer for various uses including bin, hex and oct (Python 2.5+ only)"""
+        return self.value
+
+    if _PY2:  # Overload hex() and oct() (bin() was never backported to Python 2)
+        def __hex__(self): return hex(self.value)
+        def __oct__(self): return oct(self.value)
+
+    ######################## Addition Operators ###############################
+
+    def add(self, summand):
+        """add elements of GF2melt (overloaded to allow adding integers)"""
+        if not isinstance(summand, (GF2melt,)): summand = self.field(summand)
+        return GF2melt(self.field, self.value ^ summand.value)
+
+    def neg(self):  # x == -x when over GF2
+        return self
+
+    def sub(self, subtrahend):  # x - y == x + y when over GF2
+        return self.add(subtrahend)
+
+    ######################## Multiplication Operators #########################
+
+    def mul(self, multand):  # Elementary multiplication in finite fields
+        """multiply elements of GF2melt (overloaded to allow integers)"""
+        if not isinstance(multand, (GF2melt,)): multand = self.field(multand)
+        return GF2melt(self.field, self.field._mul(self.value, multand.value))
+
+    ######################## Division Operators ###############################
+
+    def inv(self):
+        """inverse of element in GF(2^m), by Itoh-Tsujii"""
+        return GF2melt(self.field, self.field._inv(self.value))
+
+    def div(self, divisor):
+        """divide elements of GF2melt (overloaded to allow integers)"""
+        if not isinstance(divisor, (GF2melt,)): divisor = self.field(divisor)
+        return self.mul(divisor.inv())
+
+
 ############################# Polynomial Operations ###########################
 # Polynomials are represented as a list of coefficients, but no explicit class
 # is created.
@@ -606,7 +1058,8 @@ def fit(thepoints, thefield=None):  # Lagrange Interpolation
     fitting the n presented values, using Lagrange Interpolation.  If thefield
     is not specified, use the field the first y value is in.
     Given a list ((x1,y1),(x2,y2),...,(xn,yn)), return the polynomials
-    Sum(j, Prod(i!=j, yj*(x-xi)/(xj-xi)))
+    Sum(j, Prod(i!=j, yj*(x-xi)/(xj-xi))), as a list of coefficients
+    (computed in O(n^2) by Poly.interpolate())
     Usage:
         >>> gf8 = GF8()                 # Create the field GF(2^8)
         >>> thepoly = fit(((3,'05'),(2,'f4'),(5,'ab')), gf8)
@@ -618,22 +1071,7 @@ def fit(thepoints, thefield=None):  # Lagrange Interpolation
         >>> # thepoly(0) = '0x5a' is the split secret"""
     if (thefield == None):
         thefield = thepoints[0][1].field      # Field of first y value
-    ptslen = len(thepoints)
-    thepoly = ptslen*[thefield(0)]
-    xvals = [thefield(x) for x, y in thepoints]  # Should be a better way to do this
-    yvals = [thefield(y) for x, y in thepoints]
-    for i in range(ptslen):
-        theterm = [thefield(1)] + (ptslen-1)*[thefield(0)]
-        theprod = thefield(1)
-        for j in (j for j in range(ptslen) if (i != j)):
-            for k in range(ptslen-1,0,-1):  # Multiply theterm by (x - xi)
-                theterm[k] = theterm[k].add(theterm[k-1])
-                theterm[k-1] = theterm[k-1].mul(xvals[j]).neg()
-            theprod = theprod.mul(xvals[i].sub(xvals[j]))
-        theprod = yvals[i].div(theprod)
-        for k in range(ptslen):
-            thepoly[k] = thepoly[k].add(theterm[k].mul(theprod))
-    return thepoly
+    return Poly.interpolate(thefield, [(thefield(x), thefield(y)) for x, y in thepoints]).tolist()
 
 def eval(poly, xvalue):  # Evaluate poly at given value using Horner's Rule
     """Evaluate the polynomial at the point x = xvalue.  The polynomial is
@@ -646,9 +1084,1155 @@ def eval(poly, xvalue):  # Evaluate poly at given value using Horner's Rule
         >>> [hex(eval(thepoly,gf8(xval)).value) for xval in [0,3,2,5]]
         ['0x5a', '0x5', '0xf4', '0xab']
         >>> # thepoly(0) = '0x5a' is the split secret"""
+    if isinstance(poly, Poly): return poly.field(poly.eval(int(xvalue)))
     polydeg = len(poly)-1
     theval = poly[polydeg]
     for theindex in range(polydeg-1, -1, -1):
         theval = theval.mul(xvalue).add(poly[theindex])
     return theval  # Note: Value is in polyring.coeffring, not polyring
 
+
+########################## Array-backed Polynomials ###########################
+# Poly keeps the coefficients of a polynomial as plain integers: in an
+# array('B') over GF8, an array('H') of c0 + 256*c1 over GF16, and a list
+# over GFp and GF2m, and works on them with the integer arithmetic of the
+# field, rather than with a new element object for every operation.  Over
+# GF8 and GF16 adding and scaling polynomials are whole byte string
+# operations, as in evalbytes().  A Poly indexes and iterates as the list of
+# elements which fit() returns and eval() takes.
+###############################################################################
+
+def _GF8mulint(a, b):
+    return _GF8exp[_GF8log[a] + _GF8log[b]] if (a and b) else 0
+
+def _GF16mulint(a, b):  # (a0 + a1*z)(b0 + b1*z), with z^2 = z + 3A
+    a0, a1, b0, b1 = a & 0xff, a >> 8, b & 0xff, b >> 8
+    high = _GF8mulint(a1, b1)
+    return (_GF8mulint(a0, b0) ^ _GF8mulint(high, 0x3A)) | ((_GF8mulint(a0, b1) ^ _GF8mulint(a1, b0) ^ high) << 8)
+
+def _intarith(thefield):
+    """(add, sub, mul, inv) of thefield, on the integer values of its elements"""
+    if isinstance(thefield, GFp):
+        prime = thefield.prime
+        return (lambda a, b: (a + b) % prime, lambda a, b: (a - b) % prime, lambda a, b: a * b % prime,
+                lambda a: GFpelt(thefield, a).inv().value)
+    def xor(a, b): return a ^ b
+    if isinstance(thefield, GF8): return xor, xor, _GF8mulint, lambda a: _GF8exp[255 - _GF8log[a]]
+    if isinstance(thefield, GF16): return xor, xor, _GF16mulint, lambda a: int(GF16elt(a).inv())
+    return xor, xor, thefield._mul, thefield._inv
+
+def _polytypecode(thefield):
+    if isinstance(thefield, GF8): return 'B'
+    if isinstance(thefield, GF16): return 'H'
+    return None
+
+def _arraytobytes(thearray):  # Little-endian, as GF16 elements are laid out in shares
+    if (thearray.itemsize > 1) and (sys.byteorder == 'big'):
+        thearray = array.array(thearray.typecode, thearray)
+        thearray.byteswap()
+    return thearray.tostring() if _PY2 else thearray.tobytes()
+
+def _arrayfrombytes(typecode, data):
+    thearray = array.array(typecode)
+    if _PY2: thearray.fromstring(bytes(data))
+    else: thearray.frombytes(data)
+    if (thearray.itemsize > 1) and (sys.byteorder == 'big'): thearray.byteswap()
+    return thearray
+
+class Poly(object):
+    """The polynomial coeffs[0] + coeffs[1]*X + ... over thefield, with the
+    coefficients given as integers or elements, and held as integers in
+    self.coeffs.  Poly(thefield, fit(...)) converts from the list form, and
+    tolist() (or list()) back to it.
+    Usage:
+        >>> gf8 = GF8()
+        >>> thepoly = Poly(gf8, fit(((3,'05'),(2,'f4'),(5,'ab')), gf8))   # 5a + 93*X + 62*X^2
+        >>> list(thepoly.coeffs)
+        [90, 147, 98]
+        >>> [hex(thepoly.eval(x)) for x in (0, 3, 2, 5)]
+        ['0x5a', '0x5', '0xf4', '0xab']
+        >>> Poly.interpolate(gf8, [(3, 0x05), (2, 0xf4), (5, 0xab)]) == thepoly
+        True
+        >>> [hex(elt.value) for elt in thepoly.tolist()]
+        ['0x5a', '0x93', '0x62']
+        >>> list(Poly(gf8, [1, 1]).mullinear(1).coeffs)        # (1 + X)(X - 1) = 1 + X^2 over GF(2^8)
+        [1, 0, 1]
+        >>> list(Poly(gf8, [1, 1]).mul(Poly(gf8, [1, 1])).coeffs)   # (1 + X)^2 = 1 + X^2 over GF(2^8)
+        [1, 0, 1]
+        >>> gf101 = GFp(101)
+        >>> list(Poly(gf101, [1, 2]).mullinear(3).add(Poly(gf101, [5])).scale(2).coeffs)   # 2*((1 + 2X)(X - 3) + 5)
+        [4, 91, 4]"""
+
+    def __init__(self, thefield, coeffs=()):
+        self.field = thefield
+        self._arith = _intarith(thefield)
+        values = [int(thecoeff) for thecoeff in coeffs]
+        typecode = _polytypecode(thefield)
+        self.coeffs = values if typecode is None else array.array(typecode, values)
+
+    def _new(self, coeffs):  # A Poly over the same field, taking coeffs as they are
+        thepoly = Poly.__new__(Poly)
+        thepoly.field, thepoly._arith, thepoly.coeffs = self.field, self._arith, coeffs
+        return thepoly
+
+    def _bytes(self):
+        return _arraytobytes(self.coeffs)
+
+    def _frombytes(self, data):
+        return self._new(_arrayfrombytes(self.coeffs.typecode, data))
+
+    def __len__(self):
+        return len(self.coeffs)
+
+    def __getitem__(self, j):
+        return self.field(self.coeffs[j])
+
+    def __iter__(self):
+        for thecoeff in self.coeffs: yield self.field(thecoeff)
+
+    def tolist(self):
+        """The list of elements form, as fit() returns"""
+        return list(self)
+
+    def degree(self):
+        """The degree (-1 for the zero polynomial)"""
+        for j in range(len(self.coeffs) - 1, -1, -1):
+            if self.coeffs[j]: return j
+        return -1
+
+    def __eq__(self, other):  # Equal as polynomials, ignoring high zero coefficients
+        if not isinstance(other, Poly): return NotImplemented
+        d = self.degree()
+        return (self.field is other.field) and (d == other.degree()) and (list(self.coeffs[:d+1]) == list(other.coeffs[:d+1]))
+
+    def __ne__(self, other):
+        theresult = self.__eq__(other)
+        return theresult if theresult is NotImplemented else not theresult
+
+    def add(self, other):
+        """self + other"""
+        if len(self.coeffs) < len(other.coeffs): self, other = other, self
+        if isinstance(self.coeffs, array.array):
+            mine, theirs = self._bytes(), other._bytes()
+            return self._frombytes(_xorbytes(mine, theirs + bytes(bytearray(len(mine) - len(theirs)))))
+        add = self._arith[0]
+        return self._new([add(a, b) for a, b in zip(self.coeffs, other.coeffs)] + self.coeffs[len(other.coeffs):])
+
+    def scale(self, c):
+        """c * self, for c an integer or element"""
+        c = int(c)
+        if isinstance(self.coeffs, array.array):
+            return self._frombytes(_mulbytes[type(self.field).__name__](self._bytes(), c))
+        mul = self._arith[2]
+        return self._new([mul(thecoeff, c) for thecoeff in self.coeffs])
+
+    def mullinear(self, a):
+        """self * (X - a), for a an integer or element"""
+        a = int(a)
+        if isinstance(self.coeffs, array.array):   # X*self + a*self, over GF(2^n)
+            width = self.coeffs.itemsize
+            data = self._bytes()
+            zero = bytes(bytearray(width))
+            return self._frombytes(_xorbytes(zero + data, _mulbytes[type(self.field).__name__](data, a) + zero))
+        sub, mul = self._arith[1], self._arith[2]
+        thecoeffs = self.coeffs
+        return self._new([sub(0, mul(thecoeffs[0], a))] + [sub(thecoeffs[j-1], mul(thecoeffs[j], a)) for j in range(1, len(thecoeffs))] + [thecoeffs[-1]])
+
+    def mul(self, other):
+        """self * other"""
+        if not (self.coeffs and other.coeffs): return self._new(self.coeffs[:0])
+        length = len(self.coeffs) + len(other.coeffs) - 1
+        if isinstance(self.coeffs, array.array):   # Sum(j, other[j]*self*X^j), a whole byte string per term
+            width = self.coeffs.itemsize
+            data = self._bytes()
+            mulbytes = _mulbytes[type(self.field).__name__]
+            total = 0
+            for j, c in enumerate(other.coeffs):
+                if c: total ^= _bytes2int(mulbytes(data, c)) << (8*width*(length - len(self.coeffs) - j))
+            return self._frombytes(_int2bytes(total, width*length))
+        add, mul = self._arith[0], self._arith[2]
+        thecoeffs = [0] * length
+        for j, c in enumerate(other.coeffs):
+            if not c: continue
+            for i, d in enumerate(self.coeffs): thecoeffs[i+j] = add(thecoeffs[i+j], mul(d, c))
+        return self._new(thecoeffs)
+
+    def divlinear(self, a):
+        """(quotient, remainder) of self divided by (X - a), by synthetic division"""
+        a = int(a)
+        thecoeffs = self.coeffs
+        if not thecoeffs: return self._new(thecoeffs[:]), 0
+        quotient = thecoeffs[1:]   # Overwritten from the top: q[j-1] = c[j] + a*q[j]
+        if isinstance(self.field, GF8):
+            loga = _GF8log[a] if a else None
+            carry = 0
+            for j in range(len(quotient) - 1, -1, -1):
+                carry = thecoeffs[j+1] ^ (_GF8exp[_GF8log[carry] + loga] if (carry and a) else 0)
+                quotient[j] = carry
+            return self._new(quotient), thecoeffs[0] ^ (_GF8exp[_GF8log[carry] + loga] if (carry and a) else 0)
+        add, mul = self._arith[0], self._arith[2]
+        carry = 0
+        for j in range(len(quotient) - 1, -1, -1):
+            carry = add(thecoeffs[j+1], mul(carry, a))
+            quotient[j] = carry
+        return self._new(quotient), add(thecoeffs[0], mul(carry, a))
+
+    def eval(self, x):
+        """The value at x (an integer or element), as an integer, by Horner's rule"""
+        x = int(x)
+        if not self.coeffs: return 0
+        if isinstance(self.field, GF8):
+            if x == 0: return self.coeffs[0]
+            logx = _GF8log[x]
+            theval = 0
+            for thecoeff in reversed(self.coeffs):
+                theval = (_GF8exp[_GF8log[theval] + logx] if theval else 0) ^ thecoeff
+            return theval
+        add, mul = self._arith[0], self._arith[2]
+        theval = 0
+        for thecoeff in reversed(self.coeffs): theval = add(mul(theval, x), thecoeff)
+        return theval
+
+    @staticmethod
+    def interpolate(thefield, thepoints):
+        """The polynomial of degree < n through the n points [(x, y), ...]
+        (integers or elements), by Lagrange interpolation as fit() does, in
+        O(n^2): the master polynomial M(X) = Prod(i, X - xi) is built once,
+        the numerator of each basis polynomial is M(X)/(X - xi) by synthetic
+        division, and its value at xi, the denominator, is inverted together
+        with the others by _batch_inverse()."""
+        add, sub, mul, inv = _intarith(thefield)
+        xs = [int(x) for x, y in thepoints]
+        if len(set(xs)) != len(xs): raise ZeroDivisionError("Two points have the same x value, in {0:}".format(xs))
+        master = Poly(thefield, [1])
+        for x in xs: master = master.mullinear(x)
+        numerators = [master.divlinear(x)[0] for x in xs]
+        inverses = _batch_inverse([numerator.eval(x) for numerator, x in zip(numerators, xs)], mul, inv)
+        theresult = Poly(thefield, [0] * len(xs))
+        for numerator, (x, y), theinv in zip(numerators, thepoints, inverses):
+            theresult = theresult.add(numerator.scale(mul(int(y), theinv)))
+        return theresult
+
+
+############################# Secret Splitting ################################
+# The higher level API: split a whole secret (a byte string) into n shares,
+# any k of which recover it.  The secret is cut into slices of
+# field.secretbytes bytes, and each slice is split separately over the field
+# with its own random polynomial.  A share is the pair (x, y), with y the
+# concatenation of the values at x of every slice's polynomial, each written
+# in field.eltbytes bytes.
+###############################################################################
+
+def _lagrange_weights(xvals, thefield, at=None):
+    """Return the weights w_i such that f(0) = Sum(i, w_i*f(x_i)) for every
+    polynomial f of degree less than len(xvals), i.e. the Lagrange basis
+    polynomials evaluated at zero: w_i = Prod(j!=i, xj/(xj-xi)), or at the
+    point at: w_i = Prod(j!=i, (at-xj)/(xi-xj))
+    Usage:
+        >>> gf101 = GFp(101)
+        >>> [w.value for w in _lagrange_weights([gf101(1), gf101(4), gf101(5)], gf101)]
+        [69, 32, 1]
+        >>> (69*35 + 32*95 + 1*41) % 101       # The secret of the 3-of-5 example above
+        42"""
+    if at is None:
+        weights = _small_weights(xvals, thefield)
+        if weights is not None: return weights
+    weights = []
+    for i in range(len(xvals)):
+        thenum = thefield(1)
+        theden = thefield(1)
+        for j in (j for j in range(len(xvals)) if (i != j)):
+            if at is None:
+                thenum = thenum.mul(xvals[j])
+                theden = theden.mul(xvals[j].sub(xvals[i]))
+            else:
+                thenum = thenum.mul(at.sub(xvals[j]))
+                theden = theden.mul(xvals[i].sub(xvals[j]))
+        weights.append(thenum.div(theden))
+    return weights
+
+# Share indices are almost always the small integers 1, 2, ..., n, and then
+# the weights at zero need no general field arithmetic.  For x_i = a..b over
+# GFp, w_i = (-1)^(i-a) * (b!/(a-1)!)/i / ((i-a)!(b-i)!), from tables of
+# factorials and their inverses mod p.  Over GF8 (and GF16, where x < 256 is
+# in the subfield GF8) a weight is a sum and difference of logs, since
+# x_j - x_i is the XOR x_j ^ x_i, and over GF(2^m) the products are of small
+# integers, with a single inversion for all the weights.
+
+SMALLINDEX = 4096   # Largest share index taking the closed form paths
+_GFpfactorials = {}   # prime --> ([n! mod p], [1/n! mod p]), replaced by longer tables as needed
+_GFpfactorials_lock = threading.Lock()
+
+def _GFpfactorial_tables(prime, top):
+    # A published pair of tables is never changed, so readers need no lock:
+    # longer ones are built aside and swapped in whole
+    fact, invfact = _GFpfactorials.get(prime, ([1], [1]))
+    if len(fact) > top: return fact, invfact
+    with _GFpfactorials_lock:
+        fact, invfact = _GFpfactorials.get(prime, ([1], [1]))
+        if len(fact) > top: return fact, invfact
+        fact = fact[:]
+        for m in range(len(fact), top + 1): fact.append(fact[-1] * m % prime)
+        invfact = (top + 1)*[0]
+        invfact[top] = GFpelt(GFp(prime), fact[top]).inv().value
+        for m in range(top, 0, -1): invfact[m-1] = invfact[m] * m % prime
+        _GFpfactorials[prime] = (fact, invfact)
+    return fact, invfact
+
+def _batch_inverse(values, mul, inv):
+    """The inverses of the (nonzero) values with a single inversion
+    (Montgomery's trick), given the field's mul and inv of integers"""
+    if not values: return []
+    prefix = [values[0]]
+    for value in values[1:]: prefix.append(mul(prefix[-1], value))
+    theinv = inv(prefix[-1])
+    inverses = len(values)*[0]
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = mul(theinv, prefix[i-1])
+        theinv = mul(theinv, values[i])
+    inverses[0] = theinv
+    return inverses
+
+def _small_weights(xvals, thefield):
+    """The weights of _lagrange_weights() in closed form, if every x is a
+    small integer (else None)
+    Usage:
+        >>> for thefield in (GF8(), GF16(), GFp(2**127 - 1), GF2m(64)):
+        ...     for xs in ([1, 2, 3], [4, 5, 6, 7], [2, 9, 200, 17]):
+        ...         xvals = [thefield(x) for x in xs]
+        ...         fast, general = _small_weights(xvals, thefield), _lagrange_weights(xvals, thefield, thefield(0))
+        ...         assert [int(w) for w in fast] == [int(w) for w in general]
+        >>> [int(w) for w in _small_weights([GFp(101)(x) for x in (1, 2, 3)], GFp(101))]   # 3, -3, 1
+        [3, 98, 1]"""
+    xs = [int(x) for x in xvals]
+    if (not xs) or (min(xs) < 1) or (max(xs) > SMALLINDEX): return None
+    if isinstance(thefield, GFp):
+        prime = thefield.prime
+        if max(xs) >= prime: return None
+        fact, invfact = _GFpfactorial_tables(prime, max(xs))
+        a, b = min(xs), max(xs)
+        if sorted(xs) == list(range(a, b + 1)):  # Contiguous: factorials only
+            product = fact[b] * invfact[a-1] % prime    # a*(a+1)*...*b
+            return [GFpelt(thefield, (-1 if (i - a) % 2 else 1) * product * invfact[i] * fact[i-1] * invfact[i-a] * invfact[b-i])
+                    for i in xs]
+        dens = []
+        for i in xs:
+            theden = 1
+            for j in xs:
+                if j != i: theden = theden * (j - i) % prime
+            dens.append(theden * i % prime)
+        product = 1
+        for j in xs: product = product * j % prime
+        return [GFpelt(thefield, product * theinv) for theinv in _batch_inverse(dens, lambda u, v: u * v % prime, lambda u: GFpelt(thefield, u).inv().value)]
+    if isinstance(thefield, (GF8, GF16)):
+        if max(xs) > 255: return None
+        logs = [_GF8log[x] for x in xs]
+        total = sum(logs)
+        weights = []
+        for i, x in enumerate(xs):
+            thelog = total - logs[i]
+            for y in xs:
+                if y != x: thelog -= _GF8log[x ^ y]
+            weights.append(_GF8exp[thelog % 255])
+        return [thefield(w) for w in weights]
+    if isinstance(thefield, GF2m):
+        mul = thefield._mul
+        nums, dens = [], []
+        for x in xs:
+            thenum, theden = 1, 1
+            for y in xs:
+                if y != x: thenum, theden = mul(thenum, y), mul(theden, x ^ y)
+            nums.append(thenum)
+            dens.append(theden)
+        return [GF2melt(thefield, mul(thenum, theinv)) for thenum, theinv in zip(nums, _batch_inverse(dens, mul, thefield._inv))]
+    return None
+
+def split(secret, k, n, thefield=None, engine=None):
+    """Split the byte string secret into the n shares [(1, y1), ..., (n, yn)],
+    any k of which can be used to recover it.  Each byte slice of the secret
+    is the constant term of its own random polynomial of degree k-1 over
+    thefield (default GF8), and yi is the list of values of those polynomials
+    at x = i.  The secret length must be a multiple of thefield.secretbytes.
+    The work is done by the named engine, by default the one measured to be
+    the fastest on this host (see select_engine()).
+    Usage:
+        >>> secret = bytearray(range(32))        # A 256-bit key
+        >>> shares = split(secret, 3, 5)         # 3-of-5 split over GF8
+        >>> [(x, len(y)) for x, y in shares]
+        [(1, 32), (2, 32), (3, 32), (4, 32), (5, 32)]
+        >>> recover([shares[0], shares[3], shares[4]]) == secret
+        True
+        >>> gf257 = GFp(2**256 + 297)            # First prime larger than 2^256
+        >>> shares = split(secret, 2, 3, gf257)  # Whole key as one element
+        >>> [(x, len(y)) for x, y in shares]
+        [(1, 33), (2, 33), (3, 33)]
+        >>> recover(shares[1:], gf257) == secret
+        True
+        >>> shares = split(secret, 3, 5, engine='object')   # The element by element reference
+        >>> recover(shares[2:], engine='bytes') == secret
+        True"""
+    if thefield is None: thefield = GF8()
+    if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+    if n >= thefield.order: raise ValueError("Cannot create {0:} distinct shares over a field of order {1:}".format(n, thefield.order))
+    if (thefield.secretbytes == 0) or (len(secret) % thefield.secretbytes != 0):
+        raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), thefield.secretbytes))
+    return _engine(thefield, 'split', engine, k, n, len(secret))(secret, k, n, thefield)
+
+def recover(shares, thefield=None, engine=None):
+    """Recover the secret from a list of at least k of the shares [(x, y), ...]
+    created by split() over thefield (default GF8).  The Lagrange weights are
+    computed once for the given x values, and then applied to every slice.
+    Usage:
+        >>> gf16 = GF16()
+        >>> shares = split(b'Life, the Universe, ...!', 4, 6, gf16)
+        >>> recover(shares[2:], gf16) == b'Life, the Universe, ...!'
+        True"""
+    if thefield is None: thefield = GF8()
+    xs = [x for x, y in shares]
+    if len(set(xs)) != len(xs): raise ValueError("Duplicate share index in {0:}".format(xs))
+    width = thefield.eltbytes
+    length = len(shares[0][1])
+    if (length % width != 0) or any(len(y) != length for x, y in shares):
+        raise ValueError("Shares must all have the same length, a multiple of {0:} bytes".format(width))
+    return _engine(thefield, 'recover', engine, len(shares), len(shares), length // width * thefield.secretbytes)(shares, thefield)
+
+def split_many(secrets, k, n, thefield=None, engine=None):
+    """Split each of a list of secrets k-of-n, returning a list with the
+    shares of each secret, as split() would.  Splitting is done slice by
+    slice, so the secrets are simply split together and the shares cut
+    apart again: the per call costs are paid once for the whole batch.
+    Usage:
+        >>> sharelists = split_many([b'first key', b'second key'], 2, 3)
+        >>> [[(x, len(y)) for x, y in shares] for shares in sharelists]
+        [[(1, 9), (2, 9), (3, 9)], [(1, 10), (2, 10), (3, 10)]]
+        >>> recover(sharelists[1][:2]) == b'second key'
+        True"""
+    if thefield is None: thefield = GF8()
+    for secret in secrets:
+        if len(secret) % thefield.secretbytes != 0:
+            raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), thefield.secretbytes))
+    shares = split(b''.join(secrets), k, n, thefield, engine)
+    sharelists = []
+    offset = 0
+    for secret in secrets:
+        length = len(secret) // thefield.secretbytes * thefield.eltbytes
+        sharelists.append([(x, y[offset:offset+length]) for x, y in shares])
+        offset += length
+    return sharelists
+
+def recover_many(sharelists, thefield=None, engine=None):
+    """Recover a list of secrets, given a list with the shares of each, where
+    every secret was split over thefield and its shares have the same x
+    values, in the same order.  The shares are joined and recovered in one
+    pass, sharing the Lagrange weights, and the secrets cut apart again.
+    Usage:
+        >>> sharelists = split_many([b'first key', b'second key'], 2, 3)
+        >>> recover_many([shares[1:] for shares in sharelists]) == [b'first key', b'second key']
+        True
+        >>> recover_many([sharelists[0][1:], [sharelists[1][1], (3, sharelists[1][2][1][:-1])]])
+        Traceback (most recent call last):
+        ...
+        ValueError: The shares of each secret must all be the same length, a multiple of 1 bytes"""
+    if thefield is None: thefield = GF8()
+    xs = [x for x, y in sharelists[0]]
+    for shares in sharelists[1:]:
+        if [x for x, y in shares] != xs: raise ValueError("Every secret must be recovered from shares with the same x values")
+    for shares in sharelists:   # The shares are joined column-wise, so a short one would shift every later secret
+        length = len(shares[0][1])
+        if (length % thefield.eltbytes != 0) or any(len(y) != length for x, y in shares):
+            raise ValueError("The shares of each secret must all be the same length, a multiple of {0:} bytes".format(thefield.eltbytes))
+    thesecret = recover([(x, b''.join(shares[i][1] for shares in sharelists)) for i, x in enumerate(xs)], thefield, engine)
+    secrets = []
+    offset = 0
+    for shares in sharelists:
+        length = len(shares[0][1]) // thefield.eltbytes * thefield.secretbytes
+        secrets.append(thesecret[offset:offset+length])
+        offset += length
+    return secrets
+
+# split_into() and recover_into() read their input from, and write their
+# output into, any buffers (bytes, bytearray, memoryview, mmap, array,
+# NumPy arrays, ...) through memoryviews, INTOBYTES bytes of secret at a
+# time.  The engines still make their intermediate byte strings, but only
+# one step's worth, and the whole secret is never copied.
+
+INTOBYTES = 65536   # Bytes of secret per step of split_into()/recover_into()
+
+try:
+    _memoryview = memoryview
+except NameError:   # Python 2.6
+    _memoryview = None
+
+def _byteview(buffer):
+    """A flat view of the bytes of buffer (the buffer itself without memoryview, on Python 2.6)"""
+    if _memoryview is None: return buffer
+    theview = _memoryview(buffer)
+    if not _PY2 and ((theview.ndim != 1) or (theview.format != 'B')): theview = theview.cast('B')
+    return theview
+
+def _piece(theview, start, stop):  # A slice to hand to an engine (Python 2 engines need a str)
+    return theview[start:stop].tobytes() if _PY2 and (_memoryview is not None) else theview[start:stop]
+
+def split_into(secret, k, outputs, thefield=None, engine=None):
+    """Split the secret k-of-n as split() does, with n = len(outputs), and
+    write the share y of x = i into outputs[i-1], which must be writable
+    buffers of the share length.  secret can be any buffer.
+    Usage:
+        >>> secret = bytearray(range(32))
+        >>> outputs = [bytearray(32) for x in range(5)]
+        >>> split_into(memoryview(secret), 3, outputs)
+        >>> recover(list(zip((1, 2, 5), (outputs[0], outputs[1], outputs[4])))) == secret
+        True
+        >>> split_into(secret, 3, [bytearray(31)] * 5)
+        Traceback (most recent call last):
+        ...
+        ValueError: Every output must be 32 bytes long"""
+    if thefield is None: thefield = GF8()
+    n = len(outputs)
+    if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+    if n >= thefield.order: raise ValueError("Cannot create {0:} distinct shares over a field of order {1:}".format(n, thefield.order))
+    secretview = _byteview(secret)
+    width, slicebytes = thefield.eltbytes, thefield.secretbytes
+    if (slicebytes == 0) or (len(secretview) % slicebytes != 0):
+        raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secretview), slicebytes))
+    outviews = [_byteview(output) for output in outputs]
+    sharelength = len(secretview) // slicebytes * width
+    if any(len(outview) != sharelength for outview in outviews): raise ValueError("Every output must be {0:} bytes long".format(sharelength))
+    step = max(1, INTOBYTES // slicebytes) * slicebytes
+    function = _engine(thefield, 'split', engine, k, n, min(step, len(secretview)))
+    for start in range(0, len(secretview), step):
+        stop = min(start + step, len(secretview))
+        outstart = start // slicebytes * width
+        for outview, (x, y) in zip(outviews, function(_piece(secretview, start, stop), k, n, thefield)):
+            outview[outstart:outstart+len(y)] = y
+
+def recover_into(shares, output, thefield=None, engine=None):
+    """Recover the secret from at least k shares [(x, y), ...] as recover()
+    does, with the y any buffers, and write it into output, a writable
+    buffer of the secret's length.
+    Usage:
+        >>> shares = split(b'0123456789abcdef', 2, 3, GF16())
+        >>> output = bytearray(16)
+        >>> recover_into([(x, memoryview(y)) for x, y in shares[1:]], output, GF16())
+        >>> bytes(output) == b'0123456789abcdef'
+        True
+        >>> recover_into(shares[1:], bytearray(0), GFp(101))
+        Traceback (most recent call last):
+        ...
+        ValueError: The field is too small to carry a byte of the secret in each slice"""
+    if thefield is None: thefield = GF8()
+    xs = [x for x, y in shares]
+    if not xs: raise ValueError("No shares to recover from")
+    if len(set(xs)) != len(xs): raise ValueError("Duplicate share index in {0:}".format(xs))
+    width, slicebytes = thefield.eltbytes, thefield.secretbytes
+    if slicebytes == 0: raise ValueError("The field is too small to carry a byte of the secret in each slice")
+    views = [_byteview(y) for x, y in shares]
+    length = len(views[0])
+    if (length % width != 0) or any(len(theview) != length for theview in views):
+        raise ValueError("Shares must all have the same length, a multiple of {0:} bytes".format(width))
+    outview = _byteview(output)
+    if len(outview) != length // width * slicebytes: raise ValueError("The output must be {0:} bytes long".format(length // width * slicebytes))
+    step = max(1, INTOBYTES // slicebytes) * width
+    function = _engine(thefield, 'recover', engine, len(shares), len(shares), min(step, length) // width * slicebytes)
+    for start in range(0, length, step):
+        stop = min(start + step, length)
+        thesecret = function([(x, _piece(theview, start, stop)) for x, theview in zip(xs, views)], thefield)
+        outstart = start // width * slicebytes
+        outview[outstart:outstart+len(thesecret)] = thesecret
+
+
+################################# Engines #####################################
+# An engine is one implementation of split() or recover() for one kind of
+# field.  'object' works with field elements, one slice at a time, and is the
+# reference; the others work on whole byte strings or plain integers.
+# Engines are registered by (field kind, operation) in order of preference,
+# and split()/recover() use the one which a short benchmark on first use
+# found fastest for the field, k, n and (rounded) secret length.  'object'
+# is never benchmarked (at k = 30 it alone took seconds), only used when
+# nothing else is available, and the benchmark stops after
+# CALIBRATION_BUDGET seconds.  The choices are cached in a JSON file (see
+# engine_cache_path()), so each host calibrates once and then keeps its own
+# choice; call select_engine() at startup to calibrate ahead of the first
+# request.
+###############################################################################
+
+def _split_object(secret, k, n, thefield):
+    xvals = [thefield(x) for x in range(1, n+1)]
+    theshares = [[] for x in xvals]
+    for i in range(0, len(secret), thefield.secretbytes):
+        thepoly = [thefield.frombytes(secret[i:i+thefield.secretbytes])] + [thefield.random() for j in range(k-1)]
+        for theshare, xval in zip(theshares, xvals):
+            theshare.append(thefield.tobytes(eval(thepoly, xval)))
+    return [(x, b''.join(theshare)) for x, theshare in zip(range(1, n+1), theshares)]
+
+def _recover_object(shares, thefield):
+    width = thefield.eltbytes
+    weights = _lagrange_weights([thefield(x) for x, y in shares], thefield)
+    thesecret = []
+    for i in range(0, len(shares[0][1]), width):
+        theval = thefield(0)
+        for theweight, (x, y) in zip(weights, shares):
+            theval = theval.add(thefield.frombytes(y[i:i+width]).mul(theweight))
+        thesecret.append(thefield.tobytes(theval, thefield.secretbytes))
+    return b''.join(thesecret)
+
+###### 'bytes' engine: GF8 and GF16, a whole byte string at a time.
+# Multiplying every byte of a string by the same GF8 constant is a single
+# bytes.translate() through that constant's multiplication table, and the
+# addition of two strings is an XOR of the two as big integers.  Over GF16,
+# a product (a0 + a1*z)*(x0 + x1*z) is
+#   (a0*x0 + 3A*a1*x1) + (a0*x1 + a1*(x0 + x1))*z
+# so works on the planes of even (a0) and odd (a1) bytes; when x is in GF8
+# (x1 = 0, as for every x in split()) it is just a GF8 product.
+
+_GF8multables = 256*[None]   # _GF8multables[x] is the translate() table of a --> a*x
+
+def _GF8multable(x):
+    table = _GF8multables[x]
+    if table is None:
+        if x == 0: table = bytes(bytearray(256))
+        else: table = bytes(bytearray([0] + [_GF8exp[_GF8log[a] + _GF8log[x]] for a in range(1, 256)]))
+        _GF8multables[x] = table
+    return table
+
+def _xorbytes(a, b):
+    return _int2bytes(_bytes2int(a) ^ _bytes2int(b), len(a))
+
+def _GF8mulbytes(data, x):
+    return data.translate(_GF8multable(x))
+
+def _GF16mulbytes(data, x):
+    x0, x1 = x & 0xff, x >> 8
+    if x1 == 0: return data.translate(_GF8multable(x0))
+    a0, a1 = data[0::2], data[1::2]
+    theproduct = bytearray(len(data))
+    theproduct[0::2] = _xorbytes(a0.translate(_GF8multable(x0)), a1.translate(_GF8multable(GF16.m.mul(GF8elt(x1)).value)))
+    theproduct[1::2] = _xorbytes(a0.translate(_GF8multable(x1)), a1.translate(_GF8multable(x0 ^ x1)))
+    return bytes(theproduct)
+
+_mulbytes = {'GF8': _GF8mulbytes, 'GF16': _GF16mulbytes}
+
+def evalbytes(planes, x, thefield=None):
+    """Evaluate at x, by Horner's rule, many polynomials over thefield (GF8,
+    the default, or GF16) at once.  planes[j] is the byte string of the
+    coefficients of x^j of every polynomial, and the result the byte string
+    of their values, each element in thefield.eltbytes bytes.
+    Usage:
+        >>> # 5a + 93*x + 62*x^2 (from the fit() example) and 01 + x^2, at x = 3
+        >>> planes = [bytearray.fromhex('5a01'), bytearray.fromhex('9300'), bytearray.fromhex('6201')]
+        >>> evalbytes(planes, 3) == bytes(bytearray.fromhex('0504'))
+        True"""
+    if thefield is None: thefield = GF8()
+    mulbytes = _mulbytes[type(thefield).__name__]
+    theval = bytes(planes[-1])
+    for theplane in reversed(planes[:-1]):
+        theval = _xorbytes(mulbytes(theval, int(x)), bytes(theplane))
+    return theval
+
+def combinebytes(planes, weights, thefield=None):
+    """The linear combination Sum(i, weights[i]*planes[i]) of byte strings of
+    elements of thefield (GF8, the default, or GF16), all the same length
+    Usage:
+        >>> combinebytes([bytearray.fromhex('0102'), bytearray.fromhex('0303')], [GF8elt(2), 1]) == bytes(bytearray.fromhex('0107'))
+        True"""
+    if thefield is None: thefield = GF8()
+    mulbytes = _mulbytes[type(thefield).__name__]
+    theval = 0
+    for theplane, theweight in zip(planes, weights):
+        theval ^= _bytes2int(mulbytes(bytes(theplane), int(theweight)))
+    return _int2bytes(theval, len(planes[0]))
+
+def _split_bytes(secret, k, n, thefield):
+    randoms = _pool.bytes((k-1) * len(secret))   # One draw, cut into the k-1 coefficient planes
+    coeffs = [bytes(secret)] + [randoms[j*len(secret):(j+1)*len(secret)] for j in range(k-1)]
+    return [(x, evalbytes(coeffs, x, thefield)) for x in range(1, n+1)]
+
+def _recover_bytes(shares, thefield):
+    weights = _lagrange_weights([thefield(x) for x, y in shares], thefield)
+    return combinebytes([y for x, y in shares], weights, thefield)
+
+###### 'int' engine: GFp and GF2m, with slices as plain integers
+
+def _randomvalues(thefield, count):
+    """count random elements of thefield (GFp or GF2m) as integers, from one draw on the pool"""
+    if isinstance(thefield, GFp): return _pool.below(thefield.prime, count)
+    width = thefield.eltbytes
+    shift = 8*width - thefield.degree
+    data = _pool.bytes(count * width)
+    return [_bytes2int(data[i:i+width]) >> shift for i in range(0, len(data), width)]
+
+def _randomelements(thefield, count):
+    """count random elements of thefield as one byte string, eltbytes bytes each"""
+    if isinstance(thefield, (GF8, GF16)): return _pool.bytes(count * thefield.eltbytes)
+    return b''.join(_int2bytes(value, thefield.eltbytes) for value in _randomvalues(thefield, count))
+
+def _split_int(secret, k, n, thefield):
+    secretbytes, eltbytes = thefield.secretbytes, thefield.eltbytes
+    if isinstance(thefield, GFp):
+        prime = thefield.prime
+        def step(theval, x, thecoeff): return (theval*x + thecoeff) % prime
+    else:
+        fieldmul = thefield._mul
+        def step(theval, x, thecoeff): return fieldmul(theval, x) ^ thecoeff
+    randoms = iter(_randomvalues(thefield, len(secret) // secretbytes * (k-1)))
+    theshares = [[] for x in range(n)]
+    for i in range(0, len(secret), secretbytes):
+        coeffs = [_bytes2int(secret[i:i+secretbytes])] + [next(randoms) for j in range(k-1)]
+        for x in range(1, n+1):
+            theval = coeffs[-1]
+            for thecoeff in reversed(coeffs[:-1]): theval = step(theval, x, thecoeff)
+            theshares[x-1].append(_int2bytes(theval, eltbytes))
+    return [(x, b''.join(theshare)) for x, theshare in zip(range(1, n+1), theshares)]
+
+def _recover_int(shares, thefield):
+    secretbytes, width = thefield.secretbytes, thefield.eltbytes
+    weights = [theweight.value for theweight in _lagrange_weights([thefield(x) for x, y in shares], thefield)]
+    thesecret = []
+    for i in range(0, len(shares[0][1]), width):
+        if isinstance(thefield, GFp):  # Reduce once, after summing the products
+            theval = sum(theweight*_bytes2int(y[i:i+width]) for theweight, (x, y) in zip(weights, shares)) % thefield.prime
+        else:
+            theval = 0
+            for theweight, (x, y) in zip(weights, shares): theval ^= thefield._mul(_bytes2int(y[i:i+width]), theweight)
+        if theval >> (8*secretbytes): raise ValueError("Recovered slice {0:x} does not fit in {1:} bytes".format(theval, secretbytes))
+        thesecret.append(_int2bytes(theval, secretbytes))
+    return b''.join(thesecret)
+
+###### Optional engines, registered only when their module imports
+
+def _split_gmpy2(secret, k, n, thefield):  # GFp, with gmpy2 integers
+    import gmpy2
+    prime = gmpy2.mpz(thefield.prime)
+    secretbytes, eltbytes = thefield.secretbytes, thefield.eltbytes
+    randoms = iter(_pool.below(thefield.prime, len(secret) // secretbytes * (k-1)))
+    theshares = [[] for x in range(n)]
+    for i in range(0, len(secret), secretbytes):
+        coeffs = [gmpy2.mpz(_bytes2int(secret[i:i+secretbytes]))] + [gmpy2.mpz(next(randoms)) for j in range(k-1)]
+        for x in range(1, n+1):
+            theval = coeffs[-1]
+            for thecoeff in reversed(coeffs[:-1]): theval = gmpy2.f_mod(theval*x + thecoeff, prime)
+            theshares[x-1].append(_int2bytes(int(theval), eltbytes))
+    return [(x, b''.join(theshare)) for x, theshare in zip(range(1, n+1), theshares)]
+
+def _recover_gmpy2(shares, thefield):
+    import gmpy2
+    secretbytes, width = thefield.secretbytes, thefield.eltbytes
+    prime = gmpy2.mpz(thefield.prime)
+    weights = [gmpy2.mpz(theweight.value) for theweight in _lagrange_weights([thefield(x) for x, y in shares], thefield)]
+    thesecret = []
+    for i in range(0, len(shares[0][1]), width):
+        theval = int(gmpy2.f_mod(sum(theweight*gmpy2.mpz(_bytes2int(y[i:i+width])) for theweight, (x, y) in zip(weights, shares)), prime))
+        if theval >> (8*secretbytes): raise ValueError("Recovered slice {0:x} does not fit in {1:} bytes".format(theval, secretbytes))
+        thesecret.append(_int2bytes(theval, secretbytes))
+    return b''.join(thesecret)
+
+def _split_numpy(secret, k, n, thefield):  # GF8, with table lookups on uint8 arrays
+    import numpy
+    coeffs = [numpy.frombuffer(bytes(secret), dtype=numpy.uint8)] + [numpy.frombuffer(_pool.bytes(len(secret)), dtype=numpy.uint8) for j in range(k-1)]
+    theshares = []
+    for x in range(1, n+1):
+        table = numpy.frombuffer(_GF8multable(x), dtype=numpy.uint8)
+        theval = coeffs[-1]
+        for thecoeff in reversed(coeffs[:-1]): theval = numpy.bitwise_xor(table[theval], thecoeff)
+        theshares.append((x, theval.tobytes()))
+    return theshares
+
+def _recover_numpy(shares, thefield):
+    import numpy
+    weights = _lagrange_weights([thefield(x) for x, y in shares], thefield)
+    theval = numpy.zeros(len(shares[0][1]), dtype=numpy.uint8)
+    for theweight, (x, y) in zip(weights, shares):
+        theval ^= numpy.frombuffer(_GF8multable(theweight.value), dtype=numpy.uint8)[numpy.frombuffer(bytes(y), dtype=numpy.uint8)]
+    return theval.tobytes()
+
+###### The registry
+
+_engines = {}          # (field kind, operation) --> [(name, function, module needed)], best guess first
+_engine_available = {} # module name --> whether it imports
+_engine_choices = {}   # calibration key --> engine name
+_engine_timings = {}   # calibration key --> {engine name: seconds}
+_engine_loaded = []    # [path] of the cache file once it has been read
+
+# Calibration lengths: a secret of up to 64 bytes is timed as 64 bytes, etc.
+_engine_lengths = ((64, 'short'), (2048, 'medium'), (None, 'long'))
+_engine_sample = {'short': 64, 'medium': 1024, 'long': 4096}
+CALIBRATION_BUDGET = 0.05   # Seconds of benchmarking per calibration key, after the first run of the first engine
+
+def register_engine(kind, operation, name, function, module=None):
+    """Register function as the engine name for operation ('split' or
+    'recover') over fields of the given kind (the class name, 'GF8' etc.).
+    If module is given, the engine is only used when that module imports."""
+    _engines.setdefault((kind, operation), []).append((name, function, module))
+
+for _kind in ('GF8', 'GF16'):
+    register_engine(_kind, 'split', 'bytes', _split_bytes)
+    register_engine(_kind, 'recover', 'bytes', _recover_bytes)
+for _kind in ('GFp', 'GF2m'):
+    register_engine(_kind, 'split', 'int', _split_int)
+    register_engine(_kind, 'recover', 'int', _recover_int)
+register_engine('GFp', 'split', 'gmpy2', _split_gmpy2, 'gmpy2')
+register_engine('GFp', 'recover', 'gmpy2', _recover_gmpy2, 'gmpy2')
+register_engine('GF8', 'split', 'numpy', _split_numpy, 'numpy')
+register_engine('GF8', 'recover', 'numpy', _recover_numpy, 'numpy')
+for _kind in ('GF8', 'GF16', 'GFp', 'GF2m'):
+    register_engine(_kind, 'split', 'object', _split_object)
+    register_engine(_kind, 'recover', 'object', _recover_object)
+del _kind
+
+def _isavailable(module):
+    if module is None: return True
+    if module not in _engine_available:
+        try:
+            __import__(module)
+            _engine_available[module] = True
+        except ImportError:
+            _engine_available[module] = False
+    return _engine_available[module]
+
+def engines(thefield, operation):
+    """The names of the engines available for operation over thefield
+    Usage:
+        >>> 'object' in engines(GF8(), 'split'), engines(GF16(), 'recover')
+        (True, ['bytes', 'object'])
+        >>> engines(GFp(101), 'split')[0], engines(GF2m(64), 'recover')
+        ('int', ['int', 'object'])"""
+    return [name for name, function, module in _engines.get((type(thefield).__name__, operation), ()) if _isavailable(module)]
+
+def _fieldlabel(thefield):
+    if isinstance(thefield, GFp): return "GFp{0:}".format(_bitlength(thefield.prime))
+    if isinstance(thefield, GF2m): return "GF2^{0:}".format(thefield.degree)
+    return type(thefield).__name__
+
+def _engine_key(thefield, operation, k, n, length):
+    for limit, bucket in _engine_lengths:
+        if (limit is None) or (length <= limit): break
+    if operation == 'recover': return "{0:}/recover/k{1:}/{2:}".format(_fieldlabel(thefield), k, bucket), bucket
+    return "{0:}/split/k{1:}/n{2:}/{3:}".format(_fieldlabel(thefield), k, n, bucket), bucket
+
+def engine_cache_path():
+    """The file caching the engine choices of this host: the environment
+    variable SHAMIRSHARE2_ENGINES if set (to '' not to cache at all), else
+    ~/.cache/shamirshare2-engines.json"""
+    path = os.environ.get('SHAMIRSHARE2_ENGINES')
+    if path is None: path = os.path.join(os.path.expanduser('~'), '.cache', 'shamirshare2-engines.json')
+    return path or None
+
+def _engine_host():  # Cached choices only apply to the host and Python that made them
+    import platform
+    return {'host': platform.node(), 'python': platform.python_version(), 'implementation': platform.python_implementation()}
+
+def _load_engine_cache():
+    path = engine_cache_path()
+    if _engine_loaded == [path]: return
+    _engine_loaded[:] = [path]
+    if path is None: return
+    import json
+    try:
+        with open(path) as thefile: cached = json.load(thefile)
+    except (IOError, OSError, ValueError): return
+    if (not isinstance(cached, dict)) or (cached.get('system') != _engine_host()): return
+    for key, name in cached.get('choices', {}).items(): _engine_choices.setdefault(key, name)
+    for key, timings in cached.get('timings', {}).items(): _engine_timings.setdefault(key, timings)
+
+def _save_engine_cache():
+    path = engine_cache_path()
+    if path is None: return
+    import json
+    try:
+        if not os.path.isdir(os.path.dirname(path) or '.'): os.makedirs(os.path.dirname(path))
+        temppath = "{0:}.{1:}.tmp".format(path, os.getpid())
+        with open(temppath, 'w') as thefile:
+            json.dump({'system': _engine_host(), 'choices': _engine_choices, 'timings': _engine_timings}, thefile, indent=1, sort_keys=True)
+        getattr(os, 'replace', os.rename)(temppath, path)
+    except (IOError, OSError): pass   # Not being able to cache only costs a calibration next time
+
+def _calibrate(thefield, operation, k, n, bucket, candidates):
+    """Time each of the candidate engines on a secret of the bucket's sample
+    length, returning {name: best seconds}.  An engine which fails is left
+    out, one far slower than the best so far is only timed once, and once
+    CALIBRATION_BUDGET seconds have gone the engines not yet timed are left
+    out too."""
+    import time
+    timer = getattr(time, 'perf_counter', time.time)
+    length = max(thefield.secretbytes, _engine_sample[bucket] // thefield.secretbytes * thefield.secretbytes)
+    secret = os.urandom(length)
+    if operation == 'recover':   # The sample shares, from the preferred split engine
+        splitter = [function for name, function, module in _engines[(type(thefield).__name__, 'split')] if _isavailable(module)][0]
+        shares = splitter(secret, k, k, thefield)
+    timings = {}
+    deadline = None
+    for name, function in candidates:
+        if (deadline is not None) and (timer() > deadline): break
+        args = (secret, k, n, thefield) if operation == 'split' else (shares, thefield)
+        best = None
+        for i in range(3):
+            start = timer()
+            try:
+                result = function(*args)
+            except Exception:
+                best = None
+                break
+            elapsed = timer() - start
+            if (operation == 'recover') and (result != secret):
+                best = None
+                break
+            best = elapsed if best is None else min(best, elapsed)
+            if deadline is None: deadline = timer() + CALIBRATION_BUDGET
+            if (timings and (best > 4*min(timings.values()))) or (timer() > deadline): break
+        if best is not None: timings[name] = best
+    return timings
+
+def select_engine(thefield, operation, k, n, length):
+    """The name of the engine split() (or recover()) will use over thefield
+    for a k-of-n split of a secret of length bytes (recover() from k shares),
+    calibrating on first use if there is more than one to choose from
+    besides 'object'"""
+    candidates = [(name, function) for name, function, module in _engines.get((type(thefield).__name__, operation), ()) if _isavailable(module)]
+    if not candidates: raise ValueError("No {0:} engine for the field {1:}".format(operation, thefield))
+    if len(candidates) > 1: candidates = [(name, function) for name, function in candidates if name != 'object']
+    if len(candidates) == 1: return candidates[0][0]
+    _load_engine_cache()
+    key, bucket = _engine_key(thefield, operation, k, n, length)
+    if _engine_choices.get(key) not in [name for name, function in candidates]:
+        timings = _calibrate(thefield, operation, k, n, bucket, candidates)
+        if not timings: return candidates[-1][0]
+        _engine_timings[key] = timings
+        _engine_choices[key] = min(timings, key=timings.get)
+        _save_engine_cache()
+    return _engine_choices[key]
+
+def _engine(thefield, operation, engine, k, n, length):
+    if engine is None: engine = select_engine(thefield, operation, k, n, length)
+    for name, function, module in _engines.get((type(thefield).__name__, operation), ()):
+        if (name == engine) and _isavailable(module): return function
+    raise ValueError("No {0:} engine \'{1:}\' for the field {2:}, choose from {3:}".format(operation, engine, thefield, engines(thefield, operation)))
+
+def engine_info():
+    """Report the engines available for each field kind and operation, the
+    engines selected so far (by calibration key, field/operation/k[/n]/size,
+    with the timings behind each choice) and the cache file.
+    Usage:
+        >>> shares = split(bytearray(32), 3, 5)
+        >>> info = engine_info()
+        >>> info['available']['GF8/split'][-1]
+        'object'
+        >>> select_engine(GF8(), 'split', 3, 5, 32) in info['available']['GF8/split']
+        True
+        >>> select_engine(GF8(), 'split', 30, 40, 5000) != 'object'   # The reference is never calibrated
+        True"""
+    _load_engine_cache()
+    available = {}
+    for (kind, operation), registered in sorted(_engines.items()):
+        available["{0:}/{1:}".format(kind, operation)] = [name for name, function, module in registered if _isavailable(module)]
+    return {'available': available, 'selected': dict(_engine_choices), 'timings': dict(_engine_timings), 'cache': engine_cache_path()}
+
+
+########################## Packed Secret Sharing ##############################
+# Packed (Franklin-Yung) sharing puts l slices of the secret on one
+# polynomial, as its values at l fixed points e_1, ..., e_l away from the
+# share points (e_i = order - i: -1, -2, ... over GFp), with its values at
+# x = 1, ..., k chosen at random.  The polynomial has degree k+l-1, so any
+# k+l shares recover all l slices while any k shares reveal nothing, and
+# each share holds one element per l slices.  Both directions are linear
+# combinations with Lagrange weights that depend only on the points, so the
+# weights are worked out once per (field, points) as an interpolation plan,
+# and then applied to every group of l slices at once.
+###############################################################################
+
+_packed_plans = {}   # (field, source points, target points) --> weights
+
+def _packed_points(thefield, l):  # The points holding the slices, as integers
+    return [thefield.order - 1 - i for i in range(l)]
+
+def _packed_plan(thefield, sources, targets):
+    """The interpolation plan taking the values of a polynomial of degree
+    less than len(sources) at the points sources to its values at targets
+    (both lists of integers):
+    plan[t][i] is the weight of the value at sources[i] in the value at targets[t]"""
+    key = (type(thefield).__name__, thefield.order, getattr(thefield, 'modulus', None),
+           tuple(sources), tuple(targets))
+    if key not in _packed_plans:
+        xvals = [thefield(x) for x in sources]
+        _packed_plans[key] = [_lagrange_weights(xvals, thefield, thefield(x)) for x in targets]
+    return _packed_plans[key]
+
+def _deinterleave(data, l, width):
+    """Cut data, whole groups of l elements of width bytes, into the l byte
+    strings of the 1st, 2nd, ..., lth element of every group"""
+    if width == 1: return [data[i::l] for i in range(l)]
+    planes = []
+    for i in range(l):
+        theplane = bytearray(len(data) // l)
+        for b in range(width): theplane[b::width] = data[width*i+b::width*l]
+        planes.append(bytes(theplane))
+    return planes
+
+def _interleave(planes, width):  # The inverse of _deinterleave()
+    l = len(planes)
+    data = bytearray(l * len(planes[0]))
+    for i, theplane in enumerate(planes):
+        for b in range(width): data[width*i+b::width*l] = theplane[b::width]
+    return bytes(data)
+
+def _combineplanes(planes, weights, thefield):
+    """Sum(i, weights[i]*planes[i]) for byte strings of elements of thefield"""
+    if isinstance(thefield, (GF8, GF16)): return combinebytes(planes, weights, thefield)
+    width = thefield.eltbytes
+    thesum = []
+    for i in range(0, len(planes[0]), width):
+        theval = thefield(0)
+        for theplane, theweight in zip(planes, weights):
+            theval = theval.add(thefield.frombytes(theplane[i:i+width]).mul(theweight))
+        thesum.append(thefield.tobytes(theval))
+    return b''.join(thesum)
+
+def split_packed(secret, k, n, l, thefield=None):
+    """Split secret into the n shares [(1, y1), ..., (n, yn)], packing l
+    slices on each polynomial: any k+l shares recover the secret, and any k
+    reveal nothing about it.  Each share is 1/l of the size of a split()
+    share.  The secret length must be a multiple of l*thefield.secretbytes.
+    Usage:
+        >>> secret = bytearray(range(32))
+        >>> shares = split_packed(secret, 2, 8, 4)        # 4 bytes per polynomial of degree 5 over GF8
+        >>> [(x, len(y)) for x, y in shares[:3]]
+        [(1, 8), (2, 8), (3, 8)]
+        >>> recover_packed(shares[2:], 4) == secret       # From 6 = 2+4 shares
+        True
+        >>> gf257 = GFp(2**256 + 297)
+        >>> shares = split_packed(bytearray(range(64)), 1, 4, 2, gf257)
+        >>> recover_packed([shares[3], shares[0], shares[2]], 2, gf257) == bytearray(range(64))
+        True"""
+    if thefield is None: thefield = GF8()
+    if (k < 1) or (l < 1) or (k + l > n): raise ValueError("Need k, l >= 1 and k+l <= n for packed sharing, not k = {0:}, l = {1:}, n = {2:}".format(k, l, n))
+    if n + l >= thefield.order: raise ValueError("Cannot pack {0:} slices into {1:} shares over a field of order {2:}".format(l, n, thefield.order))
+    secretbytes, width = thefield.secretbytes, thefield.eltbytes
+    if (secretbytes == 0) or (len(secret) % (l*secretbytes) != 0):
+        raise ValueError("Secret length {0:} is not a multiple of {1:} slices of {2:} bytes".format(len(secret), l, secretbytes))
+    ngroups = len(secret) // (l*secretbytes)
+    # planes[i] holds slice i of every group of l slices, as elements of width bytes
+    planes = _deinterleave(bytes(secret), l, secretbytes)
+    if secretbytes != width:
+        planes = [b''.join(thefield.tobytes(thefield.frombytes(theplane[g:g+secretbytes])) for g in range(0, len(theplane), secretbytes))
+                  for theplane in planes]
+    randoms = [_randomelements(thefield, ngroups) for x in range(k)]
+    plan = _packed_plan(thefield, _packed_points(thefield, l) + list(range(1, k+1)), list(range(k+1, n+1)))
+    return [(x, randoms[x-1]) for x in range(1, k+1)] + [(x, _combineplanes(planes + randoms, weights, thefield)) for x, weights in zip(range(k+1, n+1), plan)]
+
+def recover_packed(shares, l, thefield=None):
+    """Recover the secret from at least k+l of the shares made by
+    split_packed() with l slices per polynomial"""
+    if thefield is None: thefield = GF8()
+    xs = [x for x, y in shares]
+    if len(set(xs)) != len(xs): raise ValueError("Duplicate share index in {0:}".format(xs))
+    width, secretbytes = thefield.eltbytes, thefield.secretbytes
+    length = len(shares[0][1])
+    if (length % width != 0) or any(len(y) != length for x, y in shares):
+        raise ValueError("Shares must all have the same length, a multiple of {0:} bytes".format(width))
+    if len(shares) <= l: raise ValueError("Need more than l = {0:} shares".format(l))
+    plan = _packed_plan(thefield, xs, _packed_points(thefield, l))
+    planes = [_combineplanes([bytes(y) for x, y in shares], weights, thefield) for weights in plan]
+    if secretbytes != width:
+        planes = [b''.join(thefield.tobytes(thefield.frombytes(theplane[g:g+width]), secretbytes) for g in range(0, length, width))
+                  for theplane in planes]
+    return _interleave(planes, secretbytes)
+
+
+############################# Class SplitSession ##############################
+# A split whose shares are handed out one at a time, on request: the random
+# polynomials are fixed when the session is created, held as k byte arrays
+# (coefficient j of every slice, one after the other), and a share is only
+# computed when share_for(x) or iter_share(x) asks for it.
+
+class SplitSession(object):
+    """A k-of-n split of secret over thefield (default GF8) whose shares are
+    computed lazily.  The shares are those split() would make with the same
+    coefficients.  erase() (or leaving a with block) zeroes the coefficients,
+    after which no more shares can be had.
+    Usage:
+        >>> secret = bytearray(range(32))
+        >>> with SplitSession(secret, 3, 5) as session:
+        ...     share2 = session.share_for(2)
+        ...     share5 = (5, b''.join(session.iter_share(5, chunkbytes=10)))
+        ...     share1 = session.share_for(1)
+        >>> sorted(session.issued), session.erased
+        ([1, 2, 5], True)
+        >>> recover([share5, share1, share2]) == secret
+        True
+        >>> session.share_for(3)
+        Traceback (most recent call last):
+        ...
+        ValueError: The session has been erased
+    """
+
+    def __init__(self, secret, k, n, thefield=None):
+        if thefield is None: thefield = GF8()
+        if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+        if n >= thefield.order: raise ValueError("Cannot create {0:} distinct shares over a field of order {1:}".format(n, thefield.order))
+        secretbytes, width = thefield.secretbytes, thefield.eltbytes
+        if (secretbytes == 0) or (len(secret) % secretbytes != 0):
+            raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), secretbytes))
+        self.field = thefield
+        self.k = k
+        self.n = n
+        self.length = len(secret) // secretbytes * width   # Length of each share
+        self.issued = set()
+        if secretbytes == width: constant = bytearray(secret)
+        else: constant = bytearray(b''.join(thefield.tobytes(thefield.frombytes(secret[i:i+secretbytes])) for i in range(0, len(secret), secretbytes)))
+        randoms = [bytearray(_randomelements(thefield, self.length // width)) for j in range(k-1)]
+        self._coeffs = [constant] + randoms
+
+    @property
+    def erased(self):
+        return self._coeffs is None
+
+    def _evaluate(self, x, start, stop):
+        """The values at x of the polynomials of the bytes [start, stop) of a share"""
+        thefield = self.field
+        if isinstance(thefield, (GF8, GF16)): return evalbytes([thecoeff[start:stop] for thecoeff in self._coeffs], x, thefield)
+        width = thefield.eltbytes
+        xval = thefield(x)
+        return b''.join(thefield.tobytes(eval([thefield.frombytes(thecoeff[i:i+width]) for thecoeff in self._coeffs], xval))
+                        for i in range(start, stop, width))
+
+    def _check(self, x):
+        if self._coeffs is None: raise ValueError("The session has been erased")
+        if not (1 <= x <= self.n): raise ValueError("Share index {0:} is not in 1..{1:}".format(x, self.n))
+        self.issued.add(x)
+
+    def share_for(self, x):
+        """The share (x, y) for holder x, computed now"""
+        self._check(x)
+        return (x, self._evaluate(x, 0, self.length))
+
+    def iter_share(self, x, chunkbytes=65536):
+        """Yield the value part y of the share for holder x in chunks of about
+        chunkbytes bytes, so that a share of a large secret need never be held
+        whole in memory"""
+        self._check(x)
+        width = self.field.eltbytes
+        step = max(1, chunkbytes // width) * width
+        for start in range(0, self.length, step):
+            if self._coeffs is None: raise ValueError("The session has been erased")
+            yield self._evaluate(x, start, min(start + step, self.length))
+
+    def erase(self):
+        """Overwrite the coefficients (the secret among them) with zeros, and
+        drop them.  Copies made while computing shares are not reached."""
+        if self._coeffs is not None:
+            for thecoeff in self._coeffs: thecoeff[:] = bytearray(len(thecoeff))
+            self._coeffs = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.erase()
+        return False
+
+############################### Command Line ##################################
+# python -m shamirshare2 split|combine ...: see shamircli.py (Python 3)
+###############################################################################
+
+if __name__ == '__main__':
+    import shamircli
+    sys.exit(shamircli.main())
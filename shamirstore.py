@@ -0,0 +1,289 @@
+###############################################################################
+# SHAMIRSTORE.py
+# A local share store in one SQLite database: the shares of many split
+# keys, indexed by key id, holder (x) and policy, written in large
+# transactions and read back a quorum, or a stream of keys, at a time.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Store shares of split keys in SQLite.  Two tables:
+    keys:    key id (primary key), policy, k, n, field code and parameter
+             (as in shamirfile.py), with an index on policy
+    shares:  key id, x, value (the share bytes), with primary key (key id, x)
+             and an index on x
+Both are WITHOUT ROWID tables, so the shares of a key sit together in the
+primary key's B-tree, and a quorum is one short range scan.  The policy is
+any label (by default 'k-of-n'); keys of one policy can be listed and
+streamed together.  Share values come back as bytes, ready for
+shamirshare2.recover().
+
+Writes are batched: put_many() and split_many() insert BATCH keys per
+transaction, so one that fails part way leaves the batches before it
+stored, and says how many keys they held.  The database is opened in WAL mode, so readers in other
+connections are not blocked by a writer.
+
+    Usage:  ############# Split and store 1000 keys, then recover one #############
+
+        >>> import os, shamirshare2, shamirstore
+        >>> store = shamirstore.ShareStore()                 # In memory; give a path for a file
+        >>> keyids = ['key-{0:04}'.format(i) for i in range(1000)]
+        >>> secrets = [os.urandom(32) for keyid in keyids]
+        >>> store.split_many(keyids, secrets, 3, 5)
+        1000
+        >>> store.count(), store.count('3-of-5'), store.count('other')
+        (1000, 1000, 0)
+        >>> [(x, len(y)) for x, y in store.quorum('key-0017')]
+        [(1, 32), (2, 32), (3, 32)]
+        >>> [x for x, y in store.shares('key-0017', xs=[5, 2])], store.shares('key-0017', xs=[])
+        ([2, 5], [])
+        >>> store.recover('key-0017') == secrets[17]
+        True
+        >>> store.recover_many(keyids[:100], xs=[2, 4, 5]) == secrets[:100]
+        True
+
+        ###### Shares made elsewhere, and streaming for a refresh job
+        >>> gf257 = shamirshare2.GFp(2**256 + 297)
+        >>> shares = shamirshare2.split(secrets[0], 2, 3, gf257)
+        >>> store.put('prime-key', shares, 2, gf257, policy='escrow')
+        >>> policy, k, n, thefield = store.info('prime-key')
+        >>> policy, k, n, thefield.prime == gf257.prime
+        ('escrow', 2, 3, True)
+        >>> [(keyid, len(shares)) for keyid, k, thefield, shares in store.iterate('escrow')]
+        [('prime-key', 3)]
+        >>> sum(1 for keyid, value in store.holder(4))       # The shares held by x = 4
+        1000
+        >>> store.delete('prime-key'); store.shares('prime-key')
+        Traceback (most recent call last):
+        ...
+        KeyError: 'No key prime-key in the store'
+
+        ###### A key id already stored stops the write at its batch
+        >>> store.batch = 2
+        >>> items = [('new-1', shares), ('new-2', shares), ('new-3', shares), ('key-0005', shares)]
+        >>> store.put_many(items, 2, gf257)
+        Traceback (most recent call last):
+        ...
+        shamirstore.DuplicateKeyError: Key key-0005 or one of its shares is already in the store (use replace=True to overwrite); 2 keys were stored before its batch
+        >>> store.count('2-of-3')
+        2
+"""
+
+import itertools
+import sqlite3
+
+import shamirshare2
+import shamirfile
+
+BATCH = 10000      # Keys per transaction when writing, and rows per fetch when streaming
+MAXPARAMS = 500    # Key ids per IN (...) query when fetching many keys
+
+class DuplicateKeyError(ValueError):
+    """put_many() met a key id or share already in the store, or twice
+    in its input.  keyid is that key, and stored the number of keys written
+    by the batches committed before the one holding it."""
+
+    def __init__(self, message, keyid, stored):
+        ValueError.__init__(self, message)
+        self.keyid = keyid
+        self.stored = stored
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    keyid TEXT PRIMARY KEY, policy TEXT NOT NULL, k INTEGER NOT NULL, n INTEGER NOT NULL,
+    fieldcode INTEGER NOT NULL, fieldparam BLOB NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS keys_policy ON keys (policy);
+CREATE TABLE IF NOT EXISTS shares (
+    keyid TEXT NOT NULL, x INTEGER NOT NULL, value BLOB NOT NULL,
+    PRIMARY KEY (keyid, x)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS shares_x ON shares (x);
+"""
+
+
+class ShareStore(object):
+    """A share store in the SQLite database at path (default in memory)"""
+
+    def __init__(self, path=':memory:', batch=BATCH):
+        self.path = path
+        self.batch = batch
+        self.db = sqlite3.connect(path, isolation_level=None)   # Transactions are begun explicitly
+        if path != ':memory:': self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        self._fields = {}   # (field code, parameter) --> field
+
+    def _field(self, code, parameter):
+        key = (code, bytes(parameter))
+        if key not in self._fields: self._fields[key] = shamirfile.field_for(code, bytes(parameter))
+        return self._fields[key]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    ################################ Writing ##################################
+
+    def put_many(self, items, k, thefield=None, policy=None, replace=False):
+        """Store the shares of many keys, given items as (keyid, shares) pairs,
+        all split k-of-n over thefield (default GF8) under policy (default
+        'k-of-n').  Keys are written self.batch to a transaction.  A key id
+        already in the store is a DuplicateKeyError, unless replace is True,
+        when its old shares are removed; so is a key id given twice, or a key
+        with two shares of the same x.  The batches before the failing one
+        are already committed, and the error holds the offending key id and
+        the number of keys stored.  Return the number of keys stored."""
+        if thefield is None: thefield = shamirshare2.GF8()
+        code, parameter = shamirfile.fieldcode(thefield)
+        items = iter(items)
+        count = 0
+        while True:
+            batch = list(itertools.islice(items, self.batch))
+            if not batch: break
+            keyrows = [(keyid, policy if policy is not None else "{0:}-of-{1:}".format(k, len(shares)), k, len(shares), code, parameter)
+                       for keyid, shares in batch]
+            sharerows = [(keyid, x, bytes(y)) for keyid, shares in batch for x, y in shares]
+            self.db.execute("BEGIN")
+            try:
+                if replace:
+                    self.db.executemany("DELETE FROM shares WHERE keyid = ?", [(keyid,) for keyid, shares in batch])
+                    self.db.executemany("DELETE FROM keys WHERE keyid = ?", [(keyid,) for keyid, shares in batch])
+                self.db.executemany("INSERT INTO keys VALUES (?, ?, ?, ?, ?, ?)", keyrows)
+                self.db.executemany("INSERT INTO shares VALUES (?, ?, ?)", sharerows)
+            except sqlite3.IntegrityError:
+                self.db.execute("ROLLBACK")
+                keyid = self._conflict(batch, replace)
+                raise DuplicateKeyError("Key {0:} or one of its shares is already in the store (use replace=True to overwrite); "
+                                        "{1:} keys were stored before its batch".format(keyid, count), keyid, count)
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+            count += len(batch)
+        return count
+
+    def _conflict(self, batch, replace):  # The first key id of batch which cannot be inserted
+        seen = set()
+        for keyid, shares in batch:
+            xs = [x for x, y in shares]
+            if (keyid in seen) or (len(set(xs)) != len(xs)): return keyid
+            if (not replace) and self.db.execute("SELECT 1 FROM keys WHERE keyid = ?", (keyid,)).fetchone(): return keyid
+            seen.add(keyid)
+        return None
+
+    def put(self, keyid, shares, k, thefield=None, policy=None, replace=False):
+        """Store the shares [(x, y), ...] of one key"""
+        self.put_many([(keyid, shares)], k, thefield, policy, replace)
+
+    def split_many(self, keyids, secrets, k, n, thefield=None, policy=None, engine=None):
+        """Split each of secrets k-of-n with shamirshare2.split_many(), self.batch
+        at a time, and store their shares under keyids.  Return the number stored."""
+        if len(keyids) != len(secrets): raise ValueError("Need one key id for each secret")
+        def items():
+            for start in range(0, len(secrets), self.batch):
+                sharelists = shamirshare2.split_many(secrets[start:start+self.batch], k, n, thefield, engine)
+                for item in zip(keyids[start:start+self.batch], sharelists): yield item
+        return self.put_many(items(), k, thefield, policy)
+
+    def delete(self, keyid):
+        """Remove a key and its shares"""
+        self.db.execute("BEGIN")
+        self.db.execute("DELETE FROM shares WHERE keyid = ?", (keyid,))
+        self.db.execute("DELETE FROM keys WHERE keyid = ?", (keyid,))
+        self.db.execute("COMMIT")
+
+    ################################ Reading ##################################
+
+    def info(self, keyid):
+        """(policy, k, n, field) of a stored key"""
+        row = self.db.execute("SELECT policy, k, n, fieldcode, fieldparam FROM keys WHERE keyid = ?", (keyid,)).fetchone()
+        if row is None: raise KeyError("No key {0:} in the store".format(keyid))
+        return row[0], row[1], row[2], self._field(row[3], row[4])
+
+    def count(self, policy=None):
+        """The number of keys stored, in all or under one policy"""
+        if policy is None: return self.db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM keys WHERE policy = ?", (policy,)).fetchone()[0]
+
+    def shares(self, keyid, xs=None):
+        """The stored shares [(x, y), ...] of a key, in order of x, of all
+        holders or those in xs"""
+        if xs is None: rows = self.db.execute("SELECT x, value FROM shares WHERE keyid = ? ORDER BY x", (keyid,)).fetchall()
+        else:
+            xs = sorted(set(xs))
+            rows = self.db.execute("SELECT x, value FROM shares WHERE keyid = ? AND x IN ({0:}) ORDER BY x".format(", ".join("?" * len(xs))),
+                                   [keyid] + xs).fetchall()
+        if (not rows) and not self.db.execute("SELECT 1 FROM keys WHERE keyid = ?", (keyid,)).fetchone():
+            raise KeyError("No key {0:} in the store".format(keyid))
+        return rows
+
+    def quorum(self, keyid, xs=None):
+        """The first k stored shares of a key (of holders xs, if given)"""
+        policy, k, n, thefield = self.info(keyid)
+        shares = self.shares(keyid, xs)
+        if len(shares) < k: raise ValueError("Need {0:} shares of {1:} to recover, only have {2:}".format(k, keyid, len(shares)))
+        return shares[:k]
+
+    def quorum_many(self, keyids, xs=None):
+        """The quorum of each of keyids, as a list of (k, field, shares), read
+        MAXPARAMS keys per query"""
+        wanted = None if xs is None else set(xs)
+        found = {}
+        for start in range(0, len(keyids), MAXPARAMS):
+            chunk = keyids[start:start+MAXPARAMS]
+            marks = ", ".join("?" * len(chunk))
+            for keyid, k, code, parameter in self.db.execute("SELECT keyid, k, fieldcode, fieldparam FROM keys WHERE keyid IN ({0:})".format(marks), chunk):
+                found[keyid] = (k, self._field(code, parameter), [])
+            for keyid, x, value in self.db.execute("SELECT keyid, x, value FROM shares WHERE keyid IN ({0:}) ORDER BY keyid, x".format(marks), chunk):
+                if (wanted is None) or (x in wanted): found[keyid][2].append((x, value))
+        result = []
+        for keyid in keyids:
+            if keyid not in found: raise KeyError("No key {0:} in the store".format(keyid))
+            k, thefield, shares = found[keyid]
+            if len(shares) < k: raise ValueError("Need {0:} shares of {1:} to recover, only have {2:}".format(k, keyid, len(shares)))
+            result.append((k, thefield, shares[:k]))
+        return result
+
+    def recover(self, keyid, xs=None, engine=None):
+        """Recover a key from its stored shares (of holders xs, if given)"""
+        thefield = self.info(keyid)[3]
+        return shamirshare2.recover(self.quorum(keyid, xs), thefield, engine)
+
+    def recover_many(self, keyids, xs=None, engine=None):
+        """Recover many keys, with shamirshare2.recover_many() for each run of
+        keys sharing a field and quorum x values"""
+        quorums = self.quorum_many(keyids, xs)
+        secrets = []
+        for (thefield, xvals), group in itertools.groupby(quorums, lambda quorum: (quorum[1], [x for x, y in quorum[2]])):
+            secrets.extend(shamirshare2.recover_many([shares for k, field, shares in group], thefield, engine))
+        return secrets
+
+    def iterate(self, policy=None):
+        """Yield (keyid, k, field, shares) for every key (of policy, if given)
+        in order of key id, streaming the rows self.batch at a time.  Write
+        the results of a refresh through another ShareStore on the same file,
+        or after the iteration ends."""
+        query = "SELECT s.keyid, k.k, k.fieldcode, k.fieldparam, s.x, s.value FROM keys AS k JOIN shares AS s ON s.keyid = k.keyid"
+        if policy is None: cursor = self.db.execute(query + " ORDER BY s.keyid, s.x")
+        else: cursor = self.db.execute(query + " WHERE k.policy = ? ORDER BY s.keyid, s.x", (policy,))
+        cursor.arraysize = self.batch
+        def rows():
+            while True:
+                therows = cursor.fetchmany()
+                if not therows: return
+                for row in therows: yield row
+        for keyid, group in itertools.groupby(rows(), lambda row: row[0]):
+            group = list(group)
+            yield keyid, group[0][1], self._field(group[0][2], group[0][3]), [(row[4], row[5]) for row in group]
+
+    def holder(self, x, policy=None):
+        """Yield (keyid, y) for every share held by x (under policy, if given)"""
+        if policy is None: cursor = self.db.execute("SELECT keyid, value FROM shares WHERE x = ? ORDER BY keyid", (x,))
+        else: cursor = self.db.execute("SELECT s.keyid, s.value FROM shares AS s JOIN keys AS k ON s.keyid = k.keyid "
+                                       "WHERE s.x = ? AND k.policy = ? ORDER BY s.keyid", (x, policy))
+        for row in cursor: yield row[0], row[1]
@@ -0,0 +1,368 @@
+###############################################################################
+# SHAMIRTTLV.py
+# KMIP TTLV (Tag, Type, Length, Value) encoding and decoding of the KMIP
+# Split Key managed object, connecting the wire format to the split() and
+# recover() API of shamirshare2.
+# Decoding does not copy: byte strings (such as the share values in Key
+# Material) are returned as memoryview slices of the buffer decoded.
+# Encoding writes into a single preallocated bytearray.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Encode and decode KMIP Split Key objects as TTLV.
+A TTLV item is represented by the tuple (tag, itemtype, value), where the
+value of a STRUCTURE is a list of items and the value of a BYTE_STRING is
+any buffer (decoded as a memoryview into the buffer decoded).
+
+    Usage:  ########## 3-of-5 split of an AES-256 key, as KMIP objects ##########
+
+        >>> from shamirttlv import *
+        >>> secret = bytes(range(32))
+        >>> objects = split_to_ttlv(secret, 3, 5)   # Split over GF8
+        >>> len(objects), bytes(objects[0][:8]).hex()  # Tag 420089 Split Key, a structure
+        (5, '4200890100000088')
+        >>> recover_from_ttlv([objects[4], objects[0], objects[2]]) == secret
+        True
+
+        ###### Look inside one of the objects
+        >>> part = SplitKey.decode(objects[1])
+        >>> part.parts, part.identifier, part.threshold, part.method == POLYNOMIAL_GF8
+        (5, 2, 3, True)
+        >>> type(part.material).__name__, len(part.material)   # A slice of objects[1]
+        ('memoryview', 32)
+
+        ###### Over a prime field, the Prime Field Size is included
+        >>> from shamirshare2 import GFp
+        >>> objects = split_to_ttlv(secret, 2, 3, GFp(2**256 + 297))
+        >>> SplitKey.decode(objects[2]).prime == 2**256 + 297
+        True
+        >>> recover_from_ttlv(objects[1:]) == secret
+        True
+"""
+
+import struct
+
+import shamirshare2
+
+# Item types
+STRUCTURE = 0x01
+INTEGER = 0x02
+LONG_INTEGER = 0x03
+BIG_INTEGER = 0x04
+ENUMERATION = 0x05
+BOOLEAN = 0x06
+TEXT_STRING = 0x07
+BYTE_STRING = 0x08
+DATE_TIME = 0x09
+INTERVAL = 0x0A
+
+# Tags
+BATCH_COUNT = 0x42000D
+BATCH_ITEM = 0x42000F
+CRYPTOGRAPHIC_ALGORITHM = 0x420028
+CRYPTOGRAPHIC_LENGTH = 0x42002A
+KEY_BLOCK = 0x420040
+KEY_FORMAT_TYPE = 0x420042
+KEY_MATERIAL = 0x420043
+KEY_PART_IDENTIFIER = 0x420044
+KEY_VALUE = 0x420045
+OBJECT_TYPE = 0x420057
+OPERATION = 0x42005C
+PRIME_FIELD_SIZE = 0x420062
+PROTOCOL_VERSION = 0x420069
+PROTOCOL_VERSION_MAJOR = 0x42006A
+PROTOCOL_VERSION_MINOR = 0x42006B
+REQUEST_HEADER = 0x420077
+REQUEST_MESSAGE = 0x420078
+REQUEST_PAYLOAD = 0x420079
+RESPONSE_HEADER = 0x42007A
+RESPONSE_MESSAGE = 0x42007B
+RESPONSE_PAYLOAD = 0x42007C
+RESULT_MESSAGE = 0x42007D
+RESULT_REASON = 0x42007E
+RESULT_STATUS = 0x42007F
+SPLIT_KEY = 0x420089
+SPLIT_KEY_METHOD = 0x42008A
+SPLIT_KEY_PARTS = 0x42008B
+SPLIT_KEY_THRESHOLD = 0x42008C
+SYMMETRIC_KEY = 0x42008F
+TIME_STAMP = 0x420092
+UNIQUE_BATCH_ITEM_ID = 0x420093
+UNIQUE_IDENTIFIER = 0x420094
+ATTRIBUTES = 0x420125
+
+# Split Key Method enumeration
+XOR = 0x01
+POLYNOMIAL_GF16 = 0x02
+POLYNOMIAL_PRIME_FIELD = 0x03
+POLYNOMIAL_GF8 = 0x04
+
+# Key Format Type enumeration
+RAW = 0x01
+
+_header = struct.Struct('>II')  # (tag << 8 | type, length)
+_int32 = struct.Struct('>i')
+_uint32 = struct.Struct('>I')
+_int64 = struct.Struct('>q')
+_uint64 = struct.Struct('>Q')
+_padding = bytes(8)
+
+
+class TTLVError(ValueError):
+    """Malformed TTLV, or TTLV which is not the object expected"""
+
+
+def _padded(length):
+    return (length + 7) & ~7
+
+def _bigintbytes(value):  # Two's complement, padded to a multiple of 8 bytes
+    nbits = (value if value >= 0 else ~value).bit_length() + 1  # With a sign bit
+    return _padded((nbits + 7) // 8)
+
+############################### Decoding ######################################
+
+def decode(buf, offset=0):
+    """Decode the TTLV item starting at offset in buf, returning the pair
+    (item, end), where end is the offset just past the item (and its padding).
+    Byte strings are returned as memoryview slices of buf, not copies.
+    Usage:
+        >>> decode(bytes.fromhex('420044020000000400000007 00000000'))
+        ((4325444, 2, 7), 16)"""
+    view = buf if isinstance(buf, memoryview) else memoryview(buf)
+    if view.ndim != 1 or view.itemsize != 1: view = view.cast('B')
+    return _decode(view, offset, len(view))
+
+def _decode(view, offset, limit):
+    if offset + 8 > limit: raise TTLVError("Truncated TTLV header at offset {0:}".format(offset))
+    tagtype, length = _header.unpack_from(view, offset)
+    tag, itemtype = tagtype >> 8, tagtype & 0xff
+    start = offset + 8
+    end = start + length
+    if end > limit: raise TTLVError("TTLV item {0:06x} at offset {1:} overruns its container".format(tag, offset))
+    if itemtype == STRUCTURE:
+        value = []
+        while start < end:
+            item, start = _decode(view, start, end)
+            value.append(item)
+        return (tag, itemtype, value), end
+    if itemtype in (INTEGER, ENUMERATION, INTERVAL):
+        if length != 4: raise TTLVError("TTLV item {0:06x} has length {1:}, not 4".format(tag, length))
+        value = (_int32 if itemtype == INTEGER else _uint32).unpack_from(view, start)[0]
+    elif itemtype in (LONG_INTEGER, DATE_TIME, BOOLEAN):
+        if length != 8: raise TTLVError("TTLV item {0:06x} has length {1:}, not 8".format(tag, length))
+        if itemtype == BOOLEAN: value = _uint64.unpack_from(view, start)[0] != 0
+        else: value = _int64.unpack_from(view, start)[0]
+    elif itemtype == BIG_INTEGER:
+        if length % 8: raise TTLVError("TTLV big integer {0:06x} has length {1:}, not a multiple of 8".format(tag, length))
+        value = int.from_bytes(view[start:end], 'big', signed=True)
+    elif itemtype == BYTE_STRING:
+        value = view[start:end]
+    elif itemtype == TEXT_STRING:
+        value = str(view[start:end], 'utf-8')
+    else:
+        raise TTLVError("Unknown TTLV type {0:02x} for item {1:06x}".format(itemtype, tag))
+    end = start + _padded(length)
+    if end > limit: raise TTLVError("TTLV item {0:06x} padding overruns its container".format(tag))
+    return (tag, itemtype, value), end
+
+def bodylength(header):
+    """The length of the value of the TTLV item whose 8 byte header is given
+    (for a structure, such as a message, the length of its contents)"""
+    return _header.unpack_from(header)[1]
+
+def _children(item):  # The children of a structure, checked to be one
+    if (not isinstance(item, tuple)) or (len(item) != 3): raise TTLVError("Not a TTLV item: {0:}".format(type(item).__name__))
+    if item[1] != STRUCTURE: raise TTLVError("TTLV item {0:06x} is not a structure".format(item[0]))
+    return item[2]
+
+def find(item, tag):
+    """The first child of the structure item with the given tag, or None.
+    Raises TTLVError if item is not a structure."""
+    for child in _children(item):
+        if child[0] == tag: return child
+    return None
+
+def findall(item, tag):
+    """Every child of the structure item with the given tag"""
+    return [child for child in _children(item) if child[0] == tag]
+
+def require(item, tag, itemtype):
+    """The value of the child of the structure item with the given tag,
+    which must be present and of type itemtype"""
+    child = find(item, tag)
+    if child is None: raise TTLVError("TTLV structure {0:06x} is missing item {1:06x}".format(item[0], tag))
+    if child[1] != itemtype: raise TTLVError("TTLV item {0:06x} has type {1:02x}, not {2:02x}".format(tag, child[1], itemtype))
+    return child[2]
+
+############################### Encoding ######################################
+
+def size(item):
+    """The number of bytes in the TTLV encoding of item, padding included"""
+    tag, itemtype, value = item
+    if itemtype == STRUCTURE: return 8 + sum(size(child) for child in value)
+    if itemtype in (BYTE_STRING, TEXT_STRING): return 8 + _padded(len(_rawvalue(item)))
+    if itemtype == BIG_INTEGER: return 8 + _bigintbytes(value)
+    return 16  # Every other type has a (padded) 8 byte value
+
+def _rawvalue(item):
+    return item[2].encode('utf-8') if item[1] == TEXT_STRING else item[2]
+
+def encode_into(item, buf, offset=0):
+    """Write the TTLV encoding of item into the preallocated buffer buf
+    starting at offset, and return the offset just past it.
+    Usage:
+        >>> buf = bytearray(16)
+        >>> encode_into((KEY_PART_IDENTIFIER, INTEGER, 7), buf)
+        16
+        >>> buf.hex()
+        '42004402000000040000000700000000'"""
+    tag, itemtype, value = item
+    start = offset + 8
+    if itemtype == STRUCTURE:
+        end = start
+        for child in value: end = encode_into(child, buf, end)
+        _header.pack_into(buf, offset, tag << 8 | itemtype, end - start)
+        return end
+    if itemtype in (BYTE_STRING, TEXT_STRING):
+        value = _rawvalue(item)
+        length = len(value)
+        buf[start:start+length] = value
+        end = start + _padded(length)
+        buf[start+length:end] = _padding[:end-start-length]
+    elif itemtype == BIG_INTEGER:
+        length = _bigintbytes(value)
+        buf[start:start+length] = value.to_bytes(length, 'big', signed=True)
+        end = start + length
+    elif itemtype in (INTEGER, ENUMERATION, INTERVAL):
+        length = 4
+        (_int32 if itemtype == INTEGER else _uint32).pack_into(buf, start, value)
+        _uint32.pack_into(buf, start + 4, 0)
+        end = start + 8
+    elif itemtype in (LONG_INTEGER, DATE_TIME, BOOLEAN):
+        length = 8
+        if itemtype == BOOLEAN: _uint64.pack_into(buf, start, 1 if value else 0)
+        else: _int64.pack_into(buf, start, value)
+        end = start + 8
+    else:
+        raise TTLVError("Unknown TTLV type {0:02x} for item {1:06x}".format(itemtype, tag))
+    _header.pack_into(buf, offset, tag << 8 | itemtype, length)
+    return end
+
+def encode(item):
+    """The TTLV encoding of item, as a new bytearray"""
+    buf = bytearray(size(item))
+    encode_into(item, buf)
+    return buf
+
+############################## Split Keys #####################################
+
+def method_for(thefield):
+    """The Split Key Method and Prime Field Size (None except over GFp) of a field"""
+    if isinstance(thefield, shamirshare2.GF8): return POLYNOMIAL_GF8, None
+    if isinstance(thefield, shamirshare2.GF16): return POLYNOMIAL_GF16, None
+    if isinstance(thefield, shamirshare2.GFp): return POLYNOMIAL_PRIME_FIELD, thefield.prime
+    raise ValueError("No KMIP Split Key Method for the field {0:}".format(thefield))
+
+def field_for(method, prime=None):
+    """The shamirshare2 field for a Split Key Method (and Prime Field Size)"""
+    if method == POLYNOMIAL_GF8: return shamirshare2.GF8()
+    if method == POLYNOMIAL_GF16: return shamirshare2.GF16()
+    if method == POLYNOMIAL_PRIME_FIELD:
+        if prime is None: raise TTLVError("Split Key over a prime field without a Prime Field Size")
+        return shamirshare2.GFp(prime)
+    raise NotImplementedError("Split Key Method {0:} is not implemented".format(method))
+
+
+class SplitKey(object):
+    """A KMIP Split Key managed object, which holds one share (part) of a key.
+        parts - total number of parts, n (Split Key Parts)
+        identifier - the x value of this part (Key Part Identifier)
+        threshold - the number of parts needed to recover the key, k
+        method - Split Key Method (POLYNOMIAL_GF8, ...)
+        material - the share value (Key Material), any buffer
+        prime - Prime Field Size, for POLYNOMIAL_PRIME_FIELD only
+        algorithm, length - Cryptographic Algorithm and Length, if known"""
+
+    def __init__(self, parts, identifier, threshold, method, material, prime=None, algorithm=None, length=None):
+        self.parts = parts
+        self.identifier = identifier
+        self.threshold = threshold
+        self.method = method
+        self.material = material
+        self.prime = prime
+        self.algorithm = algorithm
+        self.length = length
+
+    @property
+    def field(self):
+        return field_for(self.method, self.prime)
+
+    def toitem(self):
+        keyblock = [(KEY_FORMAT_TYPE, ENUMERATION, RAW),
+                    (KEY_VALUE, STRUCTURE, [(KEY_MATERIAL, BYTE_STRING, self.material)])]
+        if self.algorithm is not None: keyblock.append((CRYPTOGRAPHIC_ALGORITHM, ENUMERATION, self.algorithm))
+        if self.length is not None: keyblock.append((CRYPTOGRAPHIC_LENGTH, INTEGER, self.length))
+        items = [(SPLIT_KEY_PARTS, INTEGER, self.parts),
+                 (KEY_PART_IDENTIFIER, INTEGER, self.identifier),
+                 (SPLIT_KEY_THRESHOLD, INTEGER, self.threshold),
+                 (SPLIT_KEY_METHOD, ENUMERATION, self.method)]
+        if self.prime is not None: items.append((PRIME_FIELD_SIZE, BIG_INTEGER, self.prime))
+        items.append((KEY_BLOCK, STRUCTURE, keyblock))
+        return (SPLIT_KEY, STRUCTURE, items)
+
+    @classmethod
+    def fromitem(cls, item):
+        if (item[0] != SPLIT_KEY) or (item[1] != STRUCTURE): raise TTLVError("TTLV item {0:06x} is not a Split Key".format(item[0]))
+        keyblock = find(item, KEY_BLOCK)
+        if keyblock is None: raise TTLVError("Split Key without a Key Block")
+        if require(keyblock, KEY_FORMAT_TYPE, ENUMERATION) != RAW: raise NotImplementedError("Only Raw key format Split Keys are implemented")
+        keyvalue = find(keyblock, KEY_VALUE)
+        if keyvalue is None: raise TTLVError("Split Key without a Key Value")
+        prime = find(item, PRIME_FIELD_SIZE)
+        algorithm = find(keyblock, CRYPTOGRAPHIC_ALGORITHM)
+        length = find(keyblock, CRYPTOGRAPHIC_LENGTH)
+        return cls(require(item, SPLIT_KEY_PARTS, INTEGER), require(item, KEY_PART_IDENTIFIER, INTEGER),
+                   require(item, SPLIT_KEY_THRESHOLD, INTEGER), require(item, SPLIT_KEY_METHOD, ENUMERATION),
+                   require(keyvalue, KEY_MATERIAL, BYTE_STRING), prime[2] if prime else None,
+                   algorithm[2] if algorithm else None, length[2] if length else None)
+
+    @classmethod
+    def decode(cls, buf, offset=0):
+        """Decode a Split Key from buf; its material is a memoryview into buf"""
+        return cls.fromitem(decode(buf, offset)[0])
+
+    def encode(self):
+        return encode(self.toitem())
+
+
+def split_to_ttlv(secret, k, n, thefield=None, algorithm=None, length=None):
+    """Split secret (as shamirshare2.split) and return the n TTLV encoded
+    Split Key objects.  All n are encoded into one preallocated bytearray,
+    and returned as memoryview slices of it."""
+    if thefield is None: thefield = shamirshare2.GF8()
+    method, prime = method_for(thefield)
+    items = [SplitKey(n, x, k, method, y, prime, algorithm, length).toitem() for x, y in shamirshare2.split(secret, k, n, thefield)]
+    sizes = [size(item) for item in items]
+    buf = bytearray(sum(sizes))
+    view = memoryview(buf)
+    objects = []
+    offset = 0
+    for item, thesize in zip(items, sizes):
+        encode_into(item, buf, offset)
+        objects.append(view[offset:offset+thesize])
+        offset += thesize
+    return objects
+
+def recover_from_ttlv(objects):
+    """Recover the secret from at least threshold TTLV encoded Split Key
+    objects (any buffers), passing their Key Material to
+    shamirshare2.recover() without copying it"""
+    parts = [SplitKey.decode(theobject) for theobject in objects]
+    first = parts[0]
+    for part in parts[1:]:
+        if (part.method, part.prime, part.threshold, part.parts) != (first.method, first.prime, first.threshold, first.parts):
+            raise ValueError("Split Key parts {0:} and {1:} are not from the same split".format(first.identifier, part.identifier))
+    if len(parts) < first.threshold:
+        raise ValueError("{0:} Split Key parts given, but {1:} are needed".format(len(parts), first.threshold))
+    return shamirshare2.recover([(part.identifier, part.material) for part in parts], first.field)
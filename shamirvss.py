@@ -0,0 +1,252 @@
+###############################################################################
+# SHAMIRVSS.py
+# Feldman verifiable secret sharing over GFp: the dealer publishes
+# commitments g^a_j to the coefficients of each split polynomial, and holders
+# check their shares against them without revealing the shares.  Uses a
+# fixed-base window table for g, Straus multi-exponentiation for the
+# commitments, and random linear combinations to verify many shares at once.
+# Author: Robert Campbell, <r.campbel.256@gmail.com>
+# License: Simplified BSD (see details at bottom of shamirshare2.py)
+###############################################################################
+
+"""Feldman VSS.  Shares are made over GFp(p) exactly as shamirshare2.split()
+makes them, and the commitments live in the subgroup of order p of the
+integers mod a prime q = r*p + 1, generated by g.  For the polynomial
+f(x) = a_0 + a_1*x + ... + a_(k-1)*x^(k-1) of each slice the dealer
+publishes C_j = g^a_j mod q, and a share y = f(x) is valid if and only if
+    g^y = Prod(j, C_j^(x^j))  (mod q)
+
+Checking a single share naively costs k+1 full exponentiations.  Here
+g^y uses a table of g^(d*2^(w*i)) (one multiplication per w bits of y, no
+squarings), and the product is one Straus multi-exponentiation whose
+exponents x^j are small.  To check many shares (and slices) at once, each
+equation is raised to a random 64 bit rho_i and the results multiplied:
+    g^(Sum rho_i*y_i) = Prod(j, C_j^(Sum rho_i*x_i^j))
+which is one fixed-base exponentiation and one multi-exponentiation in all,
+and accepts a set holding an invalid share with probability at most 2^-64.
+That bound needs every C_j to be in the subgroup of order p (a component of
+small order in Z_q* would let a bad share through for some rho_i with
+far higher probability).  check_commitments() checks C_j^p = 1, one
+exponentiation per commitment, raising ValueError if not, and returns the
+commitments as a Commitments list marked as checked.  Do it once for the
+commitments received from a dealer and pass the result to verify() and
+verify_batch(), which only check commitments that are not so marked (on
+every call, at the cost of several verifications).  split() returns its
+commitments already marked.
+
+    Usage:  ############# Split a key 3-of-5 with commitments #############
+
+        >>> import shamirvss, shamirshare2
+        >>> gf257 = shamirshare2.GFp(2**256 + 297)
+        >>> group = shamirvss.group_for(gf257, bits=512)     # Use 2048+ bits in practice
+        >>> group.q.bit_length(), (group.q - 1) % group.p, pow(group.g, group.p, group.q)
+        (512, 0, 1)
+        >>> secret = bytes(range(64))                        # Two slices of 32 bytes
+        >>> shares, commitments = shamirvss.split(secret, 3, 5, group)
+        >>> len(commitments), len(commitments[0])            # k commitments per slice
+        (2, 3)
+        >>> published = [list(thecommitments) for thecommitments in commitments]
+        >>> commitments = shamirvss.check_commitments(published, group)     # Once, on receipt
+        >>> [shamirvss.verify(share, commitments, group) for share in shares]
+        [True, True, True, True, True]
+        >>> shamirvss.verify_batch(shares, commitments, group)
+        True
+        >>> shamirshare2.recover(shares[:3], gf257) == secret
+        True
+
+        ###### A tampered share fails, alone or in a batch
+        >>> x, y = shares[1]; bad = (x, y[:-1] + bytes([y[-1] ^ 1]))
+        >>> shamirvss.verify(bad, commitments, group), shamirvss.verify_batch([shares[0], bad, shares[2]], commitments, group)
+        (False, False)
+
+        ###### Commitments outside the subgroup are refused
+        >>> forged = [commitments[0], [group.q - 1] + commitments[1][1:]]   # -1 has order 2
+        >>> shamirvss.check_commitments(forged, group)
+        Traceback (most recent call last):
+        ...
+        ValueError: Commitment 0 of slice 1 is not in the subgroup of order p
+        >>> shamirvss.verify_batch(shares, forged, group)                  # Unchecked, so checked here
+        Traceback (most recent call last):
+        ...
+        ValueError: Commitment 0 of slice 1 is not in the subgroup of order p
+"""
+
+import math
+import os
+
+import shamirshare2
+
+RHOBITS = 64    # Bits of the random multipliers of batch verification
+
+
+class FeldmanGroup(object):
+    """The subgroup of order p (the prime of thefield) of the integers mod
+    the prime q, q = r*p + 1, generated by g.  power() raises g to a power
+    using a table of g^(d*2^(window*i)), built on first use."""
+
+    def __init__(self, thefield, q, g, window=5):
+        self.field = thefield
+        self.p = thefield.prime
+        self.q = q
+        self.g = g
+        self.window = window
+        self._table = None
+        if (q - 1) % self.p != 0: raise ValueError("q - 1 is not a multiple of p")
+        if not shamirshare2.isprime(q): raise ValueError("q is not prime")
+        if (g % q in (0, 1)) or (pow(g, self.p, q) != 1): raise ValueError("g does not generate the subgroup of order p")
+
+    def _fixedbase(self):
+        window, q = self.window, self.q
+        table = []
+        base = self.g
+        for i in range((self.p.bit_length() + window - 1) // window):  # table[i][d] = g^(d*2^(window*i))
+            row = [1, base]
+            for d in range(2, 1 << window): row.append(row[-1] * base % q)
+            table.append(row)
+            base = row[-1] * base % q
+        return table
+
+    def power(self, exponent):
+        """g^exponent mod q, with one table lookup and multiplication per
+        window bits of the exponent (reduced mod p)"""
+        if self._table is None: self._table = self._fixedbase()
+        exponent %= self.p
+        window, q = self.window, self.q
+        mask = (1 << window) - 1
+        result = 1
+        for row in self._table:
+            if not exponent: break
+            digit = exponent & mask
+            if digit: result = result * row[digit] % q
+            exponent >>= window
+        return result
+
+    def multipower(self, bases, exponents, window=4):
+        """Prod(i, bases[i]^exponents[i]) mod q by Straus's method: the
+        squarings are shared by all the bases, and each base needs one
+        multiplication per window bits of its exponent"""
+        q = self.q
+        mask = (1 << window) - 1
+        tables = []
+        for base in bases:
+            row = [1, base % q]
+            for d in range(2, 1 << window): row.append(row[-1] * base % q)
+            tables.append(row)
+        nbits = max(exponent.bit_length() for exponent in exponents) if exponents else 0
+        result = 1
+        for shift in range((nbits + window - 1) // window * window - window, -1, -window):
+            for i in range(window): result = result * result % q
+            for row, exponent in zip(tables, exponents):
+                digit = (exponent >> shift) & mask
+                if digit: result = result * row[digit] % q
+        return result
+
+    def commit(self, thepoly):
+        """The commitments [g^a_0, ..., g^a_(k-1)] to a polynomial over GFp"""
+        return [self.power(coeff.value) for coeff in thepoly]
+
+
+class Commitments(list):
+    """The commitments of each slice, [[C_0, ..., C_(k-1)], ...], checked to
+    be in the subgroup of order p of group, as check_commitments() returns"""
+
+    def __init__(self, commitments, group):
+        list.__init__(self, (list(thecommitments) for thecommitments in commitments))
+        self.group = group
+
+
+def group_for(thefield, bits=2048, window=5):
+    """The FeldmanGroup for shares over thefield = GFp(p), with q the first
+    prime r*p + 1 (r even) of the given bit length and g = h^r for the first
+    h = 2, 3, ... giving g != 1.  Deterministic, so everyone agrees on it.
+    The search takes seconds at 2048 bits, so keep q and g, and make the
+    group with FeldmanGroup(thefield, q, g) after that."""
+    p = thefield.prime
+    if bits <= p.bit_length() + 1: raise ValueError("q must be larger than p: ask for more than {0:} bits".format(p.bit_length() + 1))
+    sieve = 1   # The product of the primes below 4096, to skip most candidates with one gcd
+    for m in range(3, 4096, 2):
+        if all(m % d for d in range(3, int(m**0.5) + 1, 2)): sieve *= m
+    r = ((1 << (bits - 1)) // p + 1) & ~1
+    while (math.gcd(r * p + 1, sieve) != 1) or not shamirshare2.isprime(r * p + 1):
+        r += 2
+    q = r * p + 1
+    if q.bit_length() != bits: raise ValueError("No prime q = r*p + 1 of {0:} bits found".format(bits))
+    h = 2
+    while pow(h, r, q) == 1: h += 1
+    return FeldmanGroup(thefield, q, pow(h, r, q), window)
+
+def split(secret, k, n, group):
+    """Split secret k-of-n over group.field as shamirshare2.split() does,
+    returning (shares, commitments), with commitments[s] the k commitments
+    to the polynomial of slice s, as Commitments"""
+    thefield = group.field
+    if thefield.secretbytes == 0: raise ValueError("The field is too small to carry a byte of the secret in each slice")
+    if not (1 <= k <= n): raise ValueError("Need 1 <= k <= n for a k-of-n split, not k = {0:}, n = {1:}".format(k, n))
+    if n >= thefield.order: raise ValueError("Cannot create {0:} distinct shares over a field of order {1:}".format(n, thefield.order))
+    if len(secret) % thefield.secretbytes != 0:
+        raise ValueError("Secret length {0:} is not a multiple of the {1:} byte slices carried by the field".format(len(secret), thefield.secretbytes))
+    xvals = [thefield(x) for x in range(1, n+1)]
+    theshares = [[] for x in xvals]
+    commitments = []
+    for i in range(0, len(secret), thefield.secretbytes):
+        thepoly = [thefield.frombytes(secret[i:i+thefield.secretbytes])] + [thefield.random() for j in range(k-1)]
+        commitments.append(group.commit(thepoly))
+        for theshare, xval in zip(theshares, xvals):
+            theshare.append(thefield.tobytes(shamirshare2.eval(thepoly, xval)))
+    return [(x, b''.join(theshare)) for x, theshare in zip(range(1, n+1), theshares)], Commitments(commitments, group)
+
+def _slices(share, group, nslices):
+    x, y = share
+    width = group.field.eltbytes
+    if len(y) != nslices * width: raise ValueError("Share length {0:} does not match {1:} committed slices".format(len(y), nslices))
+    return [group.field.frombytes(y[i:i+width]).value for i in range(0, len(y), width)]
+
+def check_commitments(commitments, group):
+    """The commitments as Commitments, once each is checked to be in the
+    subgroup of order p of group.  Raises ValueError if one is not."""
+    for s, thecommitments in enumerate(commitments):
+        for j, C in enumerate(thecommitments):
+            if not (0 < C < group.q) or (pow(C, group.p, group.q) != 1):
+                raise ValueError("Commitment {0:} of slice {1:} is not in the subgroup of order p".format(j, s))
+    return Commitments(commitments, group)
+
+def _checked(commitments, group):
+    if isinstance(commitments, Commitments) and (commitments.group is group): return commitments
+    return check_commitments(commitments, group)
+
+def verify(share, commitments, group):
+    """Whether share (x, y) is consistent with the commitments, checking each
+    slice with one fixed-base exponentiation and one multi-exponentiation.
+    Commitments not returned by check_commitments() or split() are checked
+    first, raising ValueError if one is not in the subgroup of order p."""
+    commitments = _checked(commitments, group)
+    x = share[0]
+    for value, thecommitments in zip(_slices(share, group, len(commitments)), commitments):
+        exponents = [pow(x, j, group.p) for j in range(len(thecommitments))]
+        if group.power(value) != group.multipower(thecommitments, exponents): return False
+    return True
+
+def verify_batch(shares, commitments, group):
+    """Whether every share in shares is consistent with the commitments,
+    checked together as one random linear combination of all the equations
+    (a set holding an invalid share passes with probability < 2^-RHOBITS).
+    Commitments not returned by check_commitments() or split() are checked
+    first, raising ValueError if one is not in the subgroup of order p."""
+    commitments = _checked(commitments, group)
+    p = group.p
+    total = 0
+    exponents = [[0]*len(thecommitments) for thecommitments in commitments]
+    for share in shares:
+        x = share[0]
+        for s, value in enumerate(_slices(share, group, len(commitments))):
+            rho = 0
+            while not rho: rho = int.from_bytes(os.urandom(RHOBITS // 8), 'big')   # rho = 0 would leave the share unchecked
+            total += rho * value
+            xpow = 1
+            for j in range(len(commitments[s])):
+                exponents[s][j] += rho * xpow
+                xpow = xpow * x % p
+    # Exponents are reduced mod p only once they outgrow it, so they stay short for small x
+    bases = [C for thecommitments in commitments for C in thecommitments]
+    flat = [e % p if e >= p else e for row in exponents for e in row]
+    return group.power(total) == group.multipower(bases, flat)